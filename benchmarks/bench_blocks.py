@@ -0,0 +1,51 @@
+"""Benchmark: block-sequential against monolithic steady-state solves as trace elements are added to the network
+
+Run with `python benchmarks/bench_blocks.py`. For the CIE network plus k synthetic 3-stage trace elements (see
+networks.trace_element_network), solves 10^4 points on the README T grid three ways: the full network at once, the
+network with the trace elements passive (neglecting their electrons) at once, and the passive network block by block
+(H/He first, then one 2x2 block per element with the H/He solution as known). Reports the size of the largest block,
+the warm solve time per point of each method and, for the passive network, the largest relative deviation of the
+block solution from the monolithic one (over abundances above 10^-10).
+"""
+
+from time import perf_counter
+import numpy as np
+import jax
+from networks import trace_element_network, trace_element_inputs
+
+
+def warm_time(solve):
+    """Solves once to compile, then returns the time and solution of a second solve"""
+    jax.block_until_ready(solve())
+    t = perf_counter()
+    sol = jax.block_until_ready(solve())
+    return perf_counter() - t, sol
+
+
+def main(sizes=(0, 4, 16, 64), N=10**4):
+    print(
+        f"{'elements':>8} {'unknowns':>8} {'block':>6} {'full us/pt':>11} {'passive us/pt':>14} {'blocks us/pt':>13}"
+    )
+    for num_elements in sizes:
+        system, elements = trace_element_network(num_elements)
+        knowns, guess = trace_element_inputs(elements, N)
+        passive = [s for stages in elements.values() for s in stages]
+        blocks = system.network_blocks(passive=passive)
+
+        full, _ = warm_time(lambda: system.steadystate(knowns, guess, tol=1e-4))
+        monolithic, reference = warm_time(lambda: system.steadystate(knowns, guess, tol=1e-4, passive=passive))
+        sequential, sol = warm_time(
+            lambda: system.steadystate(knowns, guess, tol=1e-4, passive=passive, decompose=True)
+        )
+        deviation = max(
+            float(np.max(np.abs(np.asarray(sol[s]) - reference[s]) / (np.abs(reference[s]) + 1e-10)))
+            for s in system.reduced_network
+        )
+        print(
+            f"{num_elements:>8} {len(system.reduced_network):>8} {max(map(len, blocks)):>6} {1e6 * full / N:>11.3f} "
+            f"{1e6 * monolithic / N:>14.3f} {1e6 * sequential / N:>13.3f}  (max deviation {deviation:.2g})"
+        )
+
+
+if __name__ == "__main__":
+    main()
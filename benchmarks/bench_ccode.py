@@ -0,0 +1,73 @@
+"""Benchmark: throughput of the generated C module against the JAX kernels of the same network
+
+Run with `python benchmarks/bench_ccode.py`. For the H/He thermochemical network plus a growing number of synthetic
+trace elements, generates and compiles the C module of Process.generate_c, checks its RHS against the JAX residual
+kernel, and reports evaluations per second of the RHS and the dense Jacobian over a batch of cells for both.
+"""
+
+import tempfile
+from time import perf_counter
+import numpy as np
+import sympy as sp
+import jax
+from pism.ccode import c_compiler, build_c_library, CLibrary
+from pism.kernels import solver_kernels
+from networks import synthetic_network
+
+
+def evaluations_per_second(f, *args, repeats=5):
+    jax.block_until_ready(f(*args))
+    t = perf_counter()
+    for _ in range(repeats):
+        jax.block_until_ready(f(*args))
+    return repeats * args[0].shape[0] / (perf_counter() - t)
+
+
+def main(N=10**5, sizes=(0, 4, 16)):
+    if c_compiler() is None:
+        print("No C compiler found: set the CC environment variable.")
+        return
+    print(
+        f"{'n':>4} {'build s':>8} {'C rhs/s':>10} {'JAX rhs/s':>10} {'C jac/s':>10} {'JAX jac/s':>10} "
+        f"{'max rel. diff':>14}"
+    )
+    for num_elements in sizes:
+        system, _ = synthetic_network(num_elements)
+        t = perf_counter()
+        module = system.generate_c("network")
+        with tempfile.TemporaryDirectory() as tmp:
+            library = CLibrary(
+                build_c_library(module["source"], tmp, "network"),
+                "network",
+                len(module["variables"]),
+                len(module["parameters"]),
+            )
+        build = perf_counter() - t
+
+        rng = np.random.default_rng(0)
+        n = len(module["variables"])
+        x = np.c_[rng.uniform(1e-3, 0.05, (N, n - 1)), np.logspace(4, 6, N)]
+        p = np.array([{"n_Htot": 1.0, "Y": 0.24}.get(s, 1.0) for s in module["parameters"]]) * np.ones((N, 1))
+
+        variables = [sp.Symbol(v) for v in module["variables"]]
+        network = system.time_derivatives()
+        exprs = [network["T" if v == "T" else v[2:]] for v in module["variables"]]
+        parameters = [sp.Symbol(s) for s in module["parameters"]]
+        kernels = solver_kernels(exprs, variables, parameters, [], options={"cse": True, "jacobian": "symbolic"})
+        rhs, jac = jax.jit(jax.vmap(kernels.func)), jax.jit(jax.vmap(kernels.jacfunc))
+        x32, p32 = jax.numpy.asarray(x, dtype="float32"), [jax.numpy.asarray(c, dtype="float32") for c in p.T]
+
+        expected = np.asarray(rhs(x32, *p32), dtype=np.float64)
+        scale = np.max(np.abs(expected), axis=1, keepdims=True)
+        difference = np.max(np.abs(library.rhs(x, p) - expected) / scale)
+        rates = [
+            evaluations_per_second(library.rhs, x, p),
+            evaluations_per_second(rhs, x32, *p32),
+            evaluations_per_second(library.jacobian, x, p),
+            evaluations_per_second(jac, x32, *p32),
+        ]
+        print(f"{n:>4} {build:>8.2f} " + " ".join(f"{r:>10.3g}" for r in rates) + f" {difference:>14.1e}")
+
+
+if __name__ == "__main__":
+    main()
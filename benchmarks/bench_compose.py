@@ -0,0 +1,46 @@
+"""Benchmark: time to compose a network from many processes, pairwise with sum() against Process.compose
+
+Run with `python benchmarks/bench_compose.py`. Composes growing numbers of synthetic ionization and recombination
+processes (see networks.py) and reports the build time and the time per process of each method: pairwise sums rebuild
+the network and re-flatten every sum at each addition, so their cost grows quadratically, while Process.compose
+should stay linear.
+"""
+
+from string import ascii_lowercase
+from time import perf_counter
+import numpy as np
+from pism import Process
+from networks import synthetic_element_name, synthetic_ionization, synthetic_recombination
+from pism.misc import ionize
+
+
+def synthetic_processes(num_processes, seed=0):
+    """Alternating ionization and recombination processes of 2-stage synthetic elements"""
+    rng = np.random.default_rng(seed)
+    processes = []
+    for i in range(num_processes // 2):
+        species = synthetic_element_name(i % 676) + ascii_lowercase[i // 676]
+        processes.append(synthetic_ionization(species, float(rng.uniform(5e4, 1e6)), 1e-11))
+        processes.append(synthetic_recombination(ionize(species), 1e-12, 0.7))
+    return processes
+
+
+def main(sizes=(100, 300, 1000, 3000, 10000), max_pairwise=1000):
+    print(f"{'processes':>10} {'species':>8} {'compose s':>10} {'us/process':>11} {'sum() s':>9} {'us/process':>11}")
+    for num_processes in sizes:
+        processes = synthetic_processes(num_processes)
+        t = perf_counter()
+        composed = Process.compose(processes)
+        t_compose = perf_counter() - t
+        row = f"{num_processes:>10} {len(composed.network):>8} {t_compose:>10.3f} "
+        row += f"{t_compose / num_processes * 1e6:>11.1f}"
+        if num_processes <= max_pairwise:
+            t = perf_counter()
+            sum(processes, Process())
+            t_sum = perf_counter() - t
+            row += f" {t_sum:>9.3f} {t_sum / num_processes * 1e6:>11.1f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
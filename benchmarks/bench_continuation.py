@@ -0,0 +1,49 @@
+"""Benchmark: total Newton iterations and time of continuation sweeps against cold starts in steadystate
+
+Run with `python benchmarks/bench_continuation.py`. Solves the collisional ionization equilibrium of H and He along
+the README's T sweep, and on a flattened (n_Htot, T) grid, from the README's constant guesses and from the closed-form
+default guesses, each with cold starts at every point and with continuation sweeps along T for a few block sizes.
+"""
+
+from time import perf_counter
+import numpy as np
+from pism.processes import CollisionalIonization, GasPhaseRecombination
+
+
+def sweep_inputs(N, num_densities=1):
+    """N points of the README T sweep, repeated for num_densities values of n_Htot and shuffled"""
+    T, n_Htot = np.meshgrid(np.logspace(3, 6, N // num_densities), np.logspace(-2, 2, num_densities))
+    order = np.random.default_rng(0).permutation(T.size)
+    knowns = {"T": T.ravel()[order], "n_Htot": n_Htot.ravel()[order], "Y": np.full(T.size, 0.24)}
+    guesses = {"H": np.full(T.size, 0.5), "He": np.full(T.size, 1e-5), "He+": np.full(T.size, 1e-5)}
+    return knowns, guesses
+
+
+def timed_solve(system, knowns, guess, **kwargs):
+    system.steadystate(knowns, guess, tol=1e-4, **kwargs)  # compile
+    t = perf_counter()
+    sol, info = system.steadystate(knowns, guess, tol=1e-4, return_info=True, **kwargs)
+    sol["H"].block_until_ready()
+    return sol, info, perf_counter() - t
+
+
+def main(N=10**5, block_sizes=(64, 256, 1024)):
+    system = CollisionalIonization() + GasPhaseRecombination()
+    print(
+        f"{'inputs':>14} {'guess':>8} {'block size':>10} {'iterations':>11} {'per point':>9} {'time s':>7} "
+        f"{'failed':>6}"
+    )
+    for label, num_densities in (("T sweep", 1), ("(n_Htot, T)", 16)):
+        knowns, readme_guess = sweep_inputs(N, num_densities)
+        for guess_label, guess in (("README", readme_guess), ("default", None)):
+            for block_size in (None, *block_sizes):
+                kwargs = {} if block_size is None else {"continuation": "T", "block_size": block_size}
+                sol, info, time = timed_solve(system, knowns, guess, **kwargs)
+                num_iter = int(info["num_iter"].sum())
+                failed = int((~np.asarray(info["converged"])).sum())
+                row = f"{label:>14} {guess_label:>8} {block_size or 'cold':>10} {num_iter:>11} "
+                print(row + f"{num_iter / len(knowns['T']):>9.2f} {time:>7.3f} {failed:>6}")
+
+
+if __name__ == "__main__":
+    main()
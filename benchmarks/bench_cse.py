@@ -0,0 +1,59 @@
+"""Benchmark: operations saved by common-subexpression elimination in the CIE + thermal residual
+
+Run with `python benchmarks/bench_cse.py`. Reports the symbolic operation counts per point of the generated residual,
+the FLOP/transcendental estimate from XLA's cost analysis of the compiled kernel (which already merges some identical
+ops on its own), and the wall time of evaluating the residual on a batch of points.
+"""
+
+from time import perf_counter
+import numpy as np
+import sympy as sp
+import jax
+from pism.processes import CollisionalIonization, GasPhaseRecombination
+from pism.codegen import operation_counts
+from pism.kernels import lambdify_kernel
+
+
+def cie_residual():
+    """Thermochemical residual of the CollisionalIonization() + GasPhaseRecombination() system and its arguments"""
+    system = CollisionalIonization() + GasPhaseRecombination()
+    network = system.get_thermochem_network()
+    unknowns = [sp.Symbol(f"n_{s}") for s in network if s != "T"] + [sp.Symbol("T")]
+    knowns = [sp.Symbol("n_Htot"), sp.Symbol("Y")]
+    return list(network.values()), unknowns, knowns
+
+
+def xla_cost(kernel, X, params):
+    """FLOPs and transcendentals per point from XLA's cost analysis of the batched kernel"""
+    compiled = jax.jit(jax.vmap(lambda x, p: kernel(x, *p))).lower(X, params).compile()
+    cost = compiled.cost_analysis()
+    cost = cost[0] if isinstance(cost, (list, tuple)) else cost
+    return cost.get("flops", np.nan) / len(X), cost.get("transcendentals", np.nan) / len(X)
+
+
+def main(N=10**6, repeats=5):
+    exprs, unknowns, knowns = cie_residual()
+    rng = np.random.default_rng(42)
+    X = np.c_[rng.random((N, len(unknowns) - 1)), np.logspace(3, 6, N)].astype(np.float32)
+    params = np.c_[100 * np.ones(N), 0.24 * np.ones(N)].astype(np.float32)
+
+    print(f"{'':>8} {'sym flops':>10} {'sym transc.':>12} {'XLA flops':>10} {'XLA transc.':>12} {'ns/point':>9}")
+    for cse in (False, True):
+        counts = operation_counts(exprs, cse=cse)
+        kernel = lambdify_kernel(unknowns + knowns, exprs, cse=cse)
+        xla_flops, xla_transc = xla_cost(kernel, X, params)
+        batched = jax.jit(jax.vmap(lambda x, p: kernel(x, *p)))
+        batched(X, params).block_until_ready()
+        t = perf_counter()
+        for _ in range(repeats):
+            batched(X, params).block_until_ready()
+        ns = (perf_counter() - t) / repeats / N * 1e9
+        label = "CSE" if cse else "no CSE"
+        print(
+            f"{label:>8} {counts['flops']:>10} {counts['transcendentals']:>12} {xla_flops:>10.0f} {xla_transc:>12.0f}"
+            f" {ns:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
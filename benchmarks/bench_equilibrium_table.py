@@ -0,0 +1,60 @@
+"""Benchmark: interpolated lookups in a precomputed equilibrium table against direct steadystate solves
+
+Run with `python benchmarks/bench_equilibrium_table.py`. Builds an adaptively refined table of the collisional
+ionization equilibrium of H and He over (T, n_Htot), and reports its build time, size and accuracy, and the time per
+point of jitted batched table queries and of steadystate solves.
+"""
+
+import os
+import tempfile
+from time import perf_counter
+import numpy as np
+import jax
+import jax.numpy as jnp
+from pism import EquilibriumTable
+from pism.processes import CollisionalIonization, GasPhaseRecombination
+
+
+def main(N_query=10**6, N_solve=10**4, tol=0.01):
+    system = CollisionalIonization() + GasPhaseRecombination()
+    guess = {"H": 1e-3, "He": 1e-4, "He+": 1e-3}
+    axes = {"T": np.logspace(2, 9, 15), "n_Htot": np.logspace(-4, 4, 5)}
+    t = perf_counter()
+    table = system.equilibrium_table(axes, guess, fixed={"Y": 0.24}, tol=tol)
+    build = perf_counter() - t
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "table.npz")
+        table.save(path)
+        size = os.path.getsize(path)
+        table = EquilibriumTable.load(path)
+    print(table)
+    print(f"build: {build:.1f}s, {table.metadata['num_solves']} solves; file: {size / 1024:.1f} kB")
+
+    rng = np.random.default_rng(0)
+    T, n_Htot = 10 ** rng.uniform(2, 9, N_query), 10 ** rng.uniform(-4, 4, N_query)
+    query = jax.jit(table.query_function())
+    T_q, n_q = jnp.asarray(T), jnp.asarray(n_Htot)
+    jax.block_until_ready(query(T_q, n_q))
+    t = perf_counter()
+    result = jax.block_until_ready(query(T_q, n_q))
+    t_query = (perf_counter() - t) / N_query
+
+    knowns = {"T": T[:N_solve], "n_Htot": n_Htot[:N_solve], "Y": 0.24 * np.ones(N_solve)}
+    guesses = {s: np.full(N_solve, g) for s, g in guess.items()}
+    system.steadystate(knowns, guesses, tol=1e-5)  # compile
+    t = perf_counter()
+    exact = system.steadystate(knowns, guesses, tol=1e-5)
+    t_solve = (perf_counter() - t) / N_solve
+
+    floor = table.metadata["abundance_floor"]
+    print(
+        f"query: {t_query * 1e6:.3f} us/pt; steadystate: {t_solve * 1e6:.1f} us/pt; speedup {t_solve / t_query:.0f}x"
+    )
+    print(f"abundance errors against steadystate in dex above the floor of {floor:g} (tolerance {tol} dex):")
+    for s in ("H", "H+", "He", "He+", "He++", "e-"):
+        error = np.abs(np.log10(np.asarray(result[s][:N_solve]) + floor) - np.log10(np.maximum(exact[s], 0) + floor))
+        print(f"{s:>5}: 99th percentile {np.percentile(error, 99):.4f}, max {error.max():.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark: iterations and failure rates of plain Newton steps against line search and trust region globalization
+
+Run with `python benchmarks/bench_globalization.py`. Solves two problems with each globalization strategy and a few
+numbers of careful steps, reporting the mean number of iterations and the fraction of points that failed, i.e. did not
+converge or converged to a wrong state:
+- collisional ionization equilibrium of H and He along the README T sweep from the README guesses, checked against
+  the exact closed-form CIE state of Process.default_guess;
+- thermochemical equilibrium of the H/He network with line and free-free cooling and a random heating rate per H
+  nucleon, from T = 10^4 K and the closed-form abundances there, checked by the energy balance at the solution.
+"""
+
+from time import perf_counter
+import numpy as np
+import sympy as sp
+from networks import cie_network, thermal_equilibrium_network
+
+STRATEGIES = (None, "linesearch", "trust_region")
+
+
+def cie_problem(N):
+    system = cie_network()
+    T = np.logspace(3, 6, N)
+    knowns = {"T": T, "n_Htot": np.full(N, 100.0), "Y": np.full(N, 0.24)}
+    guess = {"H": np.full(N, 0.5), "He": np.full(N, 1e-5), "He+": np.full(N, 1e-5)}
+    exact = system.default_guess(knowns)
+
+    def failed(sol, info):
+        wrong = np.zeros(N, dtype=bool)
+        for species in ("H", "He", "He+"):  # the solved-for species, resolved to float32 precision
+            wrong |= ~np.isclose(np.asarray(sol[species]), exact[species], rtol=1e-2, atol=1e-6)
+        return ~np.asarray(info["converged"]) | wrong
+
+    return system, knowns, guess, failed
+
+
+def thermal_problem(N, seed=0):
+    system = thermal_equilibrium_network()
+    rng = np.random.default_rng(seed)
+    n_Htot = 10 ** rng.uniform(-2, 2, N)
+    knowns = {"n_Htot": n_Htot, "Y": np.full(N, 0.24), "Gamma": n_Htot * 10 ** rng.uniform(-25, -22.5, N)}
+    guess = {"T": np.full(N, 1e4)}
+    guess |= system.default_guess(knowns, T=guess["T"])
+    symbols = sorted(system.heat.free_symbols, key=str)
+    heat = sp.lambdify(symbols, system.heat, "numpy")
+
+    def failed(sol, info):
+        values = {f"n_{s}": np.asarray(x, dtype=np.float64) * n_Htot for s, x in sol.items() if s != "T"}
+        values |= {"T": np.asarray(sol["T"], dtype=np.float64)} | knowns
+        with np.errstate(all="ignore"):
+            imbalance = np.abs(heat(*(values[str(s)] for s in symbols))) / (knowns["Gamma"] * n_Htot)
+        return ~np.asarray(info["converged"]) | ~(imbalance < 1e-2)
+
+    return system, knowns, guess, failed
+
+
+def main(N=10**4, careful_steps=(1, 10)):
+    print(f"{'problem':>8} {'globalization':>13} {'careful':>7} {'mean iter':>9} {'failed':>7} {'time s':>7}")
+    for label, problem in (("CIE", cie_problem), ("thermal", thermal_problem)):
+        system, knowns, guess, failed = problem(N)
+        for globalization in STRATEGIES:
+            for careful in careful_steps:
+                kwargs = dict(tol=1e-4, careful_steps=careful, globalization=globalization, return_info=True)
+                system.steadystate(knowns, guess, **kwargs)  # compile
+                t = perf_counter()
+                sol, info = system.steadystate(knowns, guess, **kwargs)
+                elapsed = perf_counter() - t
+                row = f"{label:>8} {str(globalization):>13} {careful:>7} {float(np.mean(info['num_iter'])):>9.2f}"
+                print(row + f" {failed(sol, info).mean():>7.2%} {elapsed:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
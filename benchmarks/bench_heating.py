@@ -0,0 +1,51 @@
+"""Benchmark: per-subprocess heating and cooling rates over a large snapshot, fused kernel against lambdify loops
+
+Run with `python benchmarks/bench_heating.py`. Evaluates the net heating rate and the heating rate and rate of every
+subprocess of the thermal equilibrium network (see networks.py) at N random cells, once with Process.heating_rates (one
+fused, cached kernel) and once by lambdifying and evaluating each expression separately with numpy, as was needed
+before. Both the first call, including code generation and compilation, and a repeated call are timed.
+"""
+
+from time import perf_counter
+import numpy as np
+import sympy as sp
+import jax
+from networks import thermal_equilibrium_network
+
+
+def lambdify_loop(system, values):
+    """Evaluates each expression of heating_expressions with its own numpy lambdify"""
+    densities = {f"n_{s}": values[s] * values["n_Htot"] for s in system.network} | values
+    out = []
+    for expr in system.heating_expressions()[1]:
+        symbols = sorted(expr.free_symbols, key=str)
+        value = sp.lambdify(symbols, expr, "numpy")(*(densities[str(s)] for s in symbols))
+        out.append(np.broadcast_to(value, values["T"].shape))
+    return np.array(out).T
+
+
+def main(N=10**6):
+    system = thermal_equilibrium_network()
+    rng = np.random.default_rng(0)
+    values = {"T": 10 ** rng.uniform(2, 8, N), "n_Htot": 10 ** rng.uniform(-4, 4, N), "Y": np.full(N, 0.24)}
+    values |= {"Gamma": np.full(N, 1e-24)} | {s: rng.uniform(0, 1, N) for s in system.network}
+
+    methods = {
+        "fused float32": lambda: jax.block_until_ready(system.heating_rates(values)["subprocess_heat"]),
+        "fused float64": lambda: system.heating_rates(values, precision="float64")["subprocess_heat"],
+        "lambdify loop": lambda: lambdify_loop(system, values),
+    }
+    print(f"{len(system.subprocesses)} subprocesses, {N} cells")
+    print(f"{'method':>14} {'first s':>8} {'repeat s':>9} {'cells/s':>10}")
+    for label, method in methods.items():
+        t = perf_counter()
+        method()
+        first = perf_counter() - t
+        t = perf_counter()
+        method()
+        repeat = perf_counter() - t
+        print(f"{label:>14} {first:>8.3f} {repeat:>9.3f} {N / repeat:>10.4g}")
+
+
+if __name__ == "__main__":
+    main()
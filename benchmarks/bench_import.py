@@ -0,0 +1,46 @@
+"""Benchmark: import time of pism and its heavy dependencies, from `python -X importtime`
+
+Run with `python benchmarks/bench_import.py [module ...]`. Each module is imported in a fresh interpreter with
+-X importtime, and the cumulative import time of the module and of the third-party packages it pulled in is reported.
+The symbolic API (pism.processes) should not import jax or astropy at all: a non-zero time in those columns is an
+import-time regression.
+"""
+
+import os
+import subprocess
+import sys
+
+DEPENDENCIES = ("sympy", "numpy", "jax", "astropy")
+
+
+def import_times(module):
+    """Returns the cumulative import time in seconds of module and of each top-level package it imported"""
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([src, os.environ.get("PYTHONPATH", "")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], env=env, capture_output=True, text=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        name = name.strip()
+        if name in DEPENDENCIES or name == module:
+            times[name] = int(cumulative) * 1e-6
+    return times
+
+
+def main(modules=("pism", "pism.processes", "pism.kernels", "pism.tables")):
+    print(f"{'module':>16} {'total s':>8}" + "".join(f" {d + ' s':>10}" for d in DEPENDENCIES))
+    for module in modules:
+        times = import_times(module)
+        row = f"{module:>16} {times.get(module, float('nan')):>8.3f}"
+        row += "".join(f" {times.get(d, 0.0):>10.3f}" for d in DEPENDENCIES)
+        print(row)
+
+
+if __name__ == "__main__":
+    main(*(sys.argv[1:2] and [tuple(sys.argv[1:])]))
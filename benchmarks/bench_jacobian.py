@@ -0,0 +1,52 @@
+"""Benchmark: per-iteration cost of the generated sparse analytic Jacobian against jax.jacfwd
+
+Run with `python benchmarks/bench_jacobian.py`. For the H/He CIE network plus a growing number of synthetic trace
+elements, times one Newton iteration's worth of work (residual, Jacobian and linear solve) per point on a batch of
+points, with the Jacobian from the symbolic generator and from forward-mode autodiff of the residual.
+"""
+
+from time import perf_counter
+import numpy as np
+import sympy as sp
+import jax
+import jax.numpy as jnp
+from pism.kernels import solver_kernels
+from networks import synthetic_network
+
+
+def time_batched(f, *args, repeats=5):
+    f(*args).block_until_ready()
+    t = perf_counter()
+    for _ in range(repeats):
+        f(*args).block_until_ready()
+    return (perf_counter() - t) / repeats
+
+
+def main(N=10**5, sizes=(0, 2, 4, 8, 16)):
+    print(f"{'n':>4} {'nnz':>5} {'jacfwd ns/pt':>13} {'symbolic ns/pt':>15} {'step jacfwd':>12} {'step symbolic':>14}")
+    for num_elements in sizes:
+        system, _ = synthetic_network(num_elements)
+        exprs = list(system.network.values()) + [system.heat]
+        unknowns = [sp.Symbol(f"n_{s}") for s in system.network] + [sp.Symbol("T")]
+        n = len(unknowns)
+        rng = np.random.default_rng(0)
+        X = np.c_[rng.uniform(1e-3, 1, (N, n - 1)), np.logspace(4, 6, N)].astype(np.float32)
+
+        results = []
+        for jacobian in ("autodiff", "symbolic"):
+            kernels = solver_kernels(exprs, unknowns, [], unknowns, options={"cse": True, "jacobian": jacobian})
+            jac = jax.jit(jax.vmap(kernels.jacfunc))
+
+            @jax.jit
+            @jax.vmap
+            def step(x):
+                return jnp.linalg.solve(kernels.jacfunc(x), kernels.func(x))
+
+            results.append((time_batched(jac, X) / N * 1e9, time_batched(step, X) / N * 1e9))
+        nnz = int(np.count_nonzero(jax.vmap(kernels.jacfunc)(X[:16]).any(axis=0)))
+        (jf, sf), (js, ss) = results
+        print(f"{n:>4} {nnz:>5} {jf:>13.1f} {js:>15.1f} {sf:>12.1f} {ss:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
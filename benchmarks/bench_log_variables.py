@@ -0,0 +1,38 @@
+"""Benchmark: iterations and failure rates of Newton iterations in log variables against linear ones
+
+Run with `python benchmarks/bench_log_variables.py`. Solves the CIE and thermochemical equilibrium problems of
+bench_globalization in linear and log variables, with plain Newton steps and a few numbers of careful steps and with
+line search, reporting the mean and maximum number of iterations, the fraction of points that failed (did not converge
+or converged to a wrong state) and the warm solve time.
+"""
+
+from time import perf_counter
+import numpy as np
+from bench_globalization import cie_problem, thermal_problem
+
+SETTINGS = ((None, 1), (None, 10), ("linesearch", 1))  # globalization and careful steps
+
+
+def main(N=10**4):
+    print(
+        f"{'problem':>8} {'variables':>9} {'globalization':>13} {'careful':>7} {'mean iter':>9} {'max iter':>8} "
+        f"{'failed':>7} {'time s':>7}"
+    )
+    for label, problem in (("CIE", cie_problem), ("thermal", thermal_problem)):
+        system, knowns, guess, failed = problem(N)
+        for variables in ("linear", "log"):
+            for globalization, careful in SETTINGS:
+                kwargs = dict(
+                    tol=1e-4, careful_steps=careful, globalization=globalization, variables=variables, return_info=True
+                )
+                system.steadystate(knowns, guess, **kwargs)  # compile
+                t = perf_counter()
+                sol, info = system.steadystate(knowns, guess, **kwargs)
+                elapsed = perf_counter() - t
+                num_iter = np.asarray(info["num_iter"])
+                row = f"{label:>8} {variables:>9} {str(globalization):>13} {careful:>7} {num_iter.mean():>9.2f}"
+                print(row + f" {num_iter.max():>8} {failed(sol, info).mean():>7.2%} {elapsed:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Benchmark: throughput and accuracy of the float32, mixed and float64 solve policies
+
+Run with `python benchmarks/bench_precision.py`. Solves collisional ionization equilibrium of H and He along the README
+T sweep from the README guesses with each precision policy of Process.steadystate, reporting the wall time, the mean
+number of iterations (including float64 refinement steps) and the largest relative error of the solved-for species
+against a float64 reference converged to tol=1e-10. Derived species (H+, e-, He++) inherit the cancellation error of
+the conservation laws they are computed from, so they are reported separately as the median relative error.
+"""
+
+from time import perf_counter
+import numpy as np
+from networks import cie_network
+
+POLICIES = ((None, 3), ("mixed", 3), ("mixed", 10), ("float64", 3))
+
+
+def main(N=10**5, tol=1e-4):
+    system = cie_network()
+    T = np.logspace(3, 6, N)
+    knowns = {"T": T, "n_Htot": np.full(N, 100.0), "Y": np.full(N, 0.24)}
+    guess = {"H": np.full(N, 0.5), "He": np.full(N, 1e-5), "He+": np.full(N, 1e-5)}
+    ref = system.steadystate(knowns, guess, tol=1e-10, precision="float64")
+
+    def error(sol, species, reduce):
+        resolved = ref[species] > 1e-12
+        return reduce(np.abs(np.asarray(sol[species], dtype=np.float64) / ref[species] - 1)[resolved])
+
+    header = f"{'precision':>9} {'refine':>6} {'time s':>7} {'mean iter':>9} {'conv':>6}"
+    print(header + f" {'max err H/He/He+':>26} {'median err H+/e-/He++':>26}")
+    for precision, refinement_steps in POLICIES:
+        kwargs = dict(tol=tol, precision=precision, refinement_steps=refinement_steps, return_info=True)
+        system.steadystate(knowns, guess, **kwargs)  # compile
+        t = perf_counter()
+        sol, info = system.steadystate(knowns, guess, **kwargs)
+        np.asarray(sol["H"])
+        elapsed = perf_counter() - t
+        solved = " ".join(f"{error(sol, s, np.max):.1e}" for s in ("H", "He", "He+"))
+        derived = " ".join(f"{error(sol, s, np.median):.1e}" for s in ("H+", "e-", "He++"))
+        row = f"{str(precision):>9} {refinement_steps:>6} {elapsed:>7.3f} {float(np.mean(info['num_iter'])):>9.2f}"
+        print(row + f" {np.mean(info['converged']):>6.1%} {solved:>26} {derived:>26}")
+
+
+if __name__ == "__main__":
+    main()
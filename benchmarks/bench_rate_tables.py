@@ -0,0 +1,70 @@
+"""Benchmark: cost of evaluating a network with tabulated T-dependent coefficients against their closed-form fits
+
+Run with `python benchmarks/bench_rate_tables.py`. For the H/He thermochemical network plus a growing number of
+synthetic trace elements, reports the transcendental calls per residual evaluation, the time per point to evaluate the
+residual and Jacobian on a batch of points with and without tabulation (the linear solve of a Newton iteration is
+unaffected), and the table resolution and measured error.
+"""
+
+from time import perf_counter
+import numpy as np
+import sympy as sp
+import jax
+import jax.numpy as jnp
+from pism.codegen import operation_counts, extract_coefficients
+from pism.kernels import solver_kernels
+from pism.rate_tables import table_options
+from networks import synthetic_network
+
+
+def time_batched(f, *args, repeats=5):
+    f(*args).block_until_ready()
+    t = perf_counter()
+    for _ in range(repeats):
+        f(*args).block_until_ready()
+    return (perf_counter() - t) / repeats
+
+
+def main(N=10**5, sizes=(0, 4, 16), rtol=1e-4):
+    print(
+        f"{'n':>4} {'coeffs':>6} {'transc.':>8} {'tab. transc.':>12} {'exact ns/pt':>12} {'tabulated ns/pt':>16}",
+        end="",
+    )
+    print(f" {'pts/dex':>8} {'max error':>10} {'build s':>8}")
+    T = sp.Symbol("T")
+    for num_elements in sizes:
+        system, _ = synthetic_network(num_elements)
+        exprs = list(system.network.values()) + [system.heat]
+        unknowns = [sp.Symbol(f"n_{s}") for s in system.network] + [T]
+        n = len(unknowns)
+        rng = np.random.default_rng(0)
+        X = np.c_[rng.uniform(1e-3, 1, (N, n - 1)), np.logspace(4, 6, N)].astype(np.float32)
+        reduced, coefficients = extract_coefficients(exprs, T)
+
+        times = []
+        for tabulate in (False, {"rtol": rtol}):
+            options = {"cse": True, "jacobian": "symbolic"}
+            if tabulate:
+                options["tabulate"] = table_options(tabulate)
+            t = perf_counter()
+            kernels = solver_kernels(exprs, unknowns, [], unknowns, options=options)
+            build = perf_counter() - t
+
+            @jax.jit
+            @jax.vmap
+            def evaluate(x):
+                return jnp.concatenate([kernels.func(x), kernels.jacfunc(x).ravel()])
+
+            times.append(time_batched(evaluate, X) / N * 1e9)
+        report = kernels.table_report
+        exact_ops = operation_counts(exprs, cse=True)["transcendentals"]
+        tabulated_ops = operation_counts(reduced, cse=True)["transcendentals"]
+        print(
+            f"{n:>4} {len(coefficients):>6} {exact_ops:>8} {tabulated_ops:>12} {times[0]:>12.1f} {times[1]:>16.1f}",
+            end="",
+        )
+        print(f" {report['points_per_dex']:>8} {report['max_relative_error']:>10.1e} {build:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
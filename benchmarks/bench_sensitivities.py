@@ -0,0 +1,40 @@
+"""Benchmark: sensitivity maps of the CIE solution from implicit-function-theorem derivatives against finite
+differences
+
+Run with `python benchmarks/bench_sensitivities.py`. Computes the derivatives of every species with respect to T,
+n_Htot and Y over the README T grid, once with Process.steadystate_sensitivities (one solve, linearized at the roots)
+and once by central differences (two solves per quantity), reporting the wall time of each after compilation.
+"""
+
+from time import perf_counter
+import numpy as np
+from networks import cie_network
+
+
+def main(N=10**6, h=1e-3):
+    system = cie_network()
+    knowns = {"T": np.logspace(3, 6, N), "n_Htot": np.full(N, 100.0), "Y": np.full(N, 0.24)}
+    guess = system.default_guess(knowns)
+
+    def implicit():
+        sol, sensitivities = system.steadystate_sensitivities(knowns, guess, tol=1e-4)
+        return [np.asarray(d) for derivatives in sensitivities.values() for d in derivatives.values()]
+
+    def finite_differences():
+        derivatives = []
+        for quantity, values in knowns.items():
+            up, down = (system.steadystate(knowns | {quantity: values * (1 + s)}, guess, tol=1e-4) for s in (h, -h))
+            derivatives += [(np.asarray(up[k]) - np.asarray(down[k])) / (2 * h * values) for k in up]
+        return derivatives
+
+    print(f"{'method':>20} {'solves':>6} {'time s':>7} {'points/s':>10}")
+    for label, method, solves in (("implicit function", implicit, 1), ("finite differences", finite_differences, 6)):
+        method()  # compile
+        t = perf_counter()
+        method()
+        elapsed = perf_counter() - t
+        print(f"{label:>20} {solves:>6} {elapsed:>7.3f} {N / elapsed:>10.4g}")
+
+
+if __name__ == "__main__":
+    main()
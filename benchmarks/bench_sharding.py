@@ -0,0 +1,56 @@
+"""Benchmark: CIE steadystate throughput against the number of JAX devices the batch is sharded over
+
+Run with `python benchmarks/bench_sharding.py [N] [max_devices]` (max_devices defaults to the number of CPU cores).
+Each device count runs in a fresh process with XLA_FLAGS=--xla_force_host_platform_device_count=<devices>, since the
+number of host devices is fixed when JAX starts. On a single multi-core CPU node this measures how well sharding uses
+the cores. With more devices than cores the devices share cores, so any speedup comes from shards finishing
+independently rather than from parallel compute, and is not device scaling.
+"""
+
+import os
+import subprocess
+import sys
+from time import perf_counter
+
+
+def worker(N, repeats=3):
+    """Times steadystate(shard=True) on the README T grid with the devices this process was started with"""
+    import numpy as np
+    import jax
+    from networks import cie_network
+
+    system = cie_network()
+    Tgrid = np.logspace(3, 6, N)
+    knowns = {"T": Tgrid, "n_Htot": 100 * np.ones(N), "Y": 0.24 * np.ones(N)}
+    guesses = {"H": 0.5 * np.ones(N), "He": 1e-5 * np.ones(N), "He+": 1e-5 * np.ones(N)}
+
+    def solve():
+        sol = system.steadystate(knowns, guesses, tol=1e-4, shard=True)
+        return sol["H"].block_until_ready()
+
+    solve()
+    t = perf_counter()
+    for _ in range(repeats):
+        solve()
+    elapsed = (perf_counter() - t) / repeats
+    print(f"{jax.device_count():>8} {elapsed:>10.3f} {N / elapsed:>14.0f}")
+
+
+def main(N=10**5, max_devices=None):
+    max_devices = max_devices or os.cpu_count() or 1
+    device_counts = sorted(
+        {1, max_devices} | {2**i for i in range(1, max_devices.bit_length()) if 2**i <= max_devices}
+    )
+    print(f"{N} points, {os.cpu_count()} CPU cores")
+    print(f"{'devices':>8} {'seconds':>10} {'points/second':>14}")
+    for devices in device_counts:
+        env = dict(os.environ, XLA_FLAGS=f"--xla_force_host_platform_device_count={devices}", JAX_PLATFORMS="cpu")
+        subprocess.run([sys.executable, __file__, "--worker", str(N)], env=env, check=True)
+
+
+if __name__ == "__main__":
+    if "--worker" in sys.argv:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        worker(int(sys.argv[-1]))
+    else:
+        main(*[int(a) for a in sys.argv[1:]])
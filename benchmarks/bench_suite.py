@@ -0,0 +1,168 @@
+"""Benchmark suite: network build, reduction, code generation, compilation and solve throughput, saved for comparison
+
+Run with `python benchmarks/bench_suite.py [--quick] [--cases NAME ...] [--output results.json] [--compare old.json]`.
+Each case runs in a fresh interpreter on the CPU, so that its compile time includes everything a new process pays and
+its peak memory (maximum resident set size) is its own. A case builds its network, reduces it, solves its points once
+from cold (code generation plus JAX tracing and XLA compilation, measured with pism.instrument) and then again with
+warm caches, reporting the warm throughput in points per second. Cases:
+- cie-<N>: the H/He CIE network of the README on its T grid of N points, up to the README's 10^6;
+- trace-<k>: the CIE network plus k synthetic 3-stage trace elements with conserved abundances (see
+  networks.trace_element_network), on 10^4 points.
+
+Results are written as JSON with the library versions and machine they were measured on. With --compare, each metric
+is printed next to its value in an earlier results file, and slowdowns beyond --threshold are flagged.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+from datetime import datetime, timezone
+from importlib import metadata
+from time import perf_counter
+
+CASES = {
+    "cie-1e4": ("cie", 0, 10**4),
+    "cie-1e5": ("cie", 0, 10**5),
+    "cie-1e6": ("cie", 0, 10**6),
+    "trace-4": ("trace", 4, 10**4),
+    "trace-16": ("trace", 16, 10**4),
+    "trace-64": ("trace", 64, 10**4),
+}
+QUICK_CASES = ("cie-1e4", "cie-1e5", "trace-4", "trace-16")
+COMPILE_PHASES = ("jax_trace", "jax_lower", "xla_compile")
+# metrics where larger is better; for all the others (times and memory) smaller is better
+HIGHER_IS_BETTER = ("points_per_second", "converged_fraction")
+MIN_SECONDS = 0.05  # changes of times shorter than this are timer noise, never flagged
+
+
+def run_case(name):
+    """Runs one case in this interpreter and returns its metrics"""
+    import numpy as np
+    import pism
+    from networks import cie_network, trace_element_network, trace_element_inputs
+
+    kind, num_elements, N = CASES[name]
+    t = perf_counter()
+    system, elements = (cie_network(), None) if kind == "cie" else trace_element_network(num_elements)
+    build = perf_counter() - t
+    t = perf_counter()
+    system.reduced_network
+    reduce = perf_counter() - t
+
+    if kind == "cie":  # the README inputs
+        knowns = {"T": np.logspace(3, 6, N), "n_Htot": np.full(N, 100.0), "Y": np.full(N, 0.24)}
+        guess = {"H": np.full(N, 0.5), "He": np.full(N, 1e-5), "He+": np.full(N, 1e-5)}
+    else:
+        knowns, guess = trace_element_inputs(elements, N)
+    with pism.instrument() as cold:
+        system.steadystate(knowns, guess, tol=1e-4)
+    with pism.instrument() as warm:
+        system.steadystate(knowns, guess, tol=1e-4)
+    phases, (solve,) = cold.phases(), warm.solves()
+
+    def seconds(recorder_phases, suffixes):
+        return sum(p["seconds"] for path, p in recorder_phases.items() if path.split("/")[-1] in suffixes)
+
+    solve_time = warm.phases()["steadystate"]["seconds"]
+    return {
+        "species": len(system.network),
+        "unknowns": len(system.reduced_network),
+        "points": N,
+        "build_s": build,
+        "reduce_s": reduce,
+        "codegen_s": seconds(phases, ("codegen", "kernel_setup")),
+        "compile_s": seconds(phases, COMPILE_PHASES),
+        "cold_solve_s": phases["steadystate"]["seconds"],
+        "solve_s": solve_time,
+        "points_per_second": N / solve_time,
+        "mean_iter": solve["mean_iter"],
+        "converged_fraction": solve["converged_fraction"],
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def run_isolated(name):
+    """Runs one case in a fresh interpreter and returns its metrics"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    src = os.path.join(os.path.dirname(here), "src")
+    env = dict(os.environ, JAX_PLATFORMS="cpu")
+    env["PYTHONPATH"] = os.pathsep.join([src, here, os.environ.get("PYTHONPATH", "")])
+    command = [sys.executable, os.path.abspath(__file__), "--run-case", name]
+    result = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def environment():
+    """Versions, commit and machine the results were measured on"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    versions = {}
+    for package in ("jax", "jaxlib", "numpy", "sympy"):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    git = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=here, capture_output=True, text=True)
+    return {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git.stdout.strip() or None,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        **versions,
+    }
+
+
+def compare(results, previous, threshold):
+    """Prints each metric against its previous value, flagging regressions beyond the relative threshold"""
+    print(f"{'case':>13} {'metric':>18} {'previous':>11} {'current':>11} {'ratio':>7}")
+    for name, metrics in results["cases"].items():
+        if name not in previous["cases"]:
+            continue
+        for metric, value in metrics.items():
+            old = previous["cases"][name].get(metric)
+            if not isinstance(old, float) or old <= 0:
+                continue
+            ratio = value / old
+            slower = ratio < 1 - threshold if metric in HIGHER_IS_BETTER else ratio > 1 + threshold
+            if metric.endswith("_s") and abs(value - old) < MIN_SECONDS:
+                slower = False
+            flag = "  REGRESSION" if slower else ""
+            print(f"{name:>13} {metric:>18} {old:>11.4g} {value:>11.4g} {ratio:>7.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), help="cases to run (default: all)")
+    parser.add_argument("--quick", action="store_true", help=f"only run {', '.join(QUICK_CASES)}")
+    parser.add_argument("--output", help="path of the JSON results file to write")
+    parser.add_argument("--compare", help="path of an earlier JSON results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative change flagged as a regression")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case)))
+        return
+
+    names = args.cases or (QUICK_CASES if args.quick else list(CASES))
+    results = {"environment": environment(), "cases": {}}
+    columns = ("build_s", "reduce_s", "codegen_s", "compile_s", "solve_s", "points_per_second", "peak_rss_mb")
+    print(f"{'case':>13} {'unknowns':>8} " + " ".join(f"{c:>17}" for c in columns))
+    for name in names:
+        metrics = results["cases"][name] = run_isolated(name)
+        print(f"{name:>13} {metrics['unknowns']:>8} " + " ".join(f"{metrics[c]:>17.4g}" for c in columns))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f), args.threshold)
+
+
+if __name__ == "__main__":
+    main()
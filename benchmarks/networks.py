@@ -0,0 +1,107 @@
+"""Reproducible networks used by the benchmarks"""
+
+from string import ascii_lowercase
+import numpy as np
+import sympy as sp
+from pism import Process
+from pism.processes import CollisionalIonization, GasPhaseRecombination, LineCoolingSimple, FreeFreeEmission
+from pism.misc import ionize, recombine
+from pism.symbols import T, T5, T4, n_, n_e
+
+
+def cie_network():
+    """The collisional ionization equilibrium H/He network from the README"""
+    return CollisionalIonization() + GasPhaseRecombination()
+
+
+def thermal_equilibrium_network():
+    """CIE network plus H and He+ line cooling, free-free emission and a heating rate Gamma * n_Htot, whose
+    thermochemical equilibrium is set by the heating rate per H nucleon Gamma"""
+    system = cie_network() + LineCoolingSimple("H") + LineCoolingSimple("He+")
+    system += Process.compose(FreeFreeEmission(i) for i in ("H+", "He+", "He++"))
+    heating = Process(name="Constant heating per H nucleon")
+    heating.heat = sp.Symbol("Gamma") * sp.Symbol("n_Htot")
+    return system + heating
+
+
+def synthetic_element_name(i):
+    """Name of the i'th synthetic element - letters only, so that the pism.misc species helpers parse it"""
+    return "X" + ascii_lowercase[i // 26] + ascii_lowercase[i % 26]
+
+
+def synthetic_ionization(species, energy_K, amplitude):
+    """Collisional ionization of species with the same functional form as the H/He fits of 1996ApJS..105...19K"""
+    process = Process(name=f"Synthetic ionization of {species}")
+    rate = amplitude * sp.sqrt(T) * sp.exp(-energy_K / T) / (1 + sp.sqrt(T5)) * n_(species) * n_e
+    process.rate = rate
+    process.network[species] -= rate
+    process.network[ionize(species)] += rate
+    process.network["e-"] += rate
+    process.heat = -1.380649e-16 * energy_K * rate
+    return process
+
+
+def synthetic_recombination(ion, amplitude, slope):
+    """Power-law radiative recombination of ion, removing the mean kinetic energy of the electron"""
+    process = Process(name=f"Synthetic recombination of {ion}")
+    rate = amplitude * T4**-slope * n_(ion) * n_e
+    recombined = recombine(ion)
+    process.rate = rate
+    process.network[ion] -= rate
+    process.network[recombined] += rate
+    process.network["e-"] -= rate
+    process.heat = -1.036e-16 * T * rate
+    return process
+
+
+def synthetic_network(num_elements, stages=3, seed=0):
+    """H/He CIE network plus num_elements synthetic trace elements with `stages` ionization states each
+
+    Returns
+    -------
+    system: Process
+        The composed process
+    metals: list
+        Names of the synthetic species that were added
+    """
+    rng = np.random.default_rng(seed)
+    processes = [CollisionalIonization(), GasPhaseRecombination()]
+    metals = []
+    for i in range(num_elements):
+        species = synthetic_element_name(i)
+        for _ in range(stages - 1):
+            ion = ionize(species)
+            energy = float(rng.uniform(5e4, 1e6))
+            processes.append(synthetic_ionization(species, energy, float(rng.uniform(1e-12, 1e-10))))
+            processes.append(synthetic_recombination(ion, float(rng.uniform(1e-13, 1e-11)), 0.7))
+            metals.append(species)
+            species = ion
+        metals.append(species)
+    return Process.compose(processes), metals
+
+
+def trace_element_network(num_elements, stages=3, seed=0):
+    """synthetic_network with the ionization stages of each synthetic element grouped, whose steady state is
+    well-defined given the total abundance per H nucleon x_<element> of each element (Process.conservation_laws picks
+    up the conservation of each element and eliminates its highest stage)
+
+    Returns
+    -------
+    system: Process
+        The composed process
+    elements: dict
+        Names of the synthetic elements and their ionization stages
+    """
+    system, metals = synthetic_network(num_elements, stages, seed)
+    return system, {metals[i]: metals[i : i + stages] for i in range(0, len(metals), stages)}
+
+
+def trace_element_inputs(elements, N, abundance=1e-4):
+    """Knowns on the README T grid and guesses (the README guesses, with each trace element spread evenly over its
+    stages) for a steadystate solve of a trace_element_network with the given elements"""
+    knowns = {"T": np.logspace(3, 6, N), "n_Htot": np.full(N, 100.0), "Y": np.full(N, 0.24)}
+    knowns |= {f"x_{element}": np.full(N, abundance) for element in elements}
+    guess = {"H": np.full(N, 0.5), "He": np.full(N, 1e-5), "He+": np.full(N, 1e-5)}
+    for stages in elements.values():
+        guess |= {s: np.full(N, abundance / len(stages)) for s in stages[:-1]}
+    return knowns, guess
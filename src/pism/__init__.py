@@ -1,3 +1,26 @@
+from importlib import import_module
 from .misc import *
-from .numerics import *
-from .process import Process
+from .instrumentation import instrument
+
+# everything below needs sympy and/or jax, so it is only imported on first access to keep `import pism` cheap
+_LAZY_ATTRIBUTES = {
+    "Process": ".process",
+    "EquilibriumTable": ".tables",
+    "newton_rootsolve": ".numerics",
+    "newton_solve": ".numerics",
+    "integrate": ".numerics",
+    "kernel_cache_info": ".kernels",
+    "clear_kernel_cache": ".kernels",
+    "set_kernel_cache_dir": ".kernels",
+}
+
+__getattr__ = lazy_attributes(
+    __name__,
+    {
+        name: (lambda name=name, module=module: getattr(import_module(module, __name__), name))
+        for name, module in _LAZY_ATTRIBUTES.items()
+    },
+)
+
+# the lazy attributes are listed so that star-imports include them
+__all__ = [name for name in globals() if not name.startswith("_") and name != "import_module"] + list(_LAZY_ATTRIBUTES)
@@ -0,0 +1,193 @@
+"""Generation of self-contained C implementations of a network's RHS, heating term and Jacobian, plus a harness to
+build them with the system C compiler and call them from Python through ctypes"""
+
+import os
+import ctypes
+import shutil
+import subprocess
+import numpy as np
+import sympy as sp
+from sympy.printing.c import C99CodePrinter
+from .codegen import cse_expressions, sparse_jacobian
+
+C_FUNCTIONS = ("rhs", "heat", "jacobian")
+
+
+def c_source(name, exprs, heat, variables, parameters, cse=True):
+    """Generates a C99 module evaluating a system of ODEs dx/dt = f(x, p), its heating term and its Jacobian
+
+    Each quantity gets a per-cell function taking fixed-size arrays, e.g. void <name>_rhs(const double
+    x[<NAME>_NUM_VARIABLES], const double p[<NAME>_NUM_PARAMETERS], double f[<NAME>_NUM_VARIABLES]), and a batched
+    variant <name>_rhs_batch(long N, const double *x, const double *p, double *f) looping over N cells stored
+    contiguously. The Jacobian is written densely in row-major order, J[i * <NAME>_NUM_VARIABLES + j] = df_i/dx_j.
+
+    Parameters
+    ----------
+    name: str
+        Prefix of the generated identifiers, which must be a valid C identifier
+    exprs: list
+        Sympy expressions for the components of f
+    heat: sympy.Expr
+        Expression for the net heating rate per unit volume
+    variables: list
+        Symbols of the components of x
+    parameters: list
+        Symbols of the components of p
+    cse: bool, optional
+        Whether to eliminate common subexpressions within each function (default: True)
+
+    Returns
+    -------
+    source: str
+        The C source, including the declarations of its header
+    header: str
+        A header declaring the generated functions and array sizes
+    """
+    if not name.isidentifier():
+        raise ValueError(f"{name} is not a valid C identifier.")
+    arrays = {s: sp.Symbol(f"x[{i}]") for i, s in enumerate(variables)}
+    arrays.update({s: sp.Symbol(f"p[{j}]") for j, s in enumerate(parameters)})
+    n, num_params = len(variables), len(parameters)
+    jacobian = sparse_jacobian(exprs, variables)
+    NAME = name.upper()
+
+    outputs = {  # output array, its size per cell and its nonzero entries
+        "rhs": ("f", f"{NAME}_NUM_VARIABLES", [(f"f[{i}]", e) for i, e in enumerate(exprs)]),
+        "heat": ("heat", "1", [("heat[0]", heat)]),
+        "jacobian": ("J", f"{NAME}_JACOBIAN_SIZE", [(f"J[{i * n + j}]", df) for (i, j), df in jacobian.items()]),
+    }
+    declarations = [
+        f"#define {NAME}_NUM_VARIABLES {n}",
+        f"#define {NAME}_NUM_PARAMETERS {num_params}",
+        f"#define {NAME}_JACOBIAN_SIZE {n * n}",
+        "",
+        "/* variables x: " + ", ".join(f"{i}: {s}" for i, s in enumerate(variables)) + " */",
+        "/* parameters p: " + ", ".join(f"{j}: {s}" for j, s in enumerate(parameters)) + " */",
+        "",
+    ]
+    body = ["#include <math.h>", "#include <string.h>", ""]
+    printer = C99CodePrinter()
+    for func, (out_name, out_size, assignments) in outputs.items():
+        cell_signature = (
+            f"void {name}_{func}(const double x[{NAME}_NUM_VARIABLES], const double p[{NAME}_NUM_PARAMETERS], "
+            f"double {out_name}[{out_size}])"
+        )
+        batch_signature = (
+            f"void {name}_{func}_batch(long N, const double *restrict x, const double *restrict p, "
+            f"double *restrict {out_name})"
+        )
+        declarations += [f"{cell_signature};", f"{batch_signature};"]
+
+        lines = [cell_signature, "{"]
+        if func == "jacobian":
+            lines.append(f"    memset(J, 0, sizeof(double) * {NAME}_JACOBIAN_SIZE);")
+        exprs_out = [sp.sympify(e).xreplace(arrays) for _, e in assignments]
+        temporaries, exprs_out = cse_expressions(exprs_out) if cse else ([], exprs_out)
+        for symbol, expr in temporaries:
+            lines.append(f"    const double {printer.doprint(symbol)} = {printer.doprint(expr)};")
+        for (target, _), expr in zip(assignments, exprs_out):
+            lines.append(f"    {target} = {printer.doprint(expr)};")
+        lines += ["}", "", batch_signature, "{"]
+        lines += [
+            "    for (long i = 0; i < N; i++) {",
+            f"        {name}_{func}(x + i * {NAME}_NUM_VARIABLES, p + i * {NAME}_NUM_PARAMETERS, "
+            f"{out_name} + i * {out_size});",
+            "    }",
+            "}",
+            "",
+        ]
+        body += lines
+    title = f"/* {name}: C implementation of a chemistry/thermal network generated by pism */"
+    header = [title, f"#ifndef {NAME}_H", f"#define {NAME}_H", "", *declarations, "", f"#endif /* {NAME}_H */", ""]
+    source = [title, "", *body[:3], *declarations, "", *body[3:]]
+    return "\n".join(source), "\n".join(header)
+
+
+def c_compiler():
+    """Returns the path of the system C compiler ($CC, cc, gcc or clang), or None if there is none"""
+    for compiler in (os.environ.get("CC"), "cc", "gcc", "clang"):
+        if compiler and shutil.which(compiler):
+            return shutil.which(compiler)
+    return None
+
+
+def build_c_library(source, directory, name, compiler=None, flags=("-O3", "-march=native")):
+    """Compiles generated C source into a shared library
+
+    Parameters
+    ----------
+    source: str
+        The C source, e.g. from c_source
+    directory: str
+        Directory to write the source and library to
+    name: str
+        Name of the module, used for the file names
+    compiler: str, optional
+        C compiler to use (default: see c_compiler)
+    flags: tuple, optional
+        Optimization flags passed to the compiler (default: ("-O3", "-march=native"))
+
+    Returns
+    -------
+    path: str
+        Path of the compiled shared library
+    """
+    compiler = compiler or c_compiler()
+    if compiler is None:
+        raise RuntimeError("No C compiler found: set the CC environment variable.")
+    source_path = os.path.join(directory, f"{name}.c")
+    library_path = os.path.join(directory, f"lib{name}.so")
+    with open(source_path, "w") as f:
+        f.write(source)
+    command = [compiler, *flags, "-std=c99", "-shared", "-fPIC", source_path, "-o", library_path, "-lm"]
+    subprocess.run(command, check=True, capture_output=True)
+    return library_path
+
+
+class CLibrary:
+    """Batched numpy interface to a compiled network library built from c_source
+
+    Parameters
+    ----------
+    path: str
+        Path of the shared library
+    name: str
+        Prefix of the generated identifiers
+    num_variables, num_parameters: int
+        Sizes of the x and p arrays of each cell
+    """
+
+    def __init__(self, path, name, num_variables, num_parameters):
+        self.library = ctypes.CDLL(os.path.abspath(path))
+        self.num_variables, self.num_parameters = num_variables, num_parameters
+        self.output_sizes = {"rhs": num_variables, "heat": 1, "jacobian": num_variables**2}
+        pointer = np.ctypeslib.ndpointer(dtype=np.float64, flags="C_CONTIGUOUS")
+        self.functions = {}
+        for func in C_FUNCTIONS:
+            function = getattr(self.library, f"{name}_{func}_batch")
+            function.argtypes = [ctypes.c_long, pointer, pointer, pointer]
+            function.restype = None
+            self.functions[func] = function
+
+    def evaluate(self, func, x, p):
+        """Evaluates one of the generated functions ("rhs", "heat" or "jacobian") on shape (N, num_variables) and (N,
+        num_parameters) arrays, returning a shape (N, num_variables), (N,) or (N, num_variables, num_variables)
+        array"""
+        x = np.ascontiguousarray(np.atleast_2d(x), dtype=np.float64)
+        p = np.ascontiguousarray(np.broadcast_to(p, (x.shape[0], self.num_parameters)), dtype=np.float64)
+        out = np.empty((x.shape[0], self.output_sizes[func]))
+        self.functions[func](x.shape[0], x, p, out)
+        if func == "heat":
+            return out[:, 0]
+        if func == "jacobian":
+            return out.reshape(-1, self.num_variables, self.num_variables)
+        return out
+
+    def rhs(self, x, p):
+        return self.evaluate("rhs", x, p)
+
+    def heat(self, x, p):
+        return self.evaluate("heat", x, p)
+
+    def jacobian(self, x, p):
+        return self.evaluate("jacobian", x, p)
@@ -0,0 +1,139 @@
+"""Code generation stages applied to symbolic networks before they are turned into numerical kernels"""
+
+import sympy as sp
+
+# count_ops categories that cost a transcendental function call rather than a few FLOPs
+TRANSCENDENTAL_OPS = ("EXP", "LOG", "POW", "SIN", "COS", "TAN", "SINH", "COSH", "TANH", "ATAN", "ERF")
+
+
+def cse_expressions(exprs):
+    """Runs common-subexpression elimination jointly across a list of expressions
+
+    Parameters
+    ----------
+    exprs: list
+        Sympy expressions, e.g. the residual, heating and tolerance expressions of a network
+
+    Returns
+    -------
+    replacements: list
+        List of (symbol, expression) pairs defining the common subexpressions, in evaluation order
+    reduced_exprs: list
+        The input expressions rewritten in terms of the replacement symbols
+    """
+    return sp.cse(list(exprs))
+
+
+def operation_counts(exprs, cse=False):
+    """Counts the operations needed to evaluate a list of expressions once, i.e. per point of a batched kernel
+
+    Parameters
+    ----------
+    exprs: list
+        Sympy expressions
+    cse: bool, optional
+        Whether to count the operations after common-subexpression elimination (default: False)
+
+    Returns
+    -------
+    counts: dict
+        Dict with the total number of "flops", the number of "transcendentals" (exp, log, pow, ...) and the
+        breakdown by operation type in "ops"
+    """
+    exprs = list(exprs)
+    if cse:
+        replacements, exprs = cse_expressions(exprs)
+        exprs = [r for _, r in replacements] + exprs
+    visual = sp.count_ops(exprs, visual=True)
+    ops = {str(op): int(n) for op, n in visual.as_coefficients_dict().items() if op != 1}
+    return {
+        "flops": sum(ops.values()),
+        "transcendentals": sum(n for op, n in ops.items() if op in TRANSCENDENTAL_OPS),
+        "ops": ops,
+    }
+
+
+def sparse_jacobian(exprs, variables, chain=None):
+    """Symbolic Jacobian of a list of expressions, keeping only its structurally nonzero entries
+
+    Parameters
+    ----------
+    exprs: list
+        Sympy expressions f_i
+    variables: list
+        Symbols x_j to differentiate with respect to
+    chain: dict, optional
+        Dict mapping symbols k that stand for functions of one of the variables, e.g. tabulated coefficients k(T), to
+        (variable, dk) pairs, where the symbol dk stands for the derivative of k. The chain rule terms df/dk * dk are
+        added to the derivatives with respect to that variable.
+
+    Returns
+    -------
+    jacobian: dict
+        Dict mapping index pairs (i, j) to the expression for df_i/dx_j, for all entries that are not identically 0
+    """
+    chain = chain or {}
+    jacobian = {}
+    for i, f in enumerate(exprs):
+        f = sp.sympify(f)
+        for j, x in enumerate(variables):
+            dependent = [(k, dk) for k, (v, dk) in chain.items() if v == x and k in f.free_symbols]
+            if x not in f.free_symbols and not dependent:
+                continue
+            df = sp.diff(f, x) + sum(sp.diff(f, k) * dk for k, dk in dependent)
+            if df != 0:
+                jacobian[(i, j)] = df
+    return jacobian
+
+
+def extract_coefficients(exprs, variable, prefix="k"):
+    """Replaces every factor of a list of expressions that depends only on variable, e.g. a rate coefficient k(T), by a
+    coefficient symbol, so that the coefficients can be evaluated separately (e.g. from a table)
+
+    Factors are pulled out of products with their numerical prefactor and sign removed, so that coefficients differing
+    only by a constant multiple share a symbol. Factors polynomial in variable are cheap to evaluate and are left as
+    they are.
+
+    Parameters
+    ----------
+    exprs: list
+        Sympy expressions
+    variable: sympy.Symbol
+        The variable the coefficients depend on, e.g. T
+    prefix: str, optional
+        Prefix of the names of the coefficient symbols (default: "k")
+
+    Returns
+    -------
+    reduced_exprs: list
+        The input expressions rewritten in terms of the coefficient symbols
+    coefficients: dict
+        Dict mapping each coefficient symbol to the expression it stands for, in order of appearance
+    """
+    symbols = {}
+
+    def is_coefficient(expr):
+        return expr.has(variable) and expr.free_symbols <= {variable} and not expr.is_polynomial(variable)
+
+    def coefficient_symbol(expr):
+        if -expr in symbols:
+            return -symbols[-expr]
+        if expr not in symbols:
+            symbols[expr] = sp.Symbol(f"{prefix}_{len(symbols)}")
+        return symbols[expr]
+
+    def extract(expr):
+        if is_coefficient(expr):
+            constant, factor = expr.as_coeff_Mul()
+            return constant * coefficient_symbol(factor)
+        if isinstance(expr, sp.Mul):
+            factors = [a for a in expr.args if a.free_symbols <= {variable}]
+            if any(is_coefficient(a) for a in factors):
+                rest = [extract(a) for a in expr.args if not a.free_symbols <= {variable}]
+                return extract(sp.Mul(*factors)) * sp.Mul(*rest)
+        if not expr.args:
+            return expr
+        return expr.func(*[extract(a) for a in expr.args])
+
+    reduced_exprs = [extract(sp.sympify(e)) for e in exprs]
+    return reduced_exprs, {s: expr for expr, s in symbols.items()}
@@ -0,0 +1,163 @@
+"""Automatic derivation of the element and charge conservation laws of a network, and of the elimination of species
+that they allow
+
+Every species is parsed into its elemental composition and charge. The linear combinations of species conserved by the
+network form the left nullspace of its stoichiometry matrix, and the element and charge laws found in that nullspace
+are used to eliminate one species each. The total of each element is a known quantity per H nucleon: n_Htot for H,
+Y / (4 - 4 Y) n_Htot for He (from the He mass fraction Y), and x_<element> n_Htot for any other element.
+"""
+
+import re
+from collections import namedtuple
+import numpy as np
+import sympy as sp
+from .misc import base_species, species_charge
+from .symbols import n_
+
+ConservationLaw = namedtuple("ConservationLaw", ["name", "coefficients", "total"])
+ELEMENT = re.compile(r"([A-Z][a-z]*)(\d*)")
+NULLSPACE_RTOL = 1e-10  # singular values below this fraction of the largest count as zero
+
+
+def species_composition(species: str):
+    """Returns the number of atoms of each element in a species, e.g. {"H": 2, "O": 1} for "H2O" or "H2O+", or None
+    if the name is not a chemical formula. Charge suffixes follow pism.misc, so digits directly before a trailing
+    charge sign belong to the charge ("C3+" is triply ionized carbon). Electrons have an empty composition."""
+    if species == "e-":
+        return {}
+    formula = base_species(species) if species[-1] in "+-" else species
+    if not formula or ELEMENT.sub("", formula):
+        return None
+    composition = {}
+    for element, count in ELEMENT.findall(formula):
+        composition[element] = composition.get(element, 0) + (int(count) if count else 1)
+    return composition
+
+
+def element_total(element: str):
+    """Returns the symbolic total number density of an element"""
+    n_Htot = sp.Symbol("n_Htot")
+    if element == "H":
+        return n_Htot
+    if element == "He":
+        Y = sp.Symbol("Y")
+        return Y / (4 - 4 * Y) * n_Htot
+    return sp.Symbol(f"x_{element}") * n_Htot
+
+
+def stoichiometry_matrix(network):
+    """Returns the stoichiometry matrix of a network: entry (i, j) is the numerical coefficient of the j'th distinct
+    rate term in the equation of the i'th species, splitting each term of each equation into a number times a rate"""
+    rates, entries = {}, []
+    for i, rhs in enumerate(network.values()):
+        for term in sp.Add.make_args(sp.sympify(rhs)):
+            coefficient, rate = term.as_coeff_Mul()
+            if coefficient != 0:
+                entries.append((i, rates.setdefault(rate, len(rates)), float(coefficient)))
+    S = np.zeros((len(network), len(rates)))
+    for i, j, coefficient in entries:
+        S[i, j] += coefficient
+    return S
+
+
+def conserved_subspace(network):
+    """Returns an orthonormal basis of the linear combinations of species conserved by a network, as the columns of a
+    shape (num_species, num_conserved) array: the left nullspace of its stoichiometry matrix"""
+    S = stoichiometry_matrix(network)
+    norms = np.linalg.norm(S, axis=0)
+    S = S[:, norms > 0] / norms[norms > 0]  # rate coefficients span many orders of magnitude
+    if S.shape[1] == 0:
+        return np.eye(len(network))
+    U, singular_values, _ = np.linalg.svd(S, full_matrices=True)
+    rank = int(np.sum(singular_values > NULLSPACE_RTOL * singular_values[0]))
+    return U[:, rank:]
+
+
+def conservation_laws(network, neglected_charge=()):
+    """Returns the element and charge conservation laws obeyed by a network
+
+    Parameters
+    ----------
+    network: dict
+        Dict mapping species names to the symbolic RHS of their rate equations
+    neglected_charge: iterable, optional
+        Species left out of the charge law, e.g. passive species whose electrons are neglected
+
+    Returns
+    -------
+    laws: list
+        ConservationLaw tuples of a name (the element, or "charge"), a dict of species and their integer coefficients,
+        and the symbolic conserved total, for each element in order of first appearance and then for charge. Laws
+        involving species whose composition cannot be parsed, or that the network does not conserve, are left out.
+    """
+    species = list(network)
+    compositions = {s: species_composition(s) for s in species}
+    elements = list(dict.fromkeys(e for c in compositions.values() if c for e in c))
+    candidates = [(e, {s: c[e] for s, c in compositions.items() if c and e in c}, element_total(e)) for e in elements]
+    charges = {s: species_charge(s) for s in species if species_charge(s) and s not in neglected_charge}
+    candidates.append(("charge", charges, sp.S.Zero))
+
+    basis = conserved_subspace(network)
+    laws = []
+    for name, coefficients, total in candidates:
+        if not coefficients or (name != "charge" and any(compositions[s] is None for s in species)):
+            continue
+        c = np.array([coefficients.get(s, 0) for s in species], dtype=float)
+        if np.linalg.norm(c - basis @ (basis.T @ c)) <= 1e-8 * np.linalg.norm(c):
+            laws.append(ConservationLaw(name, coefficients, total))
+    return laws
+
+
+def elimination_order(law):
+    """Sort key of the species that a law may eliminate: electrons for charge, and otherwise the most highly ionized,
+    then the simplest species of the element, as in the H+ and He++ of the original H/He reduction"""
+
+    def key(species):
+        if law.name == "charge":
+            return (species != "e-",)
+        composition = species_composition(species) or {}
+        return (-species_charge(species), sum(composition.values()), len(composition))
+
+    return key
+
+
+def reduction_replacements(network, laws=None):
+    """Returns replacements eliminating one species per independent conservation law from a network
+
+    Parameters
+    ----------
+    network: dict
+        Dict mapping species names to the symbolic RHS of their rate equations
+    laws: list, optional
+        Conservation laws to apply (default: conservation_laws(network))
+
+    Returns
+    -------
+    replacements: dict
+        Dict mapping the number density symbol of each eliminated species to its expression in terms of the remaining
+        species and the conserved totals
+    """
+    laws = conservation_laws(network) if laws is None else laws
+    species = list(network)
+    C = np.array([[law.coefficients.get(s, 0) for s in species] for law in laws], dtype=float).reshape(
+        -1, len(species)
+    )
+    used, eliminated = [], []
+    for i, law in enumerate(laws):
+        for s in sorted(law.coefficients, key=elimination_order(law)):
+            if s in eliminated:
+                continue
+            block = C[np.ix_(used + [i], [species.index(e) for e in eliminated + [s]])]
+            if np.linalg.matrix_rank(block) == len(used) + 1:  # keeps the eliminated block invertible
+                used.append(i)
+                eliminated.append(s)
+                break
+
+    if not eliminated:
+        return {}
+    remaining = [s for s in species if s not in eliminated]
+    coefficients = sp.Matrix([[laws[i].coefficients.get(s, 0) for s in eliminated + remaining] for i in used])
+    k = len(eliminated)
+    totals = sp.Matrix([laws[i].total for i in used])
+    solution = coefficients[:, :k].inv() * (totals - coefficients[:, k:] * sp.Matrix([n_(s) for s in remaining]))
+    return {n_(s): sp.expand(solution[j]) for j, s in enumerate(eliminated)}
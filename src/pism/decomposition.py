@@ -0,0 +1,104 @@
+"""Decomposition of a network into blocks of strongly coupled unknowns that can be solved one after another
+
+The equation of each unknown (species, or T) depends on some of the others. Unknowns that depend on each other through
+any chain of equations form a strongly connected component of this dependency graph and must be solved together, but
+the components themselves form an acyclic graph: ordered so that every block only depends on itself and the blocks
+before it (block-triangular form), each block can be solved with the solutions of the earlier ones as known quantities.
+
+Trace species usually still feed back weakly on the rest of the network, e.g. through their electrons, which couples
+everything into a single block. Designating them as passive (see passive_network and Process.with_passive) neglects
+that feedback.
+"""
+
+import sympy as sp
+from .conservation import species_composition
+from .symbols import n_
+
+
+def unknown_symbol(name):
+    """Returns the symbol of the unknown of a network: T for "T", and the number density of a species otherwise"""
+    return sp.Symbol("T") if name == "T" else n_(name)
+
+
+def shares_element(a, b):
+    """Whether two unknowns contain a common element, or are the same unknown"""
+    if a == b:
+        return True
+    composition_a, composition_b = species_composition(a), species_composition(b)
+    return bool(composition_a and composition_b and set(composition_a) & set(composition_b))
+
+
+def passive_network(network, passive):
+    """Returns a copy of a network in which the passive species are set to 0 in the equations of every unknown that
+    does not share an element with them, so that they do not feed back on the rest of the network: e.g. a passive
+    metal ion still takes part in the equations of its own element, but not in those of H, He, T or other elements"""
+    reduced = {}
+    for name, rhs in network.items():
+        zeros = {n_(p): 0 for p in passive if not shares_element(p, name)}
+        reduced[name] = sp.sympify(rhs).xreplace(zeros) if zeros else rhs
+    return reduced
+
+
+def dependency_graph(network):
+    """Returns a dict mapping each unknown of a network to the list of unknowns its equation depends on"""
+    symbols = {unknown_symbol(name): name for name in network}
+    return {
+        name: [symbols[s] for s in sorted(sp.sympify(rhs).free_symbols, key=str) if s in symbols]
+        for name, rhs in network.items()
+    }
+
+
+def strongly_connected_components(graph):
+    """Returns the strongly connected components of a directed graph given as a dict of nodes and their successors,
+    ordered so that each component only has edges to itself and earlier components (Tarjan's algorithm)"""
+    index, lowlink, on_stack, stack, components = {}, {}, set(), [], []
+    for root in graph:
+        if root in index:
+            continue
+        work = [(root, iter(graph[root]))]
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        while work:  # iterative depth-first search, so that large networks do not hit the recursion limit
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = lowlink[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(graph[successor])))
+                    break
+                if successor in on_stack:
+                    lowlink[node] = min(lowlink[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    lowlink[work[-1][0]] = min(lowlink[work[-1][0]], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = set()
+                    while True:
+                        component_root = stack.pop()
+                        on_stack.discard(component_root)
+                        component.add(component_root)
+                        if component_root == node:
+                            break
+                    components.append(component)
+    return components
+
+
+def network_blocks(network):
+    """Decomposes a network into blocks of unknowns to be solved in sequence
+
+    Parameters
+    ----------
+    network: dict
+        Dict mapping unknowns (species, or "T") to the symbolic RHS of their equations
+
+    Returns
+    -------
+    blocks: list
+        Lists of unknowns in network order, such that the equations of each block only depend on the unknowns of that
+        block and of the blocks before it
+    """
+    order = {name: i for i, name in enumerate(network)}
+    return [sorted(component, key=order.get) for component in strongly_connected_components(dependency_graph(network))]
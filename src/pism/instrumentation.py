@@ -0,0 +1,196 @@
+"""Phase-level timing, cache and convergence statistics of solves, for profiling and monitoring
+
+Wrap any code in `with pism.instrument() as recorder:` to record where the time of Process.steadystate and
+newton_rootsolve calls inside it goes: sympy reduction of the network, code generation, JAX tracing and lowering, XLA
+compilation and the Newton iterations themselves, along with kernel cache hits and the per-point iteration counts of
+every batch solved. Outside of an instrument block the hooks cost a single list lookup.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# JAX monitoring events of its compilation pipeline, reported as phases nested in the phase that triggered them
+JAX_PHASES = {
+    "/jax/core/compile/jaxpr_trace_duration": "jax_trace",
+    "/jax/core/compile/jaxpr_to_mlir_module_duration": "jax_lower",
+    "/jax/core/compile/backend_compile_duration": "xla_compile",
+}
+JAX_CACHE_EVENTS = {
+    "/jax/compilation_cache/cache_hits": "hit",
+    "/jax/compilation_cache/cache_misses": "miss",
+}
+
+active_recorders = []
+phase_stack = []  # [name, start time, seconds spent in nested phases] of each phase in progress
+jax_listeners_registered = False
+
+
+class Recorder:
+    """Collects the records emitted while it is active (see instrument)
+
+    Each record is a JSON-serializable dict with an "event" field:
+    - "phase": a timed phase, with its "name", the "path" of enclosing phases joined by "/", the wall time "seconds"
+      it took and the "self_seconds" not spent in nested phases, plus any fields describing it;
+    - "cache": a lookup in the kernel cache ("cache": "kernels") or JAX's persistent compilation cache ("cache":
+      "xla"), with its "result" ("memory", "disk", "hit" or "miss");
+    - "solve": the statistics of a batch of points solved by newton_rootsolve (see solve_statistics).
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+        if self.callback is not None:
+            self.callback(record)
+
+    def phases(self):
+        """Returns the number of calls, total and self wall time of each phase, keyed by path"""
+        phases = {}
+        for record in self.records:
+            if record["event"] == "phase":
+                summary = phases.setdefault(record["path"], {"calls": 0, "seconds": 0.0, "self_seconds": 0.0})
+                summary["calls"] += 1
+                summary["seconds"] += record["seconds"]
+                summary["self_seconds"] += record["self_seconds"]
+        return phases
+
+    def cache(self):
+        """Returns the number of lookups of each cache with each result"""
+        counts = {}
+        for record in self.records:
+            if record["event"] == "cache":
+                results = counts.setdefault(record["cache"], {})
+                results[record["result"]] = results.get(record["result"], 0) + 1
+        return counts
+
+    def solves(self):
+        """Returns the statistics of each batch solved"""
+        return [record for record in self.records if record["event"] == "solve"]
+
+    def as_dict(self):
+        """Returns a summary of the phases, cache lookups and solves, plus the raw records"""
+        return {"phases": self.phases(), "cache": self.cache(), "solves": self.solves(), "records": list(self.records)}
+
+    def to_jsonl(self, file):
+        """Writes the records as JSON lines to a path or an open text file"""
+        if isinstance(file, (str, bytes)) or hasattr(file, "__fspath__"):
+            with open(file, "w") as f:
+                return self.to_jsonl(f)
+        for record in self.records:
+            file.write(json.dumps(record) + "\n")
+
+
+@contextmanager
+def instrument(callback=None):
+    """Records timings and statistics of the solves run inside the block
+
+    Parameters
+    ----------
+    callback: callable, optional
+        Function called with each record as it is emitted, e.g. to forward it to a monitoring system
+
+    Yields
+    ------
+    recorder: Recorder
+        The records of the block, summarized by recorder.as_dict() or written with recorder.to_jsonl(file)
+    """
+    register_jax_listeners()
+    recorder = Recorder(callback)
+    active_recorders.append(recorder)
+    try:
+        yield recorder
+    finally:
+        active_recorders.remove(recorder)
+
+
+def enabled():
+    """Whether any recorder is active, so that statistics that cost time to gather are worth computing"""
+    return bool(active_recorders)
+
+
+def emit(event, **fields):
+    """Sends a record to every active recorder"""
+    if not active_recorders:
+        return
+    record = {"event": event, "time": time.time(), **fields}
+    for recorder in active_recorders:
+        recorder.emit(record)
+
+
+@contextmanager
+def phase(name, **fields):
+    """Times the enclosed code as a phase of the given name, nested in the phases in progress"""
+    if not active_recorders:
+        yield
+        return
+    frame = [name, time.perf_counter(), 0.0]
+    phase_stack.append(frame)
+    try:
+        yield
+    finally:
+        phase_stack.pop()
+        record_phase(frame, time.perf_counter() - frame[1], fields)
+
+
+def timed(name):
+    """Decorator timing every call of a function as a phase of the given name"""
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record_phase(frame, seconds, fields):
+    path = "/".join([f[0] for f in phase_stack] + [frame[0]])
+    if phase_stack:
+        phase_stack[-1][2] += seconds
+    emit("phase", name=frame[0], path=path, seconds=seconds, self_seconds=max(seconds - frame[2], 0.0), **fields)
+
+
+def register_jax_listeners():
+    """Forwards JAX's compilation events to the active recorders (registered once, on the first instrument block)"""
+    global jax_listeners_registered
+    if jax_listeners_registered:
+        return
+    from jax import monitoring
+
+    def on_duration(event, seconds, **kwargs):
+        if event in JAX_PHASES and active_recorders:
+            fields = {"function": str(kwargs["fun_name"])} if "fun_name" in kwargs else {}
+            record_phase([JAX_PHASES[event], None, 0.0], seconds, fields)
+
+    def on_event(event, **kwargs):
+        if event in JAX_CACHE_EVENTS:
+            emit("cache", cache="xla", result=JAX_CACHE_EVENTS[event])
+
+    monitoring.register_event_duration_secs_listener(on_duration)
+    monitoring.register_event_listener(on_event)
+    jax_listeners_registered = True
+
+
+def solve_statistics(num_iter, converged, **fields):
+    """Emits the statistics of a batch of points solved by newton_rootsolve: its "batch_size", "converged_fraction",
+    "mean_iter" and "max_iter", and "iteration_histogram", the number of points that took each number of iterations,
+    plus the given fields describing the solve"""
+    import numpy as np
+
+    num_iter, converged = np.asarray(num_iter).ravel(), np.asarray(converged).ravel()
+    emit(
+        "solve",
+        batch_size=int(num_iter.size),
+        converged_fraction=float(np.mean(converged)) if converged.size else 1.0,
+        mean_iter=float(np.mean(num_iter)) if num_iter.size else 0.0,
+        max_iter=int(np.max(num_iter, initial=0)),
+        iteration_histogram=np.bincount(num_iter.astype(np.int64)).tolist(),
+        **fields,
+    )
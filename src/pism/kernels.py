@@ -0,0 +1,465 @@
+"""In-process and persistent caches of the generated and jitted numerical kernels used by the solvers"""
+
+from collections import OrderedDict, namedtuple
+from importlib import import_module, metadata
+import glob
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import numpy as np
+import sympy as sp
+import jax
+import jax.numpy as jnp
+from . import instrumentation
+from .codegen import cse_expressions, sparse_jacobian, extract_coefficients
+from .rate_tables import coefficient_table, tabulated_function
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+SolverKernels = namedtuple("SolverKernels", ["func", "tolfunc", "jacfunc", "table_report"], defaults=[None])
+
+
+class KernelCache:
+    """Bounded LRU cache mapping a network hash to its compiled numerical kernels
+
+    Reusing the same kernel objects across calls also lets JAX reuse its own trace and XLA compile caches, since the
+    kernels are passed to the solvers as static arguments.
+
+    Parameters
+    ----------
+    maxsize: int, optional
+        Maximum number of kernel sets to keep before evicting the least-recently used one (default: 64)
+    """
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """Returns the kernels stored under key (marking them most-recently used), or None on a miss"""
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, kernels):
+        """Stores kernels under key, evicting the least-recently used entry if the cache is full"""
+        self._entries[key] = kernels
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def info(self):
+        """Returns the hit/miss statistics and occupancy of the cache"""
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+    def clear(self):
+        """Empties the cache and resets the statistics"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class DiskKernelCache:
+    """Persistent cache of generated kernel source, shared between processes through a directory
+
+    Each entry is a JSON file holding the serialized expressions, the generated Python source of every kernel and
+    the names it needs from its namespace, so a fresh process can rebuild the kernels without sympy. Compiled XLA
+    executables are stored alongside by JAX's persistent compilation cache, so the first solve also skips compilation.
+    Entries are keyed by the content hash of the system plus the pism, jax and sympy versions, so upgrading any of
+    them invalidates the cache automatically. Each file name also ends with the SHA-256 digest of the file contents,
+    which is checked on load, so that truncated, corrupted or edited entries are ignored rather than executed.
+
+    The kernel source is executed on load (see function_from_source), so the cache directory must only be writable by
+    trusted users: anyone who can write to it can run code in every process that uses it. The digest does not protect
+    against a writer that recomputes it.
+
+    Setting up the cache enables JAX's persistent compilation cache in the same directory, and close() restores the
+    previous JAX settings.
+
+    Parameters
+    ----------
+    path: str
+        Cache directory - created if it does not exist
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.join(self.path, "kernels"), exist_ok=True)
+        settings = {
+            "jax_compilation_cache_dir": os.path.join(self.path, "xla"),
+            "jax_persistent_cache_min_compile_time_secs": 0,
+            "jax_persistent_cache_min_entry_size_bytes": 0,
+        }
+        self.previous_jax_settings = {name: getattr(jax.config, name) for name in settings}
+        for name, value in settings.items():
+            jax.config.update(name, value)
+
+    def close(self):
+        """Restores the JAX compilation cache settings that were in effect before this cache was set up"""
+        for name, value in self.previous_jax_settings.items():
+            jax.config.update(name, value)
+
+    def prefix(self, key):
+        """Returns the path of the entries stored under key for the installed library versions, without the digest of
+        their contents"""
+        versions = hashlib.sha256(json.dumps(library_versions(), sort_keys=True).encode()).hexdigest()
+        return os.path.join(self.path, "kernels", f"{key}-{versions[:16]}")
+
+    def load(self, key):
+        """Returns the entry stored under key, or None if it is missing, unreadable, does not match the digest in its
+        file name or is from other versions"""
+        entry = None
+        for filename in sorted(glob.glob(glob.escape(self.prefix(key)) + "-*.json")):
+            try:
+                with open(filename, "rb") as f:
+                    contents = f.read()
+                if hashlib.sha256(contents).hexdigest() == filename[-len(".json") - 64 : -len(".json")]:
+                    entry = json.loads(contents)
+                    break
+            except (OSError, ValueError):
+                continue
+        if entry is None or entry.get("versions") != library_versions():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def save(self, key, entry):
+        """Atomically writes entry under key, so that concurrent workers never see a partial file"""
+        contents = json.dumps(dict(entry, versions=library_versions())).encode()
+        fd, tmpname = tempfile.mkstemp(dir=os.path.join(self.path, "kernels"), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(contents)
+        os.replace(tmpname, f"{self.prefix(key)}-{hashlib.sha256(contents).hexdigest()}.json")
+
+    def info(self):
+        """Returns the hit/miss statistics and number of entries of the cache"""
+        return CacheInfo(self.hits, self.misses, None, len(os.listdir(os.path.join(self.path, "kernels"))))
+
+    def clear(self):
+        """Deletes all kernel entries and resets the statistics"""
+        for f in os.listdir(os.path.join(self.path, "kernels")):
+            os.remove(os.path.join(self.path, "kernels", f))
+        self.hits = 0
+        self.misses = 0
+
+
+kernel_cache = KernelCache()
+disk_cache = None
+
+
+def set_kernel_cache_dir(path):
+    """Sets the directory of the persistent kernel cache. Pass None to disable it.
+
+    The directory can also be set with the PISM_CACHE_DIR environment variable before pism is imported. Cached kernels
+    are executed as Python code when loaded, so the directory must only be writable by trusted users (see
+    DiskKernelCache).
+    """
+    global disk_cache
+    if disk_cache is not None:
+        disk_cache.close()
+    disk_cache = None if path is None else DiskKernelCache(path)
+    return disk_cache
+
+
+def kernel_cache_info():
+    """Returns hit/miss statistics of the global kernel cache used by Process.steadystate"""
+    return kernel_cache.info()
+
+
+def clear_kernel_cache():
+    """Empties the global kernel cache used by Process.steadystate"""
+    kernel_cache.clear()
+
+
+def library_versions():
+    """Versions of the libraries that the generated kernels depend on"""
+    try:
+        pism_version = metadata.version("pism")
+    except metadata.PackageNotFoundError:
+        pism_version = "unknown"
+    return {"pism": pism_version, "jax": jax.__version__, "sympy": sp.__version__}
+
+
+def network_hash(exprs, unknowns, known_variables, options=None):
+    """Canonical hash of a system of equations, the ordering of its arguments and the code generation options
+
+    Parameters
+    ----------
+    exprs: iterable
+        Sympy expressions for the components of the system
+    unknowns: iterable
+        Symbols (or names) of the unknowns, in the order they appear in X
+    known_variables: iterable
+        Symbols (or names) of the known quantities, in the order they appear in params
+    options: dict, optional
+        Any further options that change the generated code
+
+    Returns
+    -------
+    key: str
+        Hex digest identifying the system
+    """
+    h = hashlib.sha256()
+    for section in (exprs, unknowns, known_variables):
+        for item in section:
+            h.update(sp.srepr(sp.sympify(item)).encode())
+            h.update(b";")
+        h.update(b"|")
+    for k, v in sorted((options or {}).items()):
+        h.update(f"{k}={v!r};".encode())
+    return h.hexdigest()
+
+
+def lambdify_source(args, exprs, cse=False):
+    """Generates the Python source of a JAX function evaluating the list of expressions exprs
+
+    Parameters
+    ----------
+    args: list
+        Symbols in the order they are passed to the function
+    exprs: list
+        Sympy expressions to evaluate
+    cse: bool, optional
+        Whether to eliminate common subexpressions jointly across exprs, so that each is evaluated once per call
+
+    Returns
+    -------
+    source: dict
+        Dict with the function's "code" and the "namespace" it needs, mapping each global name to either an importable
+        "module:attribute" reference or a literal value. This is JSON-serializable.
+    """
+    func = sp.lambdify(args, exprs, modules="jax", cse=cse_expressions if cse else False)
+    namespace = {}
+    for name in func.__code__.co_names:
+        if name not in func.__globals__:  # builtins
+            continue
+        obj = func.__globals__[name]
+        if isinstance(obj, (int, float, complex)):
+            namespace[name] = {"value": repr(obj)}
+        elif inspect.ismodule(obj):
+            namespace[name] = {"import": obj.__name__}
+        else:
+            namespace[name] = {"import": f"{obj.__module__}:{obj.__name__}"}
+    return {"code": inspect.getsource(func), "namespace": namespace}
+
+
+def function_from_source(source):
+    """Rebuilds the function generated by lambdify_source, without needing sympy. The source code is executed, so it
+    must come from a trusted origin (see DiskKernelCache)."""
+    namespace = {}
+    for name, spec in source["namespace"].items():
+        if "value" in spec:
+            namespace[name] = complex(spec["value"]) if "j" in spec["value"] else float(spec["value"])
+        else:
+            module, _, attr = spec["import"].partition(":")
+            namespace[name] = getattr(import_module(module), attr) if attr else import_module(module)
+    exec(source["code"], namespace)
+    return namespace["_lambdifygenerated"]
+
+
+def jax_kernel(source, table=None, table_index=None):
+    """Returns a jitted function f(X, *params) evaluating generated source as a JAX array
+
+    If a coefficient table is given, the generated function takes the tabulated coefficients and their derivatives as
+    extra trailing arguments, which are interpolated from the table at (*X, *params)[table_index].
+    """
+    func = function_from_source(source)
+    if table is not None:
+        func = tabulated_function(func, table, table_index)
+
+    @jax.jit
+    def kernel(X, *params):
+        return jnp.array(func(*X, *params))
+
+    return kernel
+
+
+def jacobian_kernel(source, rows, cols, shape, table=None, table_index=None):
+    """Returns a jitted function J(X, *params) that scatters the generated nonzero Jacobian entries into a dense array
+
+    Parameters
+    ----------
+    source: dict
+        Generated source (see lambdify_source) of a function returning the list of nonzero entries
+    rows, cols: list
+        Row and column indices of the nonzero entries
+    shape: tuple
+        Shape of the Jacobian
+    table, table_index: optional
+        Coefficient table and the position of its variable in (*X, *params), as in jax_kernel
+    """
+    func = function_from_source(source)
+    if table is not None:
+        func = tabulated_function(func, table, table_index)
+    rows, cols = np.array(rows, dtype=np.int32), np.array(cols, dtype=np.int32)  # valid with and without x64
+
+    @jax.jit
+    def kernel(X, *params):
+        values = jnp.array(func(*X, *params), dtype=X.dtype)
+        return jnp.zeros(tuple(shape), dtype=X.dtype).at[rows, cols].set(values)
+
+    return kernel
+
+
+def lambdify_kernel(args, exprs, cse=False):
+    """Returns a jitted function f(X, *params) evaluating the list of expressions exprs as a JAX array
+
+    Parameters
+    ----------
+    args: list
+        Symbols in the order they are unpacked from (X, *params)
+    exprs: list
+        Sympy expressions to evaluate
+    cse: bool, optional
+        Whether to eliminate common subexpressions jointly across exprs
+    """
+    return jax_kernel(lambdify_source(args, exprs, cse))
+
+
+def solver_kernels(exprs, unknowns, known_variables, tolerance_exprs, options=None):
+    """Returns the residual, tolerance and Jacobian kernels of a system, building them only on a cache miss
+
+    Parameters
+    ----------
+    exprs: list
+        Sympy expressions for the residual of the system
+    unknowns: list
+        Symbols of the unknowns, in the order they appear in X
+    known_variables: list
+        Symbols of the known quantities, in the order they appear in params
+    tolerance_exprs: list
+        Sympy expressions whose relative change is used as the stopping criterion
+    options: dict, optional
+        Any further options that change the generated code. Recognized: "cse" (bool) to eliminate common
+        subexpressions within each kernel, "jacobian" ("symbolic" or "autodiff") to choose between a generated
+        sparse analytic Jacobian and jax.jacfwd of the residual (default: "autodiff"), and "tabulate", a tuple of
+        (option, value) pairs for rate_tables.coefficient_table, to interpolate every coefficient depending only on T
+        from a table instead of evaluating it (see rate_tables.table_options).
+
+    Returns
+    -------
+    kernels: SolverKernels
+        Named tuple of jitted functions (func, tolfunc, jacfunc) with signature f(X, *params), plus the error report
+        of the coefficient table if tabulated
+    """
+    key = network_hash(list(exprs) + ["tolerance"] + list(tolerance_exprs), unknowns, known_variables, options)
+    kernels = kernel_cache.get(key)
+    if kernels is not None:
+        instrumentation.emit("cache", cache="kernels", result="memory", key=key)
+        return kernels
+
+    entry = None if disk_cache is None else disk_cache.load(key)
+    instrumentation.emit("cache", cache="kernels", result="miss" if entry is None else "disk", key=key)
+    if entry is None:
+        with instrumentation.phase("codegen"):
+            entry = build_kernel_entry(exprs, unknowns, known_variables, tolerance_exprs, options or {})
+        if disk_cache is not None:
+            disk_cache.save(key, entry)
+
+    with instrumentation.phase("kernel_setup"):
+        table = {"table": entry["table"], "table_index": entry["table_index"]} if "table" in entry else {}
+        func = jax_kernel(entry["func"], **table)
+        if "jacfunc" in entry:
+            jacfunc = jacobian_kernel(**entry["jacfunc"], **table)
+        else:
+            jacfunc = jax.jit(jax.jacfwd(func))
+        kernels = SolverKernels(func, jax_kernel(entry["tolfunc"], **table), jacfunc, entry.get("table_report"))
+    kernel_cache.put(key, kernels)
+    return kernels
+
+
+def evaluation_kernel(exprs, variables, cse=False):
+    """Returns a jitted function evaluating a list of expressions at many points, building it only on a cache miss
+
+    Parameters
+    ----------
+    exprs: list
+        Sympy expressions to evaluate
+    variables: list
+        Symbols of the inputs, in the order of the columns of X
+    cse: bool, optional
+        Whether to eliminate common subexpressions jointly across exprs (default: False)
+
+    Returns
+    -------
+    kernel: callable
+        Function of a shape (N, len(variables)) array X returning the shape (N, len(exprs)) array of the values of
+        exprs at each row of X
+    """
+    key = network_hash(list(exprs), variables, [], {"kind": "evaluation", "cse": cse})
+    kernel = kernel_cache.get(key)
+    if kernel is not None:
+        instrumentation.emit("cache", cache="kernels", result="memory", key=key)
+        return kernel
+
+    entry = None if disk_cache is None else disk_cache.load(key)
+    instrumentation.emit("cache", cache="kernels", result="miss" if entry is None else "disk", key=key)
+    if entry is None:
+        with instrumentation.phase("codegen"):
+            entry = {"func": lambdify_source(list(variables), list(exprs), cse)}
+        if disk_cache is not None:
+            disk_cache.save(key, entry)
+
+    func = function_from_source(entry["func"])
+
+    def evaluate(X):
+        return jnp.stack([jnp.asarray(value, dtype=X.dtype) for value in func(*X)])
+
+    kernel = jax.jit(jax.vmap(evaluate))
+    kernel_cache.put(key, kernel)
+    return kernel
+
+
+def build_kernel_entry(exprs, unknowns, known_variables, tolerance_exprs, options):
+    """Generates the source of the kernels of a system as a JSON-serializable cache entry (see solver_kernels)"""
+    cse = options.get("cse", False)
+    args = list(unknowns) + list(known_variables)
+    exprs, tolerance_exprs = list(exprs), list(tolerance_exprs)
+    entry = {
+        "args": [str(a) for a in args],
+        "exprs": [sp.srepr(e) for e in exprs],
+        "tolerance_exprs": [sp.srepr(e) for e in tolerance_exprs],
+    }
+    T, chain = sp.Symbol("T"), {}
+    if options.get("tabulate") and T in args:
+        reduced, coefficients = extract_coefficients(exprs + tolerance_exprs, T)
+        if coefficients:
+            exprs, tolerance_exprs = reduced[: len(exprs)], reduced[len(exprs) :]
+            chain = {k: (T, sp.Symbol(f"d{k}_dT")) for k in coefficients}
+            entry["table"], entry["table_report"] = coefficient_table(coefficients, T, **dict(options["tabulate"]))
+            entry["table_index"] = args.index(T)
+            args += list(coefficients) + [dk for _, dk in chain.values()]
+
+    jacobian = None
+    if options.get("jacobian", "autodiff") == "symbolic":
+        jacobian = sparse_jacobian(exprs, unknowns, chain)
+
+    entry["func"] = lambdify_source(args, exprs, cse)
+    entry["tolfunc"] = lambdify_source(args, tolerance_exprs, cse)
+    if jacobian is not None:
+        entry["jacfunc"] = {
+            "source": lambdify_source(args, list(jacobian.values()), cse),
+            "rows": [i for i, _ in jacobian],
+            "cols": [j for _, j in jacobian],
+            "shape": [len(exprs), len(unknowns)],
+        }
+    return entry
+
+
+if os.environ.get("PISM_CACHE_DIR"):
+    set_kernel_cache_dir(os.environ["PISM_CACHE_DIR"])
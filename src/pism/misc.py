@@ -1,5 +1,6 @@
 """Various convenience routines used throughout the package"""
 
+import sys
 from string import digits
 
 
@@ -64,3 +65,18 @@ def recombine(species: str) -> str:
     """Returns the symbol of the species produced by adding an electron to the input species"""
     charge = species_charge(species)
     return base_species(species) + charge_suffix(charge - 1)
+
+
+def lazy_attributes(module_name: str, builders: dict):
+    """Returns a module-level __getattr__ (PEP 562) that builds the attributes in builders, a dict mapping names to
+    functions of no arguments, on first access and stores them in the module, so that later accesses are plain lookups
+    and importing the module does not pay for them"""
+
+    def __getattr__(name):
+        if name not in builders:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        value = builders[name]()
+        setattr(sys.modules[module_name], name, value)
+        return value
+
+    return __getattr__
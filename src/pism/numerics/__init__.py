@@ -1 +1,3 @@
+from .linalg import *
 from .solvers import *
+from .integrators import *
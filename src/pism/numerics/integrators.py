@@ -0,0 +1,209 @@
+"""Batched implicit integrators for stiff systems of ODEs dX/dt = f(X, params), e.g. a chemistry/thermal network"""
+
+import numpy as np
+import jax, jax.numpy as jnp
+from jax.scipy.linalg import lu_factor, lu_solve
+from .solvers import newton_solve, initial_step
+
+ROS2_GAMMA = 1 + 1 / np.sqrt(2)  # L-stable choice for the 2-stage Rosenbrock method of 1999SIAMJSC..20.1456V
+
+
+def integrate(
+    func,
+    X0,
+    dt,
+    params=[],
+    jacfunc=None,
+    method="ros2",
+    rtol=1e-4,
+    atol=0.0,
+    first_step=None,
+    max_steps=10**4,
+    newton_iter=20,
+    nonnegative=False,
+    return_info=False,
+):
+    """
+    Advances the system dX/dt = f(X, params) over a time interval dt, independently for an arbitrary number of initial
+    conditions and parameter choices. Each point takes its own adaptive substeps, chosen to keep the estimated local
+    error within tolerance.
+
+    Parameters
+    ----------
+    func: callable
+        A JAX function of signature f(X, *params) returning the time derivative of X, where X and params are arrays of
+        shape (n,) and (n_p,)
+    X0: array_like
+        Shape (n,) or (N,n) array of initial conditions
+    dt: float or array_like
+        Time interval to advance over, either the same for all points or shape (N,)
+    params: array_like
+        Shape (n_p,) or (N,n_p) parameters
+    jacfunc: callable, optional
+        Function with the same signature as f that returns the Jacobian of f - will be computed with autodiff from f if
+        not specified.
+    method: str, optional
+        "ros2" for the 2nd-order, L-stable Rosenbrock method of 1999SIAMJSC..20.1456V, which costs one Jacobian and LU
+        factorization per substep, or "backward_euler" for the 1st-order implicit Euler method, with each substep
+        solved by Newton iteration (default: "ros2")
+    rtol: float, optional
+        Relative tolerance on the local error of each substep (default: 1e-4)
+    atol: float or array_like, optional
+        Absolute tolerance on the local error of each substep, either a scalar or broadcastable to the shape of X0
+        (default: 0)
+    first_step: float or array_like, optional
+        Size of the first substep attempted. Defaults to 1% of the time for the initial rate of change to change X by
+        its own size, measured relative to the tolerance (the estimate of Hairer, Norsett & Wanner 1993), or dt if
+        that is shorter.
+    max_steps: int, optional
+        Maximum number of substeps (accepted or rejected) per point (default: 10**4)
+    newton_iter: int, optional
+        Maximum number of Newton iterations per backward Euler substep before it is rejected (default: 20)
+    nonnegative: bool, optional
+        Whether all components of X are nonnegative quantities such as number densities, so that substeps that take any
+        of them further below 0 than the tolerance are rejected (default: False)
+    return_info: bool, optional
+        Whether to also return a dict of per-point integration information (default: False)
+
+    Returns
+    -------
+    X: array_like
+        Shape (N,n) array of solutions at time dt
+    info: dict
+        Only returned if return_info is True. Dict of shape (N,) arrays: "num_steps", the number of accepted substeps,
+        "num_rejected", the number of rejected substeps, and "success", whether the point reached dt within max_steps.
+    """
+    X0 = jnp.array(X0)
+    params = jnp.array(params)
+    if len(X0.shape) < 2:
+        X0 = jnp.atleast_2d(X0).T
+    if len(params.shape) < 2:
+        params = jnp.atleast_2d(params).T
+    N = X0.shape[0]
+    if params.shape[0] != N:
+        params = jnp.broadcast_to(params, (N, params.shape[1]))
+
+    dt = jnp.broadcast_to(jnp.asarray(dt, dtype=X0.dtype), (N,))
+    first_step = jnp.broadcast_to(jnp.asarray(jnp.nan if first_step is None else first_step, dtype=X0.dtype), (N,))
+    atol = jnp.broadcast_to(jnp.asarray(atol, dtype=X0.dtype), X0.shape)
+    if method not in STEPPERS:
+        raise ValueError(f"Unknown integration method {method}: must be one of {list(STEPPERS)}.")
+
+    X, num_steps, num_rejected, success = integrate_batch(
+        func, jacfunc, method, X0, dt, first_step, params, atol, rtol, max_steps, newton_iter, nonnegative
+    )
+    if return_info:
+        return X, {"num_steps": num_steps, "num_rejected": num_rejected, "success": success}
+    return X
+
+
+def ros2_step(func, jacfunc, X, h, params, atol, rtol, newton_iter):
+    """Takes one step of the 2-stage Rosenbrock method ROS2 (1999SIAMJSC..20.1456V)
+
+    Returns
+    -------
+    X_new: array_like
+        Shape (n,) 2nd-order solution after the step
+    error: array_like
+        Shape (n,) local error estimate, the difference from the embedded 1st-order solution
+    """
+    lu = lu_factor(jnp.eye(X.shape[0], dtype=X.dtype) - ROS2_GAMMA * h * jacfunc(X, *params))
+    k1 = lu_solve(lu, func(X, *params))
+    k2 = lu_solve(lu, func(X + h * k1, *params) - 2 * k1)
+    return X + 1.5 * h * k1 + 0.5 * h * k2, 0.5 * h * (k1 + k2)
+
+
+def backward_euler_step(func, jacfunc, X, h, params, atol, rtol, newton_iter):
+    """Takes one backward Euler step, solving X_new = X + h f(X_new) with the Newton iteration of newton_rootsolve
+
+    Returns
+    -------
+    X_new: array_like
+        Shape (n,) solution after the step
+    error: array_like
+        Shape (n,) local error estimate from the difference with the trapezoidal rule, or infinite if the Newton
+        iteration did not converge
+    """
+    identity = jnp.eye(X.shape[0], dtype=X.dtype)
+
+    def residual(Y, *params):
+        return Y - X - h * func(Y, *params)
+
+    def residual_jacobian(Y, *params):
+        return identity - h * jacfunc(Y, *params)
+
+    newton_rtol = jnp.maximum(0.01 * rtol, 10 * jnp.finfo(X.dtype).eps)  # solve well below the truncation error
+    X_new, dx, _, converged, _ = newton_solve(
+        residual, residual_jacobian, None, 1, X, initial_step(X), 0, newton_iter, params, newton_rtol
+    )
+    # components below atol cannot meet the relative criterion, so also accept a last update well within the error
+    # scale
+    converged |= jnp.all(jnp.abs(dx) <= 0.01 * (atol + rtol * jnp.abs(X_new)))
+    error = 0.5 * h * (func(X_new, *params) - func(X, *params))
+    return X_new, jnp.where(converged, error, jnp.inf)
+
+
+STEPPERS = {"ros2": ros2_step, "backward_euler": backward_euler_step}
+
+
+def integrate_batch(
+    func, jacfunc, method, X0, dt, first_step, params, atol, rtol, max_steps, newton_iter, nonnegative
+):
+    """Runs the vmapped adaptive substepping loop of integrate
+
+    Both methods estimate the local error with a 1st-order formula, so the substep is rescaled by (1/error)^(1/2),
+    with a safety factor and limits on how fast it can change.
+
+    Returns
+    -------
+    X: array_like
+        Shape (N,n) solutions at time dt
+    num_steps, num_rejected, success: array_like
+        Shape (N,) per-point substep counts and success flags
+    """
+    if jacfunc is None:
+        jacfunc = jax.jacfwd(func)
+    step = STEPPERS[method]
+
+    def advance(X, dt, h, params, atol):
+        """Advances one point over dt"""
+        scale = atol + rtol * jnp.abs(X)
+        d0, d1 = jnp.max(jnp.abs(X) / scale), jnp.max(jnp.abs(func(X, *params)) / scale)
+        h = jnp.where(jnp.isnan(h), jnp.where(d1 > 0, 0.01 * d0 / d1, dt), h).clip(max=dt)
+
+        def not_done(arg):
+            t, h, X, num_steps, num_rejected, _ = arg
+            return (t < dt) & (num_steps + num_rejected < max_steps)
+
+        def substep(arg):
+            t, h, X, num_steps, num_rejected, rejected_last = arg
+            last = h >= dt - t
+            h = jnp.where(last, dt - t, h)
+            X_new, error = step(func, jacfunc, X, h, params, atol, rtol, newton_iter)
+            scale = atol + rtol * jnp.maximum(jnp.abs(X), jnp.abs(X_new))
+            error_norm = jnp.max(jnp.abs(error) / scale)
+            if nonnegative:
+                error_norm = jnp.where(jnp.all(X_new >= -scale), error_norm, jnp.inf)
+            accept = (error_norm <= 1) & jnp.all(jnp.isfinite(X_new))
+            factor = jnp.where(jnp.isfinite(error_norm), 0.9 * error_norm**-0.5, 0.2).clip(0.2, 5.0)
+            factor = jnp.where(rejected_last, jnp.minimum(factor, 1.0), factor)  # don't grow right after a rejection
+            return (
+                jnp.where(accept, jnp.where(last, dt, t + h), t),
+                h * factor,
+                jnp.where(accept, X_new, X),
+                num_steps + accept,
+                num_rejected + ~accept,
+                ~accept,
+            )
+
+        t, h, X, num_steps, num_rejected, _ = jax.lax.while_loop(
+            not_done, substep, (jnp.zeros_like(dt), h, X, 0, 0, False)
+        )
+        return X, num_steps, num_rejected, t >= dt
+
+    return jax.vmap(advance)(X0, dt, first_step, params, atol)
+
+
+integrate_batch = jax.jit(
+    integrate_batch, static_argnames=["func", "jacfunc", "method", "max_steps", "newton_iter", "nonnegative"]
+)
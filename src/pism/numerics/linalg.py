@@ -0,0 +1,95 @@
+"""Dense linear solves for the Newton steps of small systems, with a pivot-based singularity indicator
+
+Chemistry/thermal networks have 3-20 unknowns, and the batched solvers vmap one linear solve per point and iteration.
+For such sizes, batched LAPACK calls are dominated by per-call overhead on CPU. small_lu_solve instead unrolls Gaussian
+elimination with partial pivoting at trace time, so that the vmapped solve becomes a short sequence of elementwise
+operations over the whole batch. linear_solve picks it for systems of up to SMALL_SYSTEM_SIZE unknowns, and LAPACK's LU
+otherwise.
+
+Both paths first equilibrate the matrix, dividing each row and then each column by its largest entry: the equations
+of a thermochemical network differ by tens of orders of magnitude (chemistry vs heating), as do its unknowns (densities
+vs T). They return the pivot ratio, the smallest pivot of the factorization of the equilibrated matrix, which does not
+depend on the scaling of the rows. It is 0 for singular matrices and of the order of the machine epsilon for matrices
+singular to working precision, and unlike a condition number costs nothing beyond the factorization.
+"""
+
+import jax, jax.numpy as jnp
+
+SMALL_SYSTEM_SIZE = 32  # largest system solved by the unrolled elimination
+
+
+def equilibrate(A):
+    """Returns the row and column scales r and c of A such that the largest absolute value in every row and column of
+    A / r[:, None] / c[None, :] is 1, with scales of 1 for rows or columns of zeros"""
+    r = jnp.max(jnp.abs(A), axis=1)
+    r = jnp.where(r > 0, r, 1.0)
+    c = jnp.max(jnp.abs(A / r[:, None]), axis=0)
+    return r, jnp.where(c > 0, c, 1.0)
+
+
+def small_lu_solve(A, b):
+    """Solves A x = b by Gaussian elimination with partial pivoting, unrolled over the (static) size of A
+
+    Parameters
+    ----------
+    A: array_like
+        Shape (n,n) matrix
+    b: array_like
+        Shape (n,) right-hand side
+
+    Returns
+    -------
+    x: array_like
+        Shape (n,) solution, non-finite if A is singular
+    pivot_ratio: array_like
+        Smallest pivot of the factorization of the equilibrated matrix, 0 if A is singular
+    """
+    n = A.shape[0]
+    r, c = equilibrate(A)
+    M = jnp.concatenate([A / c[None, :], b[:, None]], axis=1) / r[:, None]  # b is eliminated along with A
+    pivot_ratio = jnp.asarray(jnp.inf, dtype=M.dtype)
+    for k in range(n):
+        p = k + jnp.argmax(jnp.abs(M[k:, k]))
+        row_k, row_p = M[k], M[p]
+        M = M.at[k].set(row_p).at[p].set(row_k)
+        pivot = M[k, k]
+        pivot_ratio = jnp.fmin(pivot_ratio, jnp.abs(pivot))  # elimination by a 0 pivot gives NaN
+        if k + 1 < n:
+            M = M.at[k + 1 :, k:].add(-(M[k + 1 :, k] / pivot)[:, None] * M[k, k:][None, :])
+
+    x = jnp.zeros(n, dtype=M.dtype)
+    for k in reversed(range(n)):
+        x = x.at[k].set((M[k, n] - M[k, k + 1 : n] @ x[k + 1 :]) / M[k, k])
+    return x / c, pivot_ratio
+
+
+def lapack_lu_solve(A, b):
+    """Solves A x = b with LAPACK's LU factorization, returning x and the pivot ratio as small_lu_solve"""
+    r, c = equilibrate(A)
+    lu, pivots, _ = jax.lax.linalg.lu(A / r[:, None] / c[None, :])
+    x = jax.scipy.linalg.lu_solve((lu, pivots), b / r) / c
+    return x, jnp.min(jnp.abs(jnp.diagonal(lu)))
+
+
+def linear_solve(A, b):
+    """Solves the linear system A x = b for a single point, with the unrolled elimination of small_lu_solve for up to
+    SMALL_SYSTEM_SIZE unknowns and LAPACK's LU factorization otherwise
+
+    Parameters
+    ----------
+    A: array_like
+        Shape (n,n) matrix
+    b: array_like
+        Shape (n,) right-hand side
+
+    Returns
+    -------
+    x: array_like
+        Shape (n,) solution
+    pivot_ratio: array_like
+        Smallest pivot of the factorization of the equilibrated matrix: 0 if A is singular, and of the order of the
+        machine epsilon if it is singular to working precision
+    """
+    if A.shape[0] <= SMALL_SYSTEM_SIZE:
+        return small_lu_solve(A, b)
+    return lapack_lu_solve(A, b)
@@ -1,4 +1,8 @@
+from functools import lru_cache, partial
+import numpy as np
 import jax, jax.numpy as jnp
+from .. import instrumentation
+from .linalg import linear_solve
 
 
 def newton_rootsolve(
@@ -10,6 +14,15 @@ def newton_rootsolve(
     rtol=1e-6,
     max_iter=1000,
     careful_steps=1,
+    return_info=False,
+    iterations_per_round=None,
+    shard=False,
+    continuation_axis=None,
+    block_size=256,
+    globalization=None,
+    precision=None,
+    refinement_steps=3,
+    variables="linear",
 ):
     """
     Solve the system f(X,p) = 0 for X, where both f and X can be vectors of arbitrary length and p is a set of fixed
@@ -35,57 +48,965 @@ def newton_rootsolve(
         Absolute tolerance: iteration will terminate if the value computed by tolfunc goes below this value.
     careful_steps: int, optional
         Number of "careful" initial steps to take, gradually ramping up the step size in the Newton iteration
+    return_info: bool, optional
+        Whether to also return a dict of per-point convergence information (default: False)
+    iterations_per_round: int, optional
+        If specified, iterate in rounds of this many iterations, retiring converged points between rounds and
+        compacting the rest into a smaller batch. This stops a few slow points from making the whole batch iterate to
+        their iteration count. Requires concrete (non-traced) inputs, so cannot be used inside jax.jit.
+    shard: bool, optional
+        Whether to split the batch of points across all available JAX devices (default: False). Each device iterates
+        its own shard independently. On CPU, expose several host devices by setting
+        XLA_FLAGS=--xla_force_host_platform_device_count=<number of cores> before JAX is imported. Do not expose more
+        host devices than cores: the devices share one thread pool, and large batched linear solves can exhaust it.
+    continuation_axis: int, optional
+        If specified, solve the points as a sweep along this column of params: the points are ordered along it
+        (grouped by the other parameters), split into blocks of block_size consecutive points, and only the first
+        point of each block is solved from its guess. The rest of each block is solved in order with a scan, each
+        point starting from its converged neighbour, and points that fail to converge from there are re-solved from
+        their own guesses. Cannot be combined with iterations_per_round or shard.
+    block_size: int, optional
+        Number of consecutive points solved sequentially from each anchor point in a continuation sweep (default: 256)
+    globalization: str, optional
+        Strategy for making steps far from the solution reduce the residual: None for plain (damped) Newton steps,
+        "linesearch" to backtrack along each Newton step until it sufficiently decreases the residual norm, or
+        "trust_region" for dogleg steps within a trust region of scaled changes of X, whose size adapts to how well
+        the linearized model predicted the residual. Each component of f is measured in units of its largest change
+        due to a relative change of one component of X at the current iterate (default: None)
+    precision: str, optional
+        Floating point precision policy: None to iterate in JAX's default float type (float32 unless x64 is enabled),
+        "float32" or "float64" to iterate in that precision, or "mixed" to iterate in float32 on the problem with each
+        unknown divided by the geometric mean magnitude of its guesses, then take up to refinement_steps Newton steps
+        in float64 from the float32 solution. float64 results are returned as numpy arrays, since JAX truncates
+        float64 arrays to float32 outside of an x64 context (default: None)
+    refinement_steps: int, optional
+        Maximum number of float64 Newton steps taken from the float32 solution in mixed precision. Points only count as
+        converged if their float64 refinement reaches rtol. Those whose refinement does not converge keep whichever of
+        the float32 and refined solutions has the smaller residual (default: 3)
+    variables: str, optional
+        Variables that the Newton iteration works in: "linear" for X itself, clipped to [1e-37, 1e37] after each step,
+        or "log" for log(X), suited to unknowns spanning many decades. In log variables, f is solved as a function of
+        log(X) with the Jacobian J X, and the guesses are clipped to [1e-37, 1e37] before taking their log. Each step
+        moves log(X) to the log of the linear Newton iterate where that is positive, and otherwise shrinks X by at most
+        a factor MIN_LOG_STEP, so X stays positive without being clipped to 1e-37. A point converges once every
+        component of X that is not at the clipping bounds changes by less than a fraction rtol; tolfunc is not used,
+        so that trace unknowns converge too (default: "linear")
 
     Returns
     -------
     X: array_like
-        Shape (N,n) array of solutions
+        Shape (N,n) array of solutions. With precision None or "float32" and the default iteration strategy, X is
+        differentiable with respect to params with jax.jvp, jax.grad, jax.jacfwd etc., by the implicit function theorem
+        at the root (see implicit_root).
+    info: dict
+        Only returned if return_info is True. Dict of shape (N,) arrays: "num_iter", the number of iterations taken,
+        "converged", whether the tolerance was reached within max_iter, and "residual_norm", the 2-norm of f at X. In
+        mixed precision, also "num_refinement_iter", the number of float64 steps included in num_iter.
     """
-    guesses = jnp.array(guesses)
-    params = jnp.array(params)
+    if globalization not in GLOBALIZATIONS:
+        raise ValueError(f"globalization must be one of {GLOBALIZATIONS}, not {globalization!r}.")
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision must be one of {PRECISIONS}, not {precision!r}.")
+    if variables not in BOUNDS:
+        raise ValueError(f"variables must be one of {tuple(BOUNDS)}, not {variables!r}.")
+    if continuation_axis is not None and (iterations_per_round is not None or shard):
+        raise ValueError("Continuation sweeps cannot be combined with iterations_per_round or shard.")
+
+    solver_options = dict(
+        careful_steps=careful_steps,
+        iterations_per_round=iterations_per_round,
+        shard=shard,
+        continuation_axis=continuation_axis,
+        block_size=block_size,
+        globalization=globalization,
+        variables=variables,
+    )
+    description = dict(
+        precision=precision,
+        globalization=globalization,
+        continuation=continuation_axis is not None,
+        variables=variables,
+    )
+    problem = (*log_problem(func, jacfunc), None) if variables == "log" else (func, jacfunc, tolfunc)
+    with instrumentation.phase("newton", **description):
+        if precision == "float64":
+            with jax.enable_x64(True):
+                guesses, params = batch_arrays(guesses, params, jnp.float64)
+                guesses = to_variables(guesses, variables)
+                X, info = newton_batch(*problem, guesses, params, rtol, max_iter, **solver_options)
+                X, info = np.asarray(from_variables(X, variables)), {k: np.asarray(v) for k, v in info.items()}
+        elif precision == "mixed":
+            X, info = newton_mixed_precision(
+                func, jacfunc, tolfunc, guesses, params, rtol, max_iter, refinement_steps, **solver_options
+            )
+        else:
+            dtype = jnp.float32 if precision == "float32" else None
+            guesses, params = batch_arrays(guesses, params, dtype)
+            # the iterations themselves are not differentiated: derivatives of the roots come from implicit_root
+            X, info = newton_batch(
+                *problem,
+                jax.lax.stop_gradient(to_variables(guesses, variables)),
+                jax.lax.stop_gradient(params),
+                rtol,
+                max_iter,
+                **solver_options,
+            )
+            X = implicit_root(func, jacfunc or jax.jacfwd(func), from_variables(X, variables), params)
+        if instrumentation.enabled():  # wait for the asynchronously dispatched solve, so it is timed in this phase
+            X = jax.block_until_ready(X)
+    if instrumentation.enabled() and not isinstance(info["num_iter"], jax.core.Tracer):
+        instrumentation.solve_statistics(info["num_iter"], info["converged"], **description)
+
+    if return_info:
+        return X, info
+    return X
+
+
+@partial(jax.custom_jvp, nondiff_argnums=(0, 1))
+def implicit_root(func, jacfunc, X, params):
+    """Returns the roots X of f(X, *params) = 0 found by the Newton iteration, as a function of params whose
+    derivatives are given by the implicit function theorem: dX = -J^-1 (df/dparams) dparams, with J the Jacobian of f
+    at the root. This costs one linear solve per point and derivative, instead of differentiating through the
+    iterations, and works in both forward and reverse mode.
+
+    Parameters
+    ----------
+    func, jacfunc: callable
+        Residual f(X, *params) and its Jacobian with respect to X
+    X: array_like
+        Shape (N,n) roots
+    params: array_like
+        Shape (N,n_p) parameters of each root
+
+    Returns
+    -------
+    X: array_like
+        The roots
+    """
+    return X
+
+
+@implicit_root.defjvp
+def implicit_root_jvp(func, jacfunc, primals, tangents):
+    X, params = primals
+    dparams = tangents[1]  # X is a root for every params, so its own tangent does not matter
+
+    def root_tangent(X, params, dparams):
+        _, df = jax.jvp(lambda params: func(X, *params), (params,), (dparams,))
+        return -jnp.linalg.solve(jacfunc(X, *params), df)
+
+    return X, jax.vmap(root_tangent)(X, params, dparams)
+
+
+PRECISIONS = (None, "float32", "float64", "mixed")
+FLOAT32_RTOL = 1e-5  # tightest relative tolerance that float32 iterations can reliably reach
+
+
+def batch_arrays(guesses, params, dtype=None):
+    """Converts guesses and params to shape (N,n) and (N,n_p) JAX arrays of the given dtype (default: JAX's default
+    float type)"""
+    guesses = jnp.array(guesses, dtype=dtype)
+    params = jnp.array(params, dtype=dtype)
     if len(guesses.shape) < 2:
         guesses = jnp.atleast_2d(guesses).T
     if len(params.shape) < 2:
         params = jnp.atleast_2d(params).T
+    return guesses, params
+
 
+def newton_batch(
+    func,
+    jacfunc,
+    tolfunc,
+    guesses,
+    params,
+    rtol,
+    max_iter,
+    careful_steps=1,
+    iterations_per_round=None,
+    shard=False,
+    continuation_axis=None,
+    block_size=256,
+    globalization=None,
+    variables="linear",
+):
+    """Solves a batch of points in the precision of the input arrays, with the strategy chosen by the options of
+    newton_rootsolve. With variables "log", func, jacfunc, tolfunc, guesses and the returned X are in log variables
+    (see log_problem).
+
+    Returns
+    -------
+    X, info:
+        As in newton_rootsolve
+    """
+    X, dx, num_iter = guesses, initial_step(guesses, variables), jnp.zeros(guesses.shape[0], dtype=int)
+    solver_args = func, jacfunc, tolfunc, careful_steps, shard
+    if continuation_axis is not None:
+        X, num_iter, converged, residual_norm = newton_continuation(
+            func,
+            jacfunc,
+            tolfunc,
+            careful_steps,
+            guesses,
+            params,
+            rtol,
+            max_iter,
+            continuation_axis,
+            block_size,
+            globalization=globalization,
+            variables=variables,
+        )
+    elif iterations_per_round is None:
+        X, dx, num_iter, converged, residual_norm = newton_iterate_sharded(
+            *solver_args, X, dx, num_iter, params, rtol, max_iter, globalization=globalization, variables=variables
+        )
+    else:
+        X, dx, num_iter, converged, residual_norm = newton_iterate_compacting(
+            *solver_args,
+            X,
+            dx,
+            num_iter,
+            params,
+            rtol,
+            max_iter,
+            iterations_per_round,
+            globalization=globalization,
+            variables=variables,
+        )
+    return X, {"num_iter": num_iter, "converged": converged, "residual_norm": residual_norm}
+
+
+def newton_mixed_precision(
+    func, jacfunc, tolfunc, guesses, params, rtol, max_iter, refinement_steps, variables="linear", **options
+):
+    """Solves a batch of points with float32 iterations on the problem with rescaled unknowns, followed by up to
+    refinement_steps full Newton steps in float64 from the float32 solutions. Log variables are not rescaled: they
+    are already of order unity.
+
+    Returns
+    -------
+    X, info:
+        As in newton_rootsolve, as numpy arrays. info also has "num_refinement_iter", the number of float64 steps.
+    """
+    with jax.enable_x64(True):
+        guesses64, params64 = batch_arrays(guesses, params, jnp.float64)
+        guesses64, params64 = np.asarray(to_variables(guesses64, variables)), np.asarray(params64)
+    if variables == "log":
+        (func, jacfunc), tolfunc = log_problem(func, jacfunc), None
+        scale = np.ones(guesses64.shape[1])
+    else:
+        scale = species_scale(guesses64)
+    num_params = params64.shape[1]
+    scaled_func, scaled_jacfunc, scaled_tolfunc = scaled_problem(func, jacfunc, tolfunc, num_params)
+    scaled_params = np.concatenate([params64, np.broadcast_to(scale, guesses64.shape)], axis=1)
+    with instrumentation.phase("float32"):
+        Y, info = newton_batch(
+            scaled_func,
+            scaled_jacfunc,
+            scaled_tolfunc,
+            jnp.asarray(guesses64 / scale, dtype=jnp.float32),
+            jnp.asarray(scaled_params, dtype=jnp.float32),
+            max(rtol, FLOAT32_RTOL),
+            max_iter,
+            variables=variables,
+            **options,
+        )
+        Y = np.asarray(Y)
+
+    with instrumentation.phase("refinement"), jax.enable_x64(True):
+        X32 = jnp.asarray(np.asarray(Y, dtype=np.float64) * scale)
+        num_points = X32.shape[0]
+        X, _, num_refinement_iter, converged, residual_norm = newton_iterate(
+            func,
+            jacfunc,
+            tolfunc,
+            1,
+            X32,
+            initial_step(X32, variables),
+            jnp.zeros(num_points, dtype=int),
+            jnp.asarray(params64),
+            rtol,
+            refinement_steps,
+            variables=variables,
+        )
+        norm32 = jax.vmap(lambda x, p: jnp.linalg.norm(func(x, *p)))(X32, jnp.asarray(params64))
+        X, num_refinement_iter, norm32 = np.asarray(X), np.asarray(num_refinement_iter), np.asarray(norm32)
+        converged, residual_norm = np.asarray(converged), np.asarray(residual_norm)
+    # near-degenerate points may not settle within refinement_steps: keep the float64 steps only if they did not make
+    # the residual worse, so the refinement never degrades the float32 solution
+    keep = converged | (residual_norm <= norm32)
+    X = np.where(keep[:, None], X, np.asarray(X32))
+    if variables == "log":
+        X = np.exp(X)
+    info = {
+        "num_iter": np.asarray(info["num_iter"]) + num_refinement_iter,
+        "converged": converged,
+        "residual_norm": np.where(keep, residual_norm, norm32),
+        "num_refinement_iter": num_refinement_iter,
+    }
+    return X, info
+
+
+def species_scale(guesses):
+    """Returns the scale of each unknown used by mixed-precision solves: the geometric mean magnitude of its nonzero
+    guesses, limited to the normal float32 range. The same scale is used for all points, so that continuation sweeps
+    can still start each point from its neighbour's solution."""
+    magnitude = np.abs(guesses)
+    log_magnitude = np.where(magnitude > 0, np.log10(np.where(magnitude > 0, magnitude, 1.0)), np.nan)
+    with np.errstate(all="ignore"):
+        log_scale = np.nanmean(log_magnitude, axis=0) if np.any(np.isfinite(log_magnitude)) else 0.0
+    return 10 ** np.clip(np.nan_to_num(log_scale), -30, 30)
+
+
+@lru_cache(maxsize=64)
+def scaled_problem(func, jacfunc, tolfunc, num_params):
+    """Builds (once per problem) the residual, Jacobian and tolerance functions of the problem in the scaled unknowns
+    Y = X / scale, where the scale of each unknown is passed after the num_params parameters of the original problem
+
+    Returns
+    -------
+    scaled_func, scaled_jacfunc, scaled_tolfunc: callable
+        Functions of (Y, *params, *scale). scaled_jacfunc is None if jacfunc is None, and scaled_tolfunc is None if
+        tolfunc is None, in which case the relative change of Y (that is, of X) is used
+    """
+
+    def split(params):
+        return params[:num_params], jnp.stack(params[num_params:])
+
+    def scaled_func(Y, *params):
+        params, scale = split(params)
+        return func(Y * scale, *params)
+
+    if jacfunc is None:
+        scaled_jacfunc = None
+    else:
+
+        def scaled_jacfunc(Y, *params):
+            params, scale = split(params)
+            return jacfunc(Y * scale, *params) * scale[None, :]
+
+    if tolfunc is None:
+        scaled_tolfunc = None
+    else:
+
+        def scaled_tolfunc(Y, *params):
+            params, scale = split(params)
+            return tolfunc(Y * scale, *params)
+
+    return scaled_func, scaled_jacfunc, scaled_tolfunc
+
+
+BOUNDS = {"linear": (1e-37, 1e37), "log": (float(np.log(1e-37)), float(np.log(1e37)))}  # iterates are clipped to these
+MIN_LOG_STEP = 1e-10  # smallest factor by which a step in log variables may shrink a component of X
+
+
+def to_variables(X, variables):
+    """Converts an array of unknowns to the variables that the Newton iteration works in"""
+    return jnp.log(jnp.clip(X, *BOUNDS["linear"])) if variables == "log" else X
+
+
+def from_variables(Y, variables):
+    """Converts an array of unknowns from the variables that the Newton iteration works in"""
+    return jnp.exp(Y) if variables == "log" else Y
+
+
+def initial_step(X, variables="linear"):
+    """Returns the placeholder for the last step taken to reach the initial iterates X, large enough that no point
+    counts as converged before its first iteration: 100 X, or 100 in log variables, where X may be 0"""
+    return jnp.full_like(X, 100.0) if variables == "log" else 100 * X
+
+
+@lru_cache(maxsize=64)
+def log_problem(func, jacfunc):
+    """Builds (once per problem) the residual and Jacobian functions of the problem in the log variables Y = log(X).
+    The residual is unchanged, and by the chain rule each column of the Jacobian is multiplied by its component of X,
+    so that J_ij measures the change of f_i due to a relative change of X_j.
+
+    Returns
+    -------
+    log_func, log_jacfunc: callable
+        Functions of (Y, *params). log_jacfunc is None if jacfunc is None.
+    """
+
+    def log_func(Y, *params):
+        return func(jnp.exp(Y), *params)
+
+    if jacfunc is None:
+        return log_func, None
+
+    def log_jacfunc(Y, *params):
+        X = jnp.exp(Y)
+        return jacfunc(X, *params) * X[None, :]
+
+    return log_func, log_jacfunc
+
+
+def newton_iterate(
+    func,
+    jacfunc,
+    tolfunc,
+    careful_steps,
+    X,
+    dx,
+    num_iter,
+    params,
+    rtol,
+    iter_limit,
+    globalization=None,
+    variables="linear",
+):
+    """Runs vmapped Newton iterations from the given state until each point converges or reaches iter_limit
+    iterations
+
+    Parameters
+    ----------
+    func, jacfunc, tolfunc, careful_steps, globalization:
+        As in newton_rootsolve
+    variables: str, optional
+        "linear" or "log", the variables that func, jacfunc, tolfunc and X are in (see log_problem)
+    X, dx: array_like
+        Shape (N,n) current iterates and the last step taken to reach them
+    num_iter: array_like
+        Shape (N,) number of iterations taken so far
+    params: array_like
+        Shape (N,n_p) parameters
+    rtol: float
+        Relative tolerance
+    iter_limit: int or array_like
+        Total iteration count at which to stop iterating each point
+
+    Returns
+    -------
+    X, dx, num_iter:
+        The state after iterating
+    converged: array_like
+        Shape (N,) boolean array indicating which points reached the tolerance
+    residual_norm: array_like
+        Shape (N,) 2-norm of func at X
+    """
     if jacfunc is None:
-        jac = jax.jacfwd(func)
+        jacfunc = jax.jacfwd(func)
+
+    def solve(X, dx, num_iter, iter_limit, params):
+        """Function to be called in parallel that solves the root problem for one guess and set of parameters"""
+        return newton_solve(
+            func, jacfunc, tolfunc, careful_steps, X, dx, num_iter, iter_limit, params, rtol, globalization, variables
+        )
+
+    iter_limit = jnp.broadcast_to(iter_limit, num_iter.shape)
+    return jax.vmap(solve)(X, dx, num_iter, iter_limit, params)
+
+
+newton_iterate = jax.jit(
+    newton_iterate, static_argnames=["func", "jacfunc", "tolfunc", "careful_steps", "globalization", "variables"]
+)
+
+
+def newton_solve(
+    func,
+    jacfunc,
+    tolfunc,
+    careful_steps,
+    X,
+    dx,
+    num_iter,
+    iter_limit,
+    params,
+    rtol,
+    globalization=None,
+    variables="linear",
+):
+    """Runs the Newton iteration for a single guess and set of parameters - the per-point kernel that the batched
+    solvers and integrators vmap over
 
+    Parameters
+    ----------
+    func, jacfunc: callable
+        Residual f(X, *params) and its Jacobian
+    tolfunc: callable or None
+        Function of (X, *params) whose relative change is used as the stopping criterion, X itself if None. Not used
+        in log variables, where every component of X must converge.
+    careful_steps: int
+        Number of "careful" initial steps, ramping up the step size
+    X, dx: array_like
+        Shape (n,) current iterate and the last step taken to reach it
+    num_iter, iter_limit: int
+        Number of iterations taken so far, and the total at which to stop
+    params: array_like
+        Shape (n_p,) parameters
+    rtol: float
+        Relative tolerance
+    globalization: str, optional
+        None, "linesearch" or "trust_region", as in newton_rootsolve
+    variables: str, optional
+        "linear" or "log", the variables that func, jacfunc, tolfunc and X are in (see log_problem)
+
+    Returns
+    -------
+    X, dx, num_iter, converged, residual_norm:
+        As in newton_iterate, for one point
+    """
+    log = variables == "log"
     if tolfunc is None:
 
         def tolfunc(X, *params):
             return X
 
-    def solve(guess, params):
-        """Function to be called in parallel that solves the root problem for one guess and set of parameters"""
+    def not_converged(X, dx, num_iter):
+        """Check if we are still outside the desired tolerance."""
+        fac = jnp.min(jnp.array([(num_iter + 1.0) / careful_steps, 1.0]))
+        if log:  # steps in log variables are relative changes of X
+            return jnp.any(jnp.abs(dx) > fac * rtol)
+        tol2, tol1 = tolfunc(X, *params), tolfunc(X - dx, *params)
+        tolcheck = jnp.any(jnp.abs(tol1 - tol2) > rtol * jnp.abs(tol1) * fac)
+        return jnp.any(jnp.abs(dx) > fac * rtol * jnp.abs(X)) & tolcheck
 
-        def iter_condition(arg):
-            """Iteration condition for the while loop: check if we are within desired tolerance."""
-            X, dx, num_iter = arg
-            fac = jnp.min(jnp.array([(num_iter + 1.0) / careful_steps, 1.0]))
-            tol2, tol1 = tolfunc(X, *params), tolfunc(X - dx, *params)
-            tolcheck = jnp.any(jnp.abs(tol1 - tol2) > rtol * jnp.abs(tol1) * fac)
-            return jnp.any(jnp.abs(dx) > fac * rtol * jnp.abs(X)) & (num_iter < max_iter) & tolcheck
-
-        def X_new(arg):
-            """Returns the next Newton iterate and the difference from previous guess."""
-            X, _, num_iter = arg
-            fac = jnp.min(jnp.array([(num_iter + 1.0) / careful_steps, 1.0]))
-            J = jac(X, *params)
-            cond = jnp.linalg.cond(J)
-            dx = jnp.where(cond < 1e37, -jnp.linalg.solve(J, func(X, *params)) * fac, jnp.zeros_like(X))
-            # need to reject steps that increase the residual...
-            return (X + dx).clip(1e-37, 1e37), dx, num_iter + 1
-
-        init_val = guess, 100 * guess, 0
-        X, _, num_iter = jax.lax.while_loop(iter_condition, X_new, init_val)
-
-        return X  # jnp.where(num_iter < max_iter, X, X * jnp.nan)
-
-    X = jax.vmap(solve)(guesses, params)
-    return X
+    def iter_condition(arg):
+        """Iteration condition for the while loop: check if we are within desired tolerance."""
+        X, dx, num_iter, _ = arg
+        return not_converged(X, dx, num_iter) & (num_iter < iter_limit)
+
+    def X_new(arg):
+        """Returns the next Newton iterate and the difference from previous guess."""
+        X, _, num_iter, radius = arg
+        fac = jnp.min(jnp.array([(num_iter + 1.0) / careful_steps, 1.0]))
+        F, J = func(X, *params), jacfunc(X, *params)
+        step, pivot_ratio = linear_solve(J, F)
+        dx = -step * fac
+        singular = ~jnp.all(jnp.isfinite(dx)) | ~(pivot_ratio > PIVOT_EPS * jnp.finfo(X.dtype).eps * X.shape[0])
+        dx = jnp.where(singular, jnp.zeros_like(X), dx)
+        if log:
+            # the Newton step in log variables is the relative linear Newton step dX / X: follow the linear iterate
+            # where it stays positive, and stop at the clipping bounds, so that unknowns pinned there converge
+            dx = jnp.log(jnp.maximum(1 + dx, MIN_LOG_STEP))
+            dx = (X + dx).clip(*BOUNDS[variables]) - X
+        # globalized steps may be much shorter than dx, so dx is kept as the step for the convergence test: points
+        # should only stop where the Newton step itself is small
+        if globalization == "linesearch":
+            X_next = line_search_step(func, params, X, F, J, dx, fac, variables)
+        elif globalization == "trust_region":
+            X_next, radius = dogleg_step(func, params, X, F, J, dx, radius, variables)
+        else:
+            X_next = (X + dx).clip(*BOUNDS[variables])
+        return X_next, dx, num_iter + 1, radius
+
+    radius = -jnp.ones((), dtype=X.dtype)  # set from the scaled norm of X at the first trust region step
+    X, dx, num_iter, _ = jax.lax.while_loop(iter_condition, X_new, (X, dx, num_iter, radius))
+    converged = ~not_converged(X, dx, num_iter) & jnp.all(jnp.isfinite(X))
+    residual_norm = jnp.linalg.norm(func(X, *params))
+    return tuple(jnp.asarray(a) for a in (X, dx, num_iter, converged, residual_norm))
+
+
+# no step is taken through Jacobians with pivot ratios (see pism.numerics.linalg) below this many machine epsilons of
+# the working precision per unknown, the round-off that elimination leaves in the pivots of singular matrices
+PIVOT_EPS = 1.0
+GLOBALIZATIONS = (None, "linesearch", "trust_region")
+ARMIJO_SLOPE = 1e-4  # fraction of the linearly predicted decrease of the residual that a step must achieve
+MAX_BACKTRACKS = 10
+TRUST_RADIUS_FACTOR = 100.0  # initial trust radius, in units of the scaled norm of X (as in MINPACK's hybrj)
+MAX_DECREASE = 0.99  # globalized steps shrink each component of X by at most this fraction of its value
+
+
+def scaled_merit(func, params, X, scale):
+    """Returns the squared 2-norm of f(X) / scale, or infinity if it is not finite"""
+    merit = jnp.sum((func(X, *params) / scale) ** 2)
+    return jnp.where(jnp.isfinite(merit), merit, jnp.inf)
+
+
+def residual_scale(X, J, variables="linear"):
+    """Returns the scales that the components of the residual are compared in: the largest change of each component
+    due to a relative change of one component of X, max_j |J_ij X_j|, or max_j |J_ij| in log variables. In these
+    units, equations of very different magnitudes (e.g. chemistry and heating) weigh equally, and squared norms of
+    float32 residuals do not underflow."""
+    scale = jnp.max(jnp.abs(J * X[None, :] if variables == "linear" else J), axis=1)
+    return jnp.where((scale > 0) & jnp.isfinite(scale), scale, 1.0)
+
+
+def boundary_fraction(X, dx):
+    """Returns the largest fraction <= 1 of the step dx that shrinks no component of the positive iterate X by more
+    than MAX_DECREASE of its value, so that globalized steps cannot reach the clipping floor and stall there"""
+    shrink = jnp.max(-dx / jnp.maximum(X, 1e-37))
+    return jnp.where(shrink > MAX_DECREASE, MAX_DECREASE / shrink, 1.0)
+
+
+def line_search_step(func, params, X, F, J, dx, fac, variables="linear"):
+    """Backtracks along the Newton step dx, halving it until the squared residual norm decreases by at least the
+    Armijo fraction of its linearly predicted decrease, or MAX_BACKTRACKS halvings have been made. Steps in linear
+    variables are first shortened to keep X positive (see boundary_fraction).
+
+    Returns
+    -------
+    X: array_like
+        The new iterate
+    """
+    scale = residual_scale(X, J, variables)
+    merit0 = jnp.sum((F / scale) ** 2)
+    if variables == "linear":
+        dx = dx * boundary_fraction(X, dx)
+
+    def trial(alpha):
+        return (X + alpha * dx).clip(*BOUNDS[variables])
+
+    def insufficient_decrease(arg):
+        alpha, merit, num_backtracks = arg
+        return (merit > (1 - 2 * ARMIJO_SLOPE * alpha * fac) * merit0) & (num_backtracks < MAX_BACKTRACKS)
+
+    def backtrack(arg):
+        alpha, _, num_backtracks = arg
+        alpha = 0.5 * alpha
+        return alpha, scaled_merit(func, params, trial(alpha), scale), num_backtracks + 1
+
+    alpha = jnp.ones((), dtype=X.dtype)
+    alpha, _, _ = jax.lax.while_loop(
+        insufficient_decrease, backtrack, (alpha, scaled_merit(func, params, trial(alpha), scale), 0)
+    )
+    return trial(alpha)
+
+
+def dogleg_step(func, params, X, F, J, dx, radius, variables="linear"):
+    """Takes a dogleg step between the steepest-descent (Cauchy) point and the Newton step dx, within a trust region
+    of the given radius. Each component of X is scaled by the norm of its column of the row-scaled Jacobian, so that
+    a unit change of any scaled component changes the scaled residual by about as much. The step is accepted if it
+    achieves a fraction of the decrease of the squared residual norm predicted by the linearized model, and the radius
+    is shrunk or grown according to how well the decrease was predicted. A negative radius is initialized to
+    TRUST_RADIUS_FACTOR times the scaled norm of X.
+
+    Returns
+    -------
+    X, radius:
+        The new iterate, unchanged if the step was rejected, and the updated trust radius
+    """
+    scale = residual_scale(X, J, variables)
+    column_norms = jnp.linalg.norm(J / scale[:, None], axis=0)
+    D = 1 / jnp.where((column_norms > 0) & jnp.isfinite(column_norms), column_norms, 1.0)  # dx = D z
+    radius = jnp.where(radius < 0, TRUST_RADIUS_FACTOR * jnp.linalg.norm(X / D), radius)
+    F_scaled, J_scaled = F / scale, J * D[None, :] / scale[:, None]
+    newton = dx / D
+    gradient = J_scaled.T @ F_scaled
+    J_gradient = J_scaled @ gradient
+    curvature = jnp.sum(J_gradient**2)
+    cauchy = -jnp.where(curvature > 0, jnp.sum(gradient**2) / curvature, 0.0) * gradient
+
+    newton_norm, cauchy_norm = jnp.linalg.norm(newton), jnp.linalg.norm(cauchy)
+    # intersection of the segment from the Cauchy point to the Newton point with the trust region boundary
+    d = newton - cauchy
+    a, b, c = jnp.sum(d**2), 2 * jnp.sum(cauchy * d), cauchy_norm**2 - radius**2
+    tau = jnp.where(a > 0, (-b + jnp.sqrt(jnp.maximum(b**2 - 4 * a * c, 0.0))) / (2 * jnp.where(a > 0, a, 1.0)), 0.0)
+    z = jnp.where(
+        newton_norm <= radius,
+        newton,
+        jnp.where(cauchy_norm >= radius, cauchy * radius / jnp.maximum(cauchy_norm, 1e-37), cauchy + tau * d),
+    )
+    if variables == "linear":
+        z = z * boundary_fraction(X, z * D)
+    step_norm = jnp.linalg.norm(z)
+
+    X_trial = (X + z * D).clip(*BOUNDS[variables])
+    merit0 = jnp.sum(F_scaled**2)
+    actual = merit0 - scaled_merit(func, params, X_trial, scale)
+    predicted = merit0 - jnp.sum((F_scaled + J_scaled @ z) ** 2)
+    rho = jnp.where(predicted > 0, actual / jnp.where(predicted > 0, predicted, 1.0), -1.0)
+    accept = rho > ARMIJO_SLOPE
+
+    radius = jnp.where(
+        rho < 0.25,
+        0.25 * step_norm,
+        jnp.where((rho > 0.75) & (step_norm > 0.99 * radius), 2 * radius, radius),
+    )
+    return jnp.where(accept, X_trial, X), radius
+
+
+def newton_iterate_sharded(
+    func,
+    jacfunc,
+    tolfunc,
+    careful_steps,
+    shard,
+    X,
+    dx,
+    num_iter,
+    params,
+    rtol,
+    iter_limit,
+    globalization=None,
+    variables="linear",
+):
+    """Runs newton_iterate with the batch split evenly across all JAX devices if shard is True.
+
+    The batch is padded to a multiple of the device count by repeating the last point, and the padding is removed from
+    the outputs. Each device runs its own while loop over its shard, so devices do not wait on each other between
+    iterations. Other arguments and return values are as in newton_iterate.
+    """
+    solver_args = func, jacfunc, tolfunc, careful_steps
+    num_devices = jax.device_count()
+    if not shard or num_devices == 1:
+        return newton_iterate(*solver_args, X, dx, num_iter, params, rtol, iter_limit, globalization, variables)
+
+    N = X.shape[0]
+    padding = -N % num_devices
+    iter_limit = jnp.broadcast_to(iter_limit, num_iter.shape)
+    args = [
+        jnp.pad(a, [(0, padding)] + [(0, 0)] * (a.ndim - 1), mode="edge")
+        for a in (X, dx, num_iter, params, iter_limit)
+    ]
+
+    sharded, mesh = sharded_newton_iterate(*solver_args, tuple(jax.devices()), globalization, variables)
+    batch = jax.sharding.NamedSharding(mesh, jax.sharding.PartitionSpec("batch"))
+    args = [jax.device_put(a, batch) for a in args]
+    return tuple(out[:N] for out in sharded(*args, rtol))
+
+
+@lru_cache(maxsize=64)
+def sharded_newton_iterate(func, jacfunc, tolfunc, careful_steps, devices, globalization=None, variables="linear"):
+    """Builds (once per solver and device set) the jitted shard_map of newton_iterate over a 1D mesh of devices
+
+    Returns
+    -------
+    sharded: callable
+        Function of (X, dx, num_iter, params, iter_limit, rtol) with the batch axis of all but rtol sharded
+    mesh: jax.sharding.Mesh
+        The device mesh, with the single axis "batch"
+    """
+    mesh = jax.sharding.Mesh(np.array(devices), ("batch",))
+    batch, replicated = jax.sharding.PartitionSpec("batch"), jax.sharding.PartitionSpec()
+
+    def local_iterate(X, dx, num_iter, params, iter_limit, rtol):
+        return newton_iterate(
+            func, jacfunc, tolfunc, careful_steps, X, dx, num_iter, params, rtol, iter_limit, globalization, variables
+        )
+
+    sharded = jax.shard_map(local_iterate, mesh=mesh, in_specs=(batch,) * 5 + (replicated,), out_specs=batch)
+    return jax.jit(sharded), mesh
+
+
+def newton_iterate_compacting(
+    func,
+    jacfunc,
+    tolfunc,
+    careful_steps,
+    shard,
+    X,
+    dx,
+    num_iter,
+    params,
+    rtol,
+    max_iter,
+    iterations_per_round,
+    globalization=None,
+    variables="linear",
+):
+    """Runs newton_iterate in rounds of iterations_per_round iterations, only carrying the unconverged points into
+    the next round.
+
+    Active points are padded to the next power of 2 so that the shrinking batches reuse a handful of compiled shapes.
+    Arguments and return values are as in newton_iterate_sharded.
+    """
+    X, dx, num_iter, params = np.array(X), np.array(dx), np.array(num_iter), np.asarray(params)
+    converged = np.zeros(len(X), dtype=bool)
+    residual_norm = np.full(len(X), np.inf, dtype=X.dtype)
+    active = np.arange(len(X))
+    solver_args = func, jacfunc, tolfunc, careful_steps, shard
+
+    while len(active):
+        size = 1 << int(len(active) - 1).bit_length()  # pad to a power of 2 by repeating the last active point
+        padded = np.concatenate([active, np.full(size - len(active), active[-1])])
+        iter_limit = np.minimum(num_iter[padded] + iterations_per_round, max_iter)
+        out = newton_iterate_sharded(
+            *solver_args,
+            X[padded],
+            dx[padded],
+            num_iter[padded],
+            params[padded],
+            rtol,
+            iter_limit,
+            globalization,
+            variables,
+        )
+        out = [np.asarray(o)[: len(active)] for o in out]
+        X[active], dx[active], num_iter[active], converged[active], residual_norm[active] = out
+        active = active[~converged[active] & (num_iter[active] < max_iter) & np.all(np.isfinite(X[active]), axis=1)]
+
+    return tuple(jnp.asarray(a) for a in (X, dx, num_iter, converged, residual_norm))
+
+
+def continuation_order(params, axis):
+    """Returns the order of the points of a continuation sweep: grouped by the parameters other than params[:, axis]
+    and sorted along params[:, axis] within each group"""
+    params = np.asarray(params)
+    others = [params[:, j] for j in reversed(range(params.shape[1])) if j != axis]
+    return np.lexsort([params[:, axis], *others])  # the last key is the primary one
+
+
+def newton_continuation(
+    func,
+    jacfunc,
+    tolfunc,
+    careful_steps,
+    guesses,
+    params,
+    rtol,
+    max_iter,
+    axis,
+    block_size,
+    globalization=None,
+    variables="linear",
+):
+    """Solves a batch of points as a continuation sweep along params[:, axis] (see newton_rootsolve)
+
+    The ordered points are padded to a whole number of blocks by repeating the last point. The first point of every
+    block is an anchor, solved from its guess in one batch. Each block is then swept by sweep_blocks, in parallel
+    across blocks. Points that did not converge from their neighbour are finally re-solved from their guesses.
+
+    Returns
+    -------
+    X, num_iter, converged, residual_norm:
+        As in newton_iterate, in the original order of the points. num_iter counts all the iterations spent on each
+        point, including failed warm starts.
+    """
+    N = guesses.shape[0]
+    order = continuation_order(params, axis)
+    num_blocks = -(-N // block_size)
+    order = np.concatenate([order, np.full(num_blocks * block_size - N, order[-1])]).reshape(num_blocks, block_size)
+    guesses, params = np.asarray(guesses), np.asarray(params)
+
+    cold_args = func, jacfunc, tolfunc, careful_steps
+    anchors = order[:, 0]
+    X_anchor, _, iter_anchor, converged_anchor, _ = newton_iterate(
+        *cold_args,
+        guesses[anchors],
+        initial_step(guesses[anchors], variables),
+        np.zeros(num_blocks, dtype=int),
+        params[anchors],
+        rtol,
+        max_iter,
+        globalization,
+        variables,
+    )
+    out = sweep_blocks(
+        func,
+        jacfunc,
+        tolfunc,
+        careful_steps,
+        X_anchor,
+        converged_anchor,
+        guesses[order],
+        params[order],
+        axis,
+        rtol,
+        max_iter,
+        globalization,
+        variables,
+    )
+    swept = [np.array(o).reshape(num_blocks * block_size, *o.shape[2:]) for o in out]
+    swept[1][::block_size] += np.asarray(iter_anchor)  # the anchors were solved before the sweep started
+
+    # undo the ordering: where a point appears more than once (padding), all copies hold the same solution
+    X, num_iter, converged, residual_norm = (np.empty((N, *o.shape[1:]), dtype=o.dtype) for o in swept)
+    for unordered, ordered in zip((X, num_iter, converged, residual_norm), swept):
+        unordered[order.ravel()] = ordered
+
+    retry = np.flatnonzero(~converged)  # fall back to a cold start where continuation failed
+    if len(retry):
+        X_retry, _, iter_retry, converged_retry, norm_retry = newton_iterate(
+            *cold_args,
+            guesses[retry],
+            initial_step(guesses[retry], variables),
+            np.zeros(len(retry), dtype=int),
+            params[retry],
+            rtol,
+            max_iter,
+            globalization,
+            variables,
+        )
+        X[retry], converged[retry], residual_norm[retry] = X_retry, converged_retry, norm_retry
+        num_iter[retry] += np.asarray(iter_retry)
+    return tuple(jnp.asarray(a) for a in (X, num_iter, converged, residual_norm))
+
+
+def sweep_blocks(
+    func,
+    jacfunc,
+    tolfunc,
+    careful_steps,
+    X_anchor,
+    converged_anchor,
+    guesses,
+    params,
+    axis,
+    rtol,
+    max_iter,
+    globalization=None,
+    variables="linear",
+):
+    """Sweeps blocks of ordered points with a scan, vmapped over blocks, solving each point from the solution of the
+    previous one with full Newton steps
+
+    A point is started from its own guess, with careful steps, instead if the previous point did not converge or
+    differs from it in a parameter other than params[:, axis], i.e. belongs to another sweep.
+
+    Parameters
+    ----------
+    func, jacfunc, tolfunc, careful_steps, rtol, globalization:
+        As in newton_rootsolve
+    variables: str, optional
+        "linear" or "log", the variables that func, jacfunc, tolfunc and the guesses are in (see log_problem)
+    X_anchor, converged_anchor: array_like
+        Shape (num_blocks, n) solutions at the first point of each block and shape (num_blocks,) convergence flags
+    guesses, params: array_like
+        Shape (num_blocks, block_size, n) and (num_blocks, block_size, n_p) guesses and parameters of the points
+    axis: int
+        Column of params along which the points are ordered
+    max_iter: int
+        Maximum number of iterations per point
+
+    Returns
+    -------
+    X, num_iter, converged, residual_norm:
+        Shape (num_blocks, block_size, ...) solutions and convergence information, with the anchors' iterations not
+        counted
+    """
+    if jacfunc is None:
+        jacfunc = jax.jacfwd(func)
+    others = np.arange(params.shape[-1]) != axis
+
+    def sweep(X0, converged0, guesses, params):
+        def step(carry, point):
+            X_prev, converged_prev, params_prev = carry
+            guess, p = point
+            warm = converged_prev & jnp.all(jnp.where(others, p == params_prev, True))
+            X = jnp.where(warm, X_prev, guess)
+            careful = jnp.where(warm, 1, careful_steps)
+            X, _, num_iter, converged, residual_norm = newton_solve(
+                func,
+                jacfunc,
+                tolfunc,
+                careful,
+                X,
+                initial_step(X, variables),
+                0,
+                max_iter,
+                p,
+                rtol,
+                globalization,
+                variables,
+            )
+            return (X, converged, p), (X, num_iter, converged, residual_norm)
+
+        residual_norm0 = jnp.linalg.norm(func(X0, *params[0]))
+        _, (X, num_iter, converged, residual_norm) = jax.lax.scan(
+            step, (X0, converged0, params[0]), (guesses[1:], params[1:])
+        )
+        return (
+            jnp.concatenate([X0[None], X]),
+            jnp.concatenate([jnp.zeros(1, dtype=num_iter.dtype), num_iter]),
+            jnp.concatenate([converged0[None], converged]),
+            jnp.concatenate([residual_norm0[None], residual_norm]),
+        )
+
+    return jax.vmap(sweep)(X_anchor, converged_anchor, guesses, params)
 
 
-newton_rootsolve = jax.jit(
-    newton_rootsolve, static_argnames=["func", "tolfunc", "jacfunc", "max_iter", "careful_steps"]
+sweep_blocks = jax.jit(
+    sweep_blocks,
+    static_argnames=["func", "jacfunc", "tolfunc", "careful_steps", "axis", "globalization", "variables"],
 )
@@ -0,0 +1,38 @@
+import numpy as np
+import jax, jax.numpy as jnp
+from ..integrators import integrate
+
+
+def test_integrate_linear_decay(N=64):
+    """Test: integrate dx/dt = -k x over stiffness ratios k dt from 1e-2 to 1e6 and compare with exp(-k dt)"""
+    k = np.logspace(-2, 6, N)
+    exact = np.exp(-k)
+
+    @jax.jit
+    def func(x, *params):
+        return -params[0] * x
+
+    for method, accuracy in (("ros2", 1e-2), ("backward_euler", 1e-1)):  # global error of 2nd vs 1st order method
+        X, info = integrate(func, np.ones(N), 1.0, k, method=method, rtol=1e-4, atol=1e-8, return_info=True)
+        assert jnp.all(info["success"])
+        assert np.allclose(X[:, 0], exact, rtol=accuracy, atol=1e-6)
+        assert jnp.all(info["num_steps"][k < 0.1] < 20)  # non-stiff points need few substeps
+
+
+def test_integrate_jacfunc(N=16):
+    """Test: a 2-species exchange x <-> y with a user-supplied Jacobian relaxes to the equilibrium ratio and
+    conserves x + y"""
+    rates = np.c_[np.logspace(0, 4, N), np.logspace(2, 0, N)]
+
+    @jax.jit
+    def func(X, *params):
+        flux = params[0] * X[0] - params[1] * X[1]
+        return jnp.array([-flux, flux])
+
+    @jax.jit
+    def jacfunc(X, *params):
+        return jnp.array([[-params[0], params[1]], [params[0], -params[1]]])
+
+    X = integrate(func, np.c_[np.ones(N), np.zeros(N)], 100.0, rates, jacfunc=jacfunc, atol=1e-8)
+    assert np.allclose(X.sum(axis=1), 1, rtol=1e-5)
+    assert np.allclose(X[:, 0], rates[:, 1] / rates.sum(axis=1), rtol=1e-3)
@@ -0,0 +1,46 @@
+import numpy as np
+import jax, jax.numpy as jnp
+from ..linalg import small_lu_solve, lapack_lu_solve, linear_solve
+from ..solvers import newton_rootsolve, PIVOT_EPS
+
+
+def test_small_lu_solve(N=1000):
+    """Test: the unrolled and LAPACK solves of well-conditioned random systems whose rows are permuted, so that they
+    need pivoting, and whose rows and columns are scaled over 30 decades, should have small componentwise residuals
+    and the same pivot ratios, well above the machine epsilon"""
+    rng = np.random.default_rng(0)
+    with jax.enable_x64(True):
+        for n in (1, 3, 7, 20):
+            A = 2 * n * np.eye(n) + rng.uniform(-1, 1, (N, n, n))  # diagonally dominant
+            A = A[np.arange(N)[:, None], rng.permuted(np.tile(np.arange(n), (N, 1)), axis=1)]
+            A *= 10 ** rng.uniform(-15, 15, (N, n, 1)) * 10 ** rng.uniform(-15, 15, (N, 1, n))
+            b = rng.normal(size=(N, n)) * 10 ** rng.uniform(-15, 15, (N, n))
+            x, ratio = jax.jit(jax.vmap(small_lu_solve))(jnp.asarray(A), jnp.asarray(b))
+            x_lapack, ratio_lapack = jax.jit(jax.vmap(lapack_lu_solve))(jnp.asarray(A), jnp.asarray(b))
+            for solution in (np.asarray(x), np.asarray(x_lapack)):
+                residual = np.abs(np.einsum("nij,nj->ni", A, solution) - b)
+                assert np.all(residual <= 1e-10 * (np.einsum("nij,nj->ni", np.abs(A), np.abs(solution)) + np.abs(b)))
+            assert np.all(ratio > 1e-4) and np.allclose(ratio, ratio_lapack, rtol=1e-8)
+
+
+def test_singular_systems(N=100, n=5):
+    """Test: systems with a row repeated up to a power of 2 should have pivot ratios below the threshold of the Newton
+    iteration, which should take no step through them. The pivot ratio of a regular system should not depend on its row
+    scaling."""
+    rng = np.random.default_rng(0)
+    A = rng.normal(size=(N, n, n))
+    A[:, -1] = A[:, 0] * 2.0 ** rng.integers(-10, 10, (N, 1))
+    _, ratio = jax.vmap(linear_solve)(jnp.asarray(A, dtype=jnp.float32), jnp.ones((N, n), dtype=jnp.float32))
+    assert np.all(ratio < PIVOT_EPS * jnp.finfo(jnp.float32).eps * n)
+
+    def func(x, *params):
+        return jnp.asarray(A[0], dtype=x.dtype) @ x - 1
+
+    X, info = newton_rootsolve(func, jnp.ones((1, n)), jnp.zeros((1, 1)), return_info=True)
+    assert np.all(X == 1) and np.all(info["num_iter"] == 1)
+
+    A = jnp.array([[4.0, 1.0, 0.0], [1.0, 3.0, 1.0], [0.0, 1.0, 2.0]])
+    scaled = A * jnp.array([1e-20, 1.0, 1e20])[:, None]
+    _, ratio = linear_solve(A, jnp.ones(3))
+    _, ratio_scaled = linear_solve(scaled, jnp.ones(3))
+    assert ratio > 0.5 and np.isclose(ratio, ratio_scaled, rtol=1e-5)
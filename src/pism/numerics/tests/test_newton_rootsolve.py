@@ -1,3 +1,6 @@
+import os
+import subprocess
+import sys
 import numpy as np
 import jax, jax.numpy as jnp
 from ..solvers import newton_rootsolve
@@ -27,3 +30,181 @@ def test_newton_rootsolve(N=10**5):
     converged = jnp.all(jnp.isfinite(sol), axis=1)
     assert converged.sum() > 0.9 * N
     assert jnp.all(jnp.isclose(sol[converged], exact[converged], rtol=1e-5, atol=0))
+
+
+def test_newton_rootsolve_jacfunc(N=10**3):
+    """Test: a user-supplied Jacobian should be used and give the same solutions as autodiff"""
+    p = 0.1 + np.random.rand(N) * 10
+    a = 0.1 + np.random.rand(N)
+    params = jnp.c_[p, a]
+    guess = jnp.ones(N)
+
+    @jax.jit
+    def func(x, *params):
+        return x ** params[0] - params[1]
+
+    @jax.jit
+    def jacfunc(x, *params):
+        return jnp.atleast_2d(params[0] * x ** (params[0] - 1))
+
+    sol_autodiff = newton_rootsolve(func, guess, params)
+    sol = newton_rootsolve(func, guess, params, jacfunc=jacfunc)
+    converged = jnp.all(jnp.isfinite(sol_autodiff), axis=1)
+    assert jnp.all(jnp.isclose(sol[converged], sol_autodiff[converged], rtol=1e-5, atol=0))
+
+
+def test_newton_rootsolve_compacting(N=10**3):
+    """Test: retiring converged points between rounds should not change the solutions or iteration counts"""
+    p = 0.1 + np.random.rand(N) * 10
+    a = 0.1 + np.random.rand(N)
+    params = jnp.c_[p, a]
+    guess = jnp.ones(N)
+
+    @jax.jit
+    def func(x, *params):
+        return x ** params[0] - params[1]
+
+    sol, info = newton_rootsolve(func, guess, params, return_info=True)
+    sol_rounds, info_rounds = newton_rootsolve(func, guess, params, return_info=True, iterations_per_round=3)
+    assert info["converged"].sum() > 0.9 * N
+    assert np.array_equal(info["converged"], info_rounds["converged"])
+    assert np.array_equal(info["num_iter"], info_rounds["num_iter"])
+    converged = info["converged"]
+    assert np.allclose(sol[converged], sol_rounds[converged], rtol=1e-6, atol=0)
+    assert np.all(info["residual_norm"][converged] < 1e-4)
+
+
+def test_newton_rootsolve_continuation(N=10**3):
+    """Test: a shuffled sweep along p of x^p = a, interleaving 2 values of a, should be solved in sweep order from
+    neighbouring solutions, giving the same solutions as cold starts in far fewer iterations"""
+    rng = np.random.default_rng(0)
+    params = np.c_[np.linspace(0.5, 5, N), rng.choice([0.3, 0.7], N)][rng.permutation(N)]
+    guess = jnp.ones(N)
+
+    @jax.jit
+    def func(x, *params):
+        return x ** params[0] - params[1]
+
+    sol, info = newton_rootsolve(func, guess, params, return_info=True)
+    sol_swept, info_swept = newton_rootsolve(
+        func, guess, params, return_info=True, continuation_axis=0, block_size=100
+    )
+    assert np.all(info_swept["converged"]) and np.all(info["converged"])
+    assert np.allclose(sol_swept, sol, rtol=1e-5, atol=0)
+    assert info_swept["num_iter"].sum() < 0.6 * info["num_iter"].sum()
+
+
+def test_newton_rootsolve_globalization(N=10**3):
+    """Test: line search and trust region steps should converge to the right root of x^p = a wherever plain Newton
+    steps do, and the trust region should not stall at the x = 0 clipping floor where x^p has infinite slope"""
+    rng = np.random.default_rng(0)
+    params = np.c_[0.1 + rng.random(N) * 10, 0.1 + rng.random(N)]
+    exact = params[:, 1] ** (1 / params[:, 0])
+
+    @jax.jit
+    def func(x, *params):
+        return x ** params[0] - params[1]
+
+    for globalization in (None, "linesearch", "trust_region"):
+        sol, info = newton_rootsolve(func, jnp.ones(N), params, return_info=True, globalization=globalization)
+        assert np.all(info["converged"])
+        assert np.allclose(sol[:, 0], exact, rtol=1e-5, atol=0)
+
+
+def test_newton_rootsolve_precision(N=10**3):
+    """Test: float64 and mixed-precision solves of x^p = a should reach double precision accuracy, mixed precision
+    taking only a few float64 refinement steps from the float32 solutions and only counting as converged after them"""
+    rng = np.random.default_rng(0)
+    params = np.c_[0.1 + rng.random(N) * 10, 0.1 + rng.random(N)]
+    exact = params[:, 1] ** (1 / params[:, 0])
+
+    def func(x, *params):
+        return x ** params[0] - params[1]
+
+    for precision in ("float64", "mixed"):
+        sol, info = newton_rootsolve(func, np.ones(N), params, rtol=1e-12, return_info=True, precision=precision)
+        assert sol.dtype == np.float64 and np.all(info["converged"])
+        assert np.allclose(sol[:, 0], exact, rtol=1e-12, atol=0)
+    assert np.all(info["num_refinement_iter"] <= 3)
+    # without float64 steps the float32 solutions are returned, which have not reached rtol
+    sol, info = newton_rootsolve(
+        func, np.ones(N), params, rtol=1e-12, return_info=True, precision="mixed", refinement_steps=0
+    )
+    assert not np.any(info["converged"]) and np.allclose(sol[:, 0], exact, rtol=1e-5)
+
+
+def test_newton_rootsolve_log_variables(N=10**3):
+    """Test: in log variables, roots of x^p = a spanning 30 decades should be found from x = 1 (where log x = 0) in
+    every precision, with no more iterations than the linear iteration, and fewer where linear steps overshoot"""
+    rng = np.random.default_rng(0)
+    params = np.c_[1 + rng.random(N) * 3, 10 ** rng.uniform(-30, 0, N)]
+    exact = params[:, 1] ** (1 / params[:, 0])
+
+    @jax.jit
+    def func(x, *params):
+        return x ** params[0] - params[1]
+
+    for precision, rtol in ((None, 1e-5), ("float64", 1e-12), ("mixed", 1e-12)):
+        sol, info = newton_rootsolve(
+            func, np.ones(N), params, rtol=rtol, return_info=True, precision=precision, variables="log"
+        )
+        assert np.all(info["converged"])
+        assert np.allclose(sol[:, 0], exact, rtol=10 * rtol, atol=0)
+    _, info_linear = newton_rootsolve(func, np.ones(N), params, rtol=1e-12, return_info=True, precision="float64")
+    _, info_log = newton_rootsolve(
+        func, np.ones(N), params, rtol=1e-12, return_info=True, precision="float64", variables="log"
+    )
+    assert info_log["num_iter"].sum() <= info_linear["num_iter"].sum()
+
+    # for p < 1, linear steps from x = 1 overshoot below 0 and restart from the clipping floor
+    params = np.c_[0.5 + rng.random(N) * 3.5, 10 ** rng.uniform(-15, 0, N)]
+    _, info_linear = newton_rootsolve(func, np.ones(N), params, rtol=1e-12, return_info=True, precision="float64")
+    sol, info_log = newton_rootsolve(
+        func, np.ones(N), params, rtol=1e-12, return_info=True, precision="float64", variables="log"
+    )
+    assert np.all(info_log["converged"]) and np.allclose(sol[:, 0], params[:, 1] ** (1 / params[:, 0]), rtol=1e-11)
+    assert info_log["num_iter"].sum() < info_linear["num_iter"].sum()
+
+
+def test_newton_rootsolve_implicit_gradients(N=10**3):
+    """Test: forward and reverse mode derivatives of the roots of x^p = a with respect to p and a, also under jit,
+    should match the analytic derivatives of x = a^(1/p)"""
+    rng = np.random.default_rng(0)
+    p, a = jnp.asarray(0.5 + rng.random(N) * 3), jnp.asarray(0.1 + rng.random(N))
+    exact = a ** (1 / p)
+
+    @jax.jit
+    def func(x, *params):
+        return x ** params[0] - params[1]
+
+    def root(p, a):
+        return newton_rootsolve(func, jnp.ones(N), jnp.c_[p, a], rtol=1e-6)[:, 0]
+
+    X, dX_dp = jax.jvp(root, (p, a), (jnp.ones(N), jnp.zeros(N)))
+    assert np.allclose(X, exact, rtol=1e-5) and np.allclose(dX_dp, -exact * jnp.log(a) / p**2, rtol=1e-4, atol=1e-7)
+    for grad in (jax.grad(lambda a: root(p, a).sum()), jax.jit(jax.grad(lambda a: root(p, a).sum()))):
+        assert np.allclose(grad(a), exact / (p * a), rtol=1e-4)
+
+
+def test_newton_rootsolve_sharded():
+    """Test: sharding an uneven batch over several (forced host) devices should give the unsharded solutions"""
+    script = """
+import numpy as np, jax, jax.numpy as jnp
+from pism.numerics import newton_rootsolve
+assert jax.device_count() == 3
+N = 1000
+p, a = 0.1 + np.random.rand(N) * 10, 0.1 + np.random.rand(N)
+func = jax.jit(lambda x, *params: x ** params[0] - params[1])
+X, info = newton_rootsolve(func, jnp.ones(N), jnp.c_[p, a], return_info=True)
+for rounds in (None, 4):
+    Xs, info_s = newton_rootsolve(
+        func, jnp.ones(N), jnp.c_[p, a], return_info=True, shard=True, iterations_per_round=rounds
+    )
+    assert Xs.shape == X.shape and np.array_equal(info["num_iter"], info_s["num_iter"])
+    assert np.allclose(X[info["converged"]], Xs[info["converged"]], rtol=1e-6, atol=0)
+"""
+    env = dict(os.environ, XLA_FLAGS="--xla_force_host_platform_device_count=3", JAX_PLATFORMS="cpu")
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")), env.get("PYTHONPATH", "")]
+    )
+    subprocess.run([sys.executable, "-c", script], env=env, check=True)
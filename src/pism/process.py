@@ -2,13 +2,60 @@
 
 """Implementation of base Process class with methods for managing and solving systems of equations"""
 
+import os
 from collections import defaultdict
+import numpy as np
 import sympy as sp
-import jax
-import jax.numpy as jnp
-from .numerics import newton_rootsolve
-from .symbols import n_
-from .misc import is_an_ion
+from . import conservation, decomposition, instrumentation
+from .codegen import sparse_jacobian
+from .ccode import c_source
+from .symbols import n_, k_B
+from .misc import is_an_ion, species_charge
+
+# species converged individually are converged relative to this fraction of their total density, when smaller
+TOLERANCE_FLOOR = 1e-6
+
+
+class Network(defaultdict):
+    """Dict mapping species to the RHS of their rate equations, in which unknown keys are initialized to 0. Counts its
+    modifications in `version`, so that quantities derived from it can be cached."""
+
+    def __init__(self, default_factory=int, *args, **kwargs):
+        super().__init__(default_factory, *args, **kwargs)
+        self.version = 0
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.version += 1
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.version += 1
+
+    def __ior__(self, other):  # dict implements |= without calling update
+        super().__ior__(other)
+        self.version += 1
+        return self
+
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+
+    def popitem(self):
+        self.version += 1
+        return super().popitem()
+
+    def setdefault(self, *args):
+        self.version += 1
+        return super().setdefault(*args)
+
+    def clear(self):
+        super().clear()
+        self.version += 1
 
 
 class Process:
@@ -19,6 +66,8 @@ class Process:
     + conservation equations.
     """
 
+    passive_species = ()  # species whose feedback on the rest of the network is neglected (see with_passive)
+
     def __init__(self, name="", bibliography={}):
         """Construct an empty Process instance
 
@@ -43,35 +92,67 @@ class Process:
         """Sum 2 processes together: define a new process whose rates are the sum of the input process"""
         if other == 0:  # necessary for native sum() routine to work
             return self
+        return Process.compose([self, other])
 
-        attrs_to_sum = "heat", "dust_heat", "subprocesses"  # all energy exchange terms
+    @classmethod
+    def compose(cls, processes, name=None):
+        """
+        Sums any number of processes into a single network in one pass.
 
-        sum_process = Process()
-        sum_process.rate = None  # "rate" ceases to be meaningful for composite processes
-        for summed_attr in attrs_to_sum:
-            attr1, attr2 = getattr(self, summed_attr), getattr(other, summed_attr)
-            if attr1 is None or attr2 is None:
-                setattr(sum_process, summed_attr, None)
-            else:
-                setattr(sum_process, summed_attr, attr1 + attr2)
+        Equivalent to sum(processes, Process()), but the terms of each species' equation, the heating rates and the
+        subprocesses are collected once and summed into flat expressions, instead of building a new network and new
+        nested sums per addition. This keeps composition linear in the number of processes. Species appear in the
+        network in order of first appearance.
 
-        # now combine the networks
-        sum_process.network = self.combine_networks(self.network, other.network)
-        sum_process.name = f"{self.name} + {other.name}"
+        Parameters
+        ----------
+        processes: iterable
+            Processes to sum
+        name: str, optional
+            Name of the composite process (default: the names of the processes joined by " + ")
+
+        Returns
+        -------
+        process: Process
+            The composite process
+        """
+        processes = list(processes)
+        attrs_to_sum = "heat", "dust_heat"  # all energy exchange terms
+        terms = {attr: [] for attr in attrs_to_sum}
+        network_terms = {}
+        subprocesses = []
+        for process in processes:
+            for attr in attrs_to_sum:
+                terms[attr].append(getattr(process, attr))
+            for species, rhs in process.network.items():
+                network_terms.setdefault(species, []).append(rhs)
+            subprocesses.append(process.subprocesses)
+
+        sum_process = cls()
+        sum_process.rate = None  # "rate" ceases to be meaningful for composite processes
+        for attr, values in terms.items():  # None if any process leaves it undefined
+            setattr(sum_process, attr, None if any(v is None for v in values) else sp.Add(*values))
+        if any(s is None for s in subprocesses):
+            sum_process.subprocesses = None
+        else:
+            sum_process.subprocesses = [s for process_subprocesses in subprocesses for s in process_subprocesses]
+        for species, rhs_terms in network_terms.items():
+            sum_process.network[species] = sp.Add(*rhs_terms)
+        sum_process.name = " + ".join(p.name for p in processes) if name is None else name
         return sum_process
 
     def __radd__(self, other):
         return self.__add__(other)
 
     def initialize_network(self):
-        self.network = defaultdict(int)  # this is a dict for which unknown keys are initialized to 0 by default
+        self.network = Network()  # this is a dict for which unknown keys are initialized to 0 by default
 
     def combine_networks(self, n1, n2):
-        combined_network = defaultdict(int)
-        combined_keys = set(tuple(n1.keys())).union(set(tuple(n2.keys())))  # gross?
-        for k in combined_keys:
-            combined_network[k] = n1[k] + n2[k]
-        return combined_network
+        """Returns the network whose rate equations are the sums of those of the networks n1 and n2 (see compose)"""
+        processes = [Process(), Process()]
+        for process, network in zip(processes, (n1, n2)):
+            process.network.update(network)
+        return Process.compose(processes).network
 
     def print_network_equations(self):
         """Prints the system of equations in the chemistry network"""
@@ -90,27 +171,61 @@ class Process:
         """Returns the list of ions involved in a process"""
         return [s for s in self.network if is_an_ion(s)]
 
+    @property
+    def conservation_laws(self):
+        """Element and charge conservation laws obeyed by the network (see pism.conservation.conservation_laws), cached
+        until the network changes"""
+        cache = self.reduction_cache()
+        if "conservation_laws" not in cache:
+            cache["conservation_laws"] = conservation.conservation_laws(self.network, self.passive_species)
+        return cache["conservation_laws"]
+
     @property
     def network_reduction_replacements(self):
-        """Replacements for reducing the chemistry network with conservation laws"""
-        Y = sp.Symbol("Y")  # general: mass fractions of different atoms other than H. n_i,tot = n_i + sum(n_ions of i)
-        nHtot = sp.Symbol("n_Htot")  # basically always want this
-
-        substitutions = {
-            n_("e-"): n_("H+") + n_("He+") + 2 * n_("He++"),
-            # n_("He+"): n_("e-") - n_("H+") - 2 * n_("He++"),
-            n_("H+"): nHtot - n_("H"),
-            n_("He++"): Y / (4 - 4 * Y) * nHtot - sp.Symbol("n_He") - sp.Symbol("n_He+"),
-        }
-        return substitutions
+        """Replacements for reducing the chemistry network with conservation laws: one species is eliminated per
+        independent element or charge conservation law of the network (see pism.conservation.reduction_replacements),
+        e.g. H+, He++ and e- from the H/He network, given the totals n_Htot, Y and x_<element> for other elements"""
+        cache = self.reduction_cache()
+        if "replacements" not in cache:
+            cache["replacements"] = conservation.reduction_replacements(self.network, self.conservation_laws)
+        return cache["replacements"]
+
+    @property
+    def resolved_reduction_replacements(self):
+        """network_reduction_replacements with the replacements substituted into each other until no replaced symbol
+        remains, so that they can be applied in a single simultaneous substitution"""
+        cache = self.reduction_cache()
+        if "resolved_replacements" not in cache:
+            resolved = dict(self.network_reduction_replacements)
+            for _ in range(len(resolved)):  # each pass resolves one more level of dependencies
+                updated = {n: sp.sympify(r).xreplace(resolved) for n, r in resolved.items()}
+                if updated == resolved:
+                    break
+                resolved = updated
+            if any(set(resolved) & r.free_symbols for r in resolved.values()):
+                raise ValueError("The network reduction replacements depend on each other circularly.")
+            cache["resolved_replacements"] = resolved
+        return cache["resolved_replacements"]
 
     def apply_network_reductions(self, expr):
         """Applies the replacements given by network_reduction_replacements to a symbolic expression"""
-        out = expr
-        for _ in range(2):  # 2 passes to avoid ordering issues
-            for n, r in self.network_reduction_replacements.items():
-                out = out.subs(n, r)
-        return out
+        return sp.sympify(expr).xreplace(self.resolved_reduction_replacements)
+
+    def reduction_cache(self):
+        """Returns the dict caching the reduced network and heat, emptied whenever the network or heat has changed
+        since they were cached"""
+        version = getattr(self.network, "version", None)
+        cache = self.__dict__.get("_reduction_cache")
+        if (
+            cache is None
+            or version is None  # not a Network, so changes cannot be tracked
+            or cache["network"] is not self.network
+            or cache["version"] != version
+            or cache["heat"] is not self.heat
+        ):
+            cache = {"network": self.network, "version": version, "heat": self.heat}
+            self._reduction_cache = cache
+        return cache
 
     @property
     def reduced_network(self):
@@ -120,37 +235,237 @@ class Process:
         n_atom = sum(n_{species containing atom} * number of atoms in species)
         n_e- = sum(ion charge * n_ion) - want to keep n_e- in the explicit updates, so eliminate the highest ions?
 
-        This reduces the network of N rate equations to N - (num_atoms + 1).
+        This reduces the network of N rate equations to N - (num_atoms + 1). The result is cached until the network
+        changes.
         """
+        cache = self.reduction_cache()
+        if "reduced_network" not in cache:
+            replacements = self.resolved_reduction_replacements
+            cache["reduced_network"] = {
+                s: self.apply_network_reductions(rhs) for s, rhs in self.network.items() if n_(s) not in replacements
+            }
+        return dict(cache["reduced_network"])
 
-        replacements = self.network_reduction_replacements
-
-        reduced_network = {}
-        for s, rhs in self.network.items():
-            if n_(s) in replacements:
-                continue
-            else:
-                rhs = self.apply_network_reductions(rhs)
-            reduced_network[s] = rhs
-        return reduced_network
+    @property
+    def reduced_heat(self):
+        """Returns the net heating rate after substituting known conservation laws, cached until the heat changes"""
+        cache = self.reduction_cache()
+        if "reduced_heat" not in cache:
+            cache["reduced_heat"] = self.apply_network_reductions(self.heat)
+        return cache["reduced_heat"]
 
     def get_thermochem_network(self, reduced=True):
         """Returns the network including all chemical processes plus the gas heating-cooling equation"""
+        network = self.reduced_network if reduced else self.network
+        return network | {"T": self.reduced_heat}  # combine the dicts
+
+    def time_derivatives(self, thermo=True, reduced=True):
+        """Returns the RHS of the system of ODEs governing the time evolution of the network
+
+        Parameters
+        ----------
+        thermo: bool, optional
+            Whether to include the evolution of T (default: True). The gas is treated as ideal and monatomic, with
+            internal energy 3/2 n_tot k_B T, so that dT/dt = (heat - 3/2 k_B T dn_tot/dt) / (3/2 n_tot k_B).
+        reduced: bool, optional
+            Whether to return the reduced network, with conservation laws substituted (default: True)
+
+        Returns
+        -------
+        derivatives: dict
+            Dict mapping species to the symbolic expression for dn_species/dt, and "T" to that for dT/dt
+        """
+        network = self.reduced_network if reduced else dict(self.network)
+        if not thermo:
+            return network
+
+        n_tot = sum(n_(s) for s in self.network)
+        dn_tot_dt = sum(self.network.values())
+        dT_dt = (self.heat - 1.5 * k_B * sp.Symbol("T") * dn_tot_dt) / (1.5 * k_B * n_tot)
         if reduced:
-            network = self.reduced_network
+            dT_dt = self.apply_network_reductions(dT_dt)
+        return network | {"T": dT_dt}
+
+    def network_jacobian(self, thermo=False, reduced=True):
+        """Returns the structurally nonzero entries of the symbolic Jacobian of the network
+
+        Parameters
+        ----------
+        thermo: bool, optional
+            Whether to include the gas heating-cooling equation and T as an unknown (default: False)
+        reduced: bool, optional
+            Whether to differentiate the reduced network, with conservation laws substituted (default: True)
+
+        Returns
+        -------
+        jacobian: dict
+            Dict mapping (equation, variable) pairs, e.g. ("H", n_He+), to the symbolic partial derivative of that
+            equation's RHS. Pairs whose derivative is identically 0 are omitted.
+        """
+        if thermo:
+            network = self.get_thermochem_network(reduced=reduced)
+        else:
+            network = self.reduced_network if reduced else self.network
+        variables = [sp.Symbol("T") if s == "T" else n_(s) for s in network]
+        equations = list(network)
+        return {
+            (equations[i], variables[j]): df
+            for (i, j), df in sparse_jacobian(list(network.values()), variables).items()
+        }
+
+    def heating_expressions(self):
+        """Returns the names of the subprocesses and the expressions evaluated by heating_rates: the net heating rate
+        and the dust heating rate per unit volume, then the heating rate of each subprocess, then the rate of each
+        subprocess. Undefined (None) terms are taken to be 0."""
+        subprocesses = self.subprocesses or []
+        exprs = [self.heat, self.dust_heat]
+        exprs += [p.heat for p in subprocesses] + [p.rate for p in subprocesses]
+        return [p.name for p in subprocesses], [sp.S.Zero if e is None else sp.sympify(e) for e in exprs]
+
+    def heating_rates(self, values, input_abundances=True, cse=True, precision=None):
+        """
+        Evaluates the net heating rate, the dust heating rate, and the heating rate and rate of every subprocess at
+        many points in a single fused kernel, which is compiled once and cached
+
+        Parameters
+        ----------
+        values: dict
+            Dict of arrays of the quantities the rates depend on, e.g. T, n_Htot and Y, plus the species abundances or
+            number densities, e.g. the output of steadystate combined with its known quantities
+        input_abundances: bool, optional
+            Whether species are given as abundances relative to H rather than number densities (default: True).
+            Number densities n_<species> may be passed under their symbol names either way.
+        cse: bool, optional
+            Whether to eliminate common subexpressions (e.g. rate coefficients shared between processes) so that each
+            is evaluated once per point (default: True)
+        precision: str, optional
+            None to evaluate in JAX's default float type (float32 unless x64 is enabled), or "float64", in which case
+            numpy arrays are returned (default: None)
+
+        Returns
+        -------
+        rates: dict
+            "heat" and "dust_heat", shape (N,) arrays of the net heating rates per unit volume (negative for net
+            cooling); "subprocess_heat" and "subprocess_rate", shape (N, N_subprocesses) arrays of the heating rate
+            per unit volume and the rate of each subprocess; and "subprocesses", the list of subprocess names giving
+            the order of the columns
+        """
+        import jax
+        from .kernels import evaluation_kernel
+
+        names, exprs = self.heating_expressions()
+        variables = sorted(set().union(*(e.free_symbols for e in exprs)), key=str)
+        columns = []
+        for symbol in variables:
+            name = str(symbol)
+            species = name[2:] if name.startswith("n_") else None
+            if input_abundances and species in self.network and species in values:
+                if "n_Htot" not in values:
+                    raise ValueError("n_Htot is needed to convert the species abundances to number densities.")
+                columns.append(np.asarray(values[species], dtype=np.float64) * np.asarray(values["n_Htot"]))
+            elif name in values or symbol in values:
+                columns.append(np.asarray(values[name if name in values else symbol], dtype=np.float64))
+            else:
+                raise ValueError(f"No value given for {name}, which the heating rates depend on.")
+        num_points = max((np.size(c) for c in columns), default=1)
+        X = np.stack([np.broadcast_to(c, (num_points,)) for c in columns], axis=1).reshape(num_points, -1)
+
+        with instrumentation.phase("heating_kernel"):
+            kernel = evaluation_kernel(exprs, variables, cse)
+        if precision == "float64":
+            with jax.enable_x64(True):
+                out = np.asarray(kernel(jax.numpy.asarray(X)))
+        elif precision is None:
+            out = kernel(jax.numpy.asarray(X))
+        else:
+            raise ValueError(f"precision must be None or 'float64', not {precision!r}.")
+        num_subprocesses = len(names)
+        return {
+            "heat": out[:, 0],
+            "dust_heat": out[:, 1],
+            "subprocess_heat": out[:, 2 : 2 + num_subprocesses],
+            "subprocess_rate": out[:, 2 + num_subprocesses :],
+            "subprocesses": names,
+        }
+
+    def generate_c(self, name="pism_network", directory=None, thermo=True, reduced=True, parameters=None, cse=True):
+        """
+        Generates a self-contained C99 module evaluating the RHS of the system of ODEs (see time_derivatives), the net
+        heating rate and the analytic Jacobian of the RHS, for embedding in a simulation code.
+
+        Each has a per-cell function on fixed-size arrays, e.g. <name>_rhs(x, p, f), and a batched variant looping over
+        contiguous cells, e.g. <name>_rhs_batch(N, x, p, f). x holds the number densities of the species (followed by
+        T if thermo) sorted by species name, and p the remaining symbols, e.g. n_Htot and Y, in the orders listed in
+        the header.
+
+        Parameters
+        ----------
+        name: str, optional
+            Prefix of the generated identifiers and file names (default: "pism_network")
+        directory: str, optional
+            If given, <name>.c and <name>.h are written to this directory
+        thermo: bool, optional
+            Whether to include the evolution of T (default: True)
+        reduced: bool, optional
+            Whether to generate the reduced network, with conservation laws substituted (default: True)
+        parameters: list, optional
+            Names or symbols of the parameters in the order they are stored in p (default: all symbols that are not
+            variables, sorted by name)
+        cse: bool, optional
+            Whether to eliminate common subexpressions within each function (default: True)
+
+        Returns
+        -------
+        module: dict
+            Dict of the C "source" and "header", and the names of the "variables" and "parameters" in array order
+        """
+        derivatives = self.time_derivatives(thermo=thermo, reduced=reduced)
+        order = sorted(s for s in derivatives if s != "T") + (["T"] if thermo else [])  # stable array layout
+        variables = [sp.Symbol("T") if s == "T" else n_(s) for s in order]
+        heat = self.reduced_heat if reduced else sp.sympify(self.heat)
+        exprs = [sp.sympify(derivatives[s]) for s in order]
+        if parameters is None:
+            symbols = set().union(heat.free_symbols, *[e.free_symbols for e in exprs])
+            parameters = sorted(symbols - set(variables), key=str)
         else:
-            network = self.network
-        return network | {"T": self.apply_network_reductions(self.heat)}  # combine the dicts
+            parameters = [sp.Symbol(p) if isinstance(p, str) else p for p in parameters]
+
+        source, header = c_source(name, exprs, heat, variables, parameters, cse=cse)
+        if directory is not None:
+            for extension, text in (("c", source), ("h", header)):
+                with open(os.path.join(directory, f"{name}.{extension}"), "w") as f:
+                    f.write(text)
+        return {
+            "source": source,
+            "header": header,
+            "variables": [str(v) for v in variables],
+            "parameters": [str(p) for p in parameters],
+        }
 
+    @instrumentation.timed("steadystate")
     def steadystate(
         self,
         known_quantities,
-        guess,
+        guess=None,
         input_abundances=True,
         output_abundances=True,
         reduce_network=True,
         tol=1e-3,
         careful_steps=10,
+        cse=True,
+        jacobian="symbolic",
+        return_info=False,
+        iterations_per_round=None,
+        shard=False,
+        tabulate=False,
+        continuation=None,
+        block_size=256,
+        globalization=None,
+        precision=None,
+        refinement_steps=3,
+        decompose=False,
+        passive=None,
+        variables="linear",
     ):
         """
         Solves for equilibrium after substituting a set of known quantities, e.g. temperature, metallicity,
@@ -164,8 +479,8 @@ class Process:
             equilibrium. If T is not included, solve for thermochemical equilibrium.
         guess: dict, optional
             Dict of symbolic quantities and their values that will be plugged into the network solve as guesses for the
-            unknown quantities. Can be arrays if you want to substitute multiple values. Will default to trying sensible
-            guesses for recognized quantities.
+            unknown quantities. Can be arrays if you want to substitute multiple values. Species without a guess
+            default to the closed-form estimate of default_guess (evaluated at the guess for T, if T is solved for).
         normalize_to_H: bool, optional
             Whether to return abundances normalized by the number density of H nucleons (default: True)
         reduce_network: bool, optional
@@ -175,78 +490,484 @@ class Process:
         careful_steps: int, optional
             Number of careful initial steps in the Newton solve before full step size is used - try increasing this if
             your solve has trouble converging.
+        cse: bool, optional
+            Whether to eliminate common subexpressions (e.g. rate coefficients shared between species) from the
+            generated residual, so that each is evaluated once per iteration (default: True)
+        jacobian: str, optional
+            How to compute the Jacobian of the network in the Newton iteration: "symbolic" to generate the sparse
+            analytic Jacobian with sympy, or "autodiff" for forward-mode autodiff of the residual (default: "symbolic")
+        return_info: bool, optional
+            Whether to also return the per-point convergence information from newton_rootsolve (default: False)
+        iterations_per_round: int, optional
+            If specified, retire converged points every iterations_per_round iterations and keep iterating only the
+            rest, so that a few hard points do not hold up the whole batch (see newton_rootsolve)
+        shard: bool, optional
+            Whether to split the points across all available JAX devices (see newton_rootsolve, default: False)
+        tabulate: bool or dict, optional
+            Whether to interpolate every coefficient of the network that depends only on T (rate coefficients, cooling
+            functions, ...) from a log-T table instead of evaluating its closed form. Pass a dict to set the options of
+            pism.rate_tables.coefficient_table, e.g. {"T_range": (10, 1e9), "rtol": 1e-4} (default: False)
+        continuation: str, optional
+            Name of a known quantity, e.g. "T", along which to solve the points as a continuation sweep: each point is
+            started from the solution at its neighbour along this quantity rather than from its guess, except for one
+            anchor point per block of block_size points (see newton_rootsolve). This takes far fewer iterations for
+            finely sampled sweeps.
+        block_size: int, optional
+            Number of consecutive points of a continuation sweep solved from each anchor point (default: 256)
+        globalization: str, optional
+            None for plain Newton steps ramped up over careful_steps, or "linesearch" or "trust_region" to only take
+            steps that reduce the residual of the network (see newton_rootsolve, default: None)
+        precision: str, optional
+            Floating point precision of the solve: None for JAX's default float type (float32 unless x64 is enabled),
+            "float32", "float64", or "mixed" for float32 iterations on rescaled unknowns finished by up to
+            refinement_steps float64 Newton steps. float64 and mixed precision solutions are returned as float64 numpy
+            arrays (see newton_rootsolve, default: None)
+        refinement_steps: int, optional
+            Maximum number of float64 Newton steps in mixed precision (default: 3)
+        decompose: bool, optional
+            Whether to split the network into blocks of strongly coupled unknowns (see network_blocks) and solve them
+            one after another, each with the solutions of the blocks before it as known quantities, rather than all at
+            once. Each block converges to the relative tolerance tol in all of its unknowns (default: False).
+        passive: list, optional
+            Species whose feedback on the rest of the network is neglected, e.g. trace metals, which then no longer
+            contribute electrons or cooling to the solution for the other species and T (see with_passive)
+        variables: str, optional
+            Variables of the Newton iteration: "linear" for the number densities and T themselves, or "log" for their
+            logarithms, which keeps every abundance positive without clipping overshooting steps to 1e-37. In log
+            variables every unknown, including trace species, converges to the relative tolerance tol, rather than
+            only e-, H and T (see newton_rootsolve, default: "linear")
 
         Returns
         -------
         equilibrium_abundances: dict
             Dict of species and their equilibrium abundances relative to H or raw number densities (depending on
             value of normalize_to_H)
+        info: dict
+            Only returned if return_info is True: dict of per-point "num_iter", "converged" and "residual_norm", plus
+            the "table_report" of the coefficient table if tabulated (see pism.rate_tables.table_error_report). With
+            decompose and several blocks, num_iter is the total over the blocks, residual_norm the largest and
+            converged whether every block converged, and "blocks" lists the unknowns and info (including any
+            table_report) of each block.
         """
-        if "T" in known_quantities:
-            thermo = False  # do a chemistry solve with T fixed
-            if reduce_network:
-                network_tosolve = self.reduced_network
-            else:
-                network_tosolve = self.network
-        else:
-            thermo = True  # solve for equilibrium T as well
-            network_tosolve = self.get_thermochem_network(reduced=reduce_network)
+        thermo = "T" not in known_quantities  # if T is not known, solve for equilibrium T as well
+        system = self.with_passive(passive) if passive else self
+        with instrumentation.phase("reduction"):
+            network_tosolve = system.network_to_solve(known_quantities, reduce_network)
+            blocks = system.network_blocks(thermo, reduce_network) if decompose else [list(network_tosolve)]
 
-        self.do_solver_value_checks(known_quantities, guess)
-
-        #        for k in known_quantities:
-        #            if k in
+        with instrumentation.phase("guess"):
+            guess = system.complete_guess(known_quantities, guess, network_tosolve, input_abundances)
+        system.do_solver_value_checks(known_quantities, guess)
 
         # need to implement broadcasting between knowns and guesses...
         # can supply just the species names, will convert to the number density symbol if necessary
-        unknowns = [sp.Symbol(f"n_{i}") for i in self.reduced_network]
-        if thermo:
-            unknowns.append("T")
         known_variables = [sp.Symbol(k) if isinstance(k, str) else k for k in known_quantities]
+        params = list(known_quantities.values())
+        if continuation is not None:
+            continuation = [str(k) for k in known_quantities].index(str(continuation))
 
-        func = sp.lambdify(
-            unknowns + known_variables, list(network_tosolve.values()), modules="jax"
-        )  # , dummify=True)
+        # jax is only imported once we actually solve, so that the symbolic API stays cheap to import
+        from .numerics import newton_rootsolve
+        from .kernels import solver_kernels
 
-        @jax.jit
-        def f_numerical(X, *params):
-            """JAX function to rootfind"""
-            return jnp.array(func(*X, *params))
+        solution, infos = {}, []
+        for block in blocks:
+            unknowns = [decomposition.unknown_symbol(i) for i in block]
+            # We also specify a function of the parameters to use for our stopping criterion:
+            # converge electron and H abundance to desired tolerance.
+            tolerance_vars = [system.apply_network_reductions(n_(s)) for s in ("e-", "H") if s in system.network]
+            if decompose:  # only those determined by this block
+                solved = set(known_variables) | set(unknowns)
+                tolerance_vars = [v for v in tolerance_vars if v.free_symbols <= solved and v.has(*unknowns)]
+            # species that those do not depend on (all of them in blocks without e- or H, and passive species) are
+            # converged individually down to a floor, so that vanishing abundances cannot hold up convergence
+            unchecked = [u for u in unknowns if u != sp.Symbol("T") and not any(v.has(u) for v in tolerance_vars)]
+            if tolerance_vars:
+                unchecked = [u for u in unchecked if str(u)[2:] in system.passive_species]
+            floor = TOLERANCE_FLOOR * sp.Add(*unchecked)
+            tolerance_vars += [u + floor for u in unchecked]
+            tolerance_vars = tolerance_vars or [u for u in unknowns if u != sp.Symbol("T")]
+            if sp.Symbol("T") in unknowns:
+                tolerance_vars += [sp.Symbol("T")]
 
-        # We also specify a function of the parameters to use for our stopping criterion:
-        # converge electron and H abundance to desired tolerance.
-        tolerance_vars = [self.apply_network_reductions(n_("e-")), n_("H")]
-        if thermo:
-            tolerance_vars += [sp.Symbol("T")]
-        tolfunc = sp.lambdify(unknowns + known_variables, tolerance_vars, modules="jax")
-
-        @jax.jit
-        def tolerance_func(X, *params):
-            """Solution will terminate if the relative change in this quantity is < tol"""
-            return jnp.array(tolfunc(*X, *params))
-
-        guesses = []
-        for i in network_tosolve:
-            guesses.append(guess[i])
-            if input_abundances and i in self.network:
-                guesses[-1] *= known_quantities["n_Htot"]  # convert to density
-        guesses = jnp.array(guesses).T
+            # lambdified + jitted kernels are cached on the structure of the network, so repeated solves of the same
+            # system skip lambdify and reuse JAX's compiled solver
+            with instrumentation.phase("kernels"):
+                kernels = solver_kernels(
+                    [network_tosolve[i] for i in block],
+                    unknowns,
+                    known_variables,
+                    tolerance_vars,
+                    options=kernel_options(cse, jacobian, tabulate),
+                )
+
+            guesses = []
+            for i in block:
+                if input_abundances and i in system.network:
+                    guesses.append(guess[i] * known_quantities["n_Htot"])  # convert to density without touching guess
+                else:
+                    guesses.append(guess[i])
+            # kept in numpy until newton_rootsolve, which converts them to the precision of the solve
+            X, info = newton_rootsolve(
+                kernels.func,
+                stack_columns(guesses),
+                stack_columns(params),
+                jacfunc=kernels.jacfunc,
+                tolfunc=kernels.tolfunc,
+                rtol=tol,
+                careful_steps=careful_steps,
+                return_info=True,
+                iterations_per_round=iterations_per_round,
+                shard=shard,
+                continuation_axis=continuation,
+                block_size=block_size,
+                globalization=globalization,
+                precision=precision,
+                refinement_steps=refinement_steps,
+                variables=variables,
+            )
+            if kernels.table_report is not None:
+                info["table_report"] = kernels.table_report
+            infos.append(info)
+            # the solution of each block is a known quantity of the blocks after it
+            solution |= {species: X[:, i] for i, species in enumerate(block)}
+            known_variables = known_variables + unknowns
+            params = params + [X[:, i] for i in range(len(block))]
+
+        # get solution into dict form
+        sol = {species: solution[species] for species in network_tosolve}
+        with instrumentation.phase("restore"):
+            sol = system.restore_eliminated_species(sol, known_quantities, output_abundances)
+        if return_info:
+            return sol, infos[0] if len(infos) == 1 else combine_block_info(blocks, infos)
+        return sol
+
+    def network_blocks(self, thermo=False, reduced=True, passive=None):
+        """Returns the decomposition of the network solved by steadystate into blocks of strongly coupled unknowns, in
+        an order in which they can be solved one after another (see pism.decomposition.network_blocks), cached until
+        the network changes
+
+        Parameters
+        ----------
+        thermo: bool, optional
+            Whether T is an unknown, with the heating rate as its equation (default: False)
+        reduced: bool, optional
+            Whether to decompose the reduced network (default: True)
+        passive: list, optional
+            Species to make passive (see with_passive) before decomposing the network
+
+        Returns
+        -------
+        blocks: list
+            Lists of unknowns (species, or "T"), each only depending on itself and the blocks before it
+        """
+        if passive:
+            return self.with_passive(passive).network_blocks(thermo, reduced)
+        cache = self.reduction_cache().setdefault("network_blocks", {})
+        if (thermo, reduced) not in cache:
+            if thermo:
+                network = self.get_thermochem_network(reduced=reduced)
+            else:
+                network = self.reduced_network if reduced else self.network
+            cache[thermo, reduced] = decomposition.network_blocks(network)
+        return [list(block) for block in cache[thermo, reduced]]
+
+    def with_passive(self, passive):
+        """Returns a copy of the process in which the given species are passive: their feedback on the rest of the
+        network is neglected, cached until the network changes
+
+        Passive species are set to 0 in the rate equations of every species not sharing an element with them and in
+        the heating rate (see pism.decomposition.passive_network), and left out of the charge conservation law. Trace
+        metals made passive thus respond to the electron density and temperature set by H and He without contributing
+        electrons or cooling, so that they decouple into blocks of their own (see network_blocks).
+
+        Parameters
+        ----------
+        passive: list
+            Names of the passive species
+
+        Returns
+        -------
+        process: Process
+            The process with passive species
+        """
+        passive = tuple(s for s in passive if s in self.network)
+        cache = self.reduction_cache().setdefault("passive", {})
+        if passive not in cache:
+            process = Process(name=self.name)
+            process.network.update(decomposition.passive_network(self.network, passive))
+            process.heat = decomposition.passive_network({"T": self.heat}, passive)["T"]
+            process.dust_heat = self.dust_heat
+            process.passive_species = tuple(self.passive_species) + passive
+            cache[passive] = process
+        return cache[passive]
+
+    def network_to_solve(self, known_quantities, reduce_network=True):
+        """Returns the network of rate equations that steadystate solves: the chemistry network if T is among the known
+        quantities, and the thermochemical network (including the heating rate as the equation for T) otherwise"""
+        if "T" in known_quantities:
+            return self.reduced_network if reduce_network else self.network
+        return self.get_thermochem_network(reduced=reduce_network)
+
+    def steadystate_function(self, known_quantities, guess=None, input_abundances=True, **kwargs):
+        """
+        Returns steadystate as a differentiable JAX function of the values of the known quantities, for sensitivity
+        analysis with jax.jvp, jax.grad, jax.jacfwd, etc. Derivatives of the solution are computed from the implicit
+        function theorem at the converged root (see pism.numerics.implicit_root), not by differentiating through the
+        Newton iterations.
+
+        Any symbol of the network can be a known quantity, so besides T, n_Htot and Y, sensitivities to e.g. a rate
+        coefficient are obtained by leaving it as a symbol in the rate expressions and passing its values here.
+
+        Parameters
+        ----------
+        known_quantities: dict
+            Known quantities as in steadystate. Their values set the guesses and the shape of the inputs of the
+            returned function.
+        guess: dict, optional
+            Guesses as in steadystate, completed with default_guess at the known_quantities if needed
+        input_abundances: bool, optional
+            Whether the guesses are abundances relative to H (default: True)
+        **kwargs:
+            Further options of steadystate. The solve must use the default iteration strategy in JAX's default float
+            type, so continuation, iterations_per_round, shard and precision other than "float32" are not supported.
+
+        Returns
+        -------
+        solve: callable
+            Function of a dict of values of the known quantities (with the same keys as known_quantities) returning the
+            dict of equilibrium abundances or number densities, as steadystate
+        """
+        for option in ("continuation", "iterations_per_round", "shard", "return_info"):
+            if kwargs.get(option):
+                raise ValueError(f"steadystate_function does not support the {option} option.")
+        if kwargs.get("precision") not in (None, "float32"):
+            raise ValueError("steadystate_function only supports float32 or JAX's default float type.")
+        network_tosolve = self.network_to_solve(known_quantities, kwargs.get("reduce_network", True))
+        guess = self.complete_guess(known_quantities, guess, network_tosolve, input_abundances)
+
+        def solve(known_values):
+            return self.steadystate(known_values, guess, input_abundances=input_abundances, **kwargs)
+
+        return solve
+
+    def steadystate_jvp(self, known_quantities, tangents, guess=None, **kwargs):
+        """
+        Solves for equilibrium and returns the directional derivative of the solution along the given changes of the
+        known quantities, in the same pass
+
+        Parameters
+        ----------
+        known_quantities: dict
+            Known quantities as in steadystate
+        tangents: dict
+            Changes of some of the known quantities, e.g. {"T": 0.01 * T} for a 1% change of T. Quantities left out do
+            not change.
+        guess: dict, optional
+            Guesses as in steadystate
+        **kwargs:
+            Further options of steadystate (see steadystate_function)
+
+        Returns
+        -------
+        sol: dict
+            Equilibrium abundances, as returned by steadystate
+        tangent_sol: dict
+            Derivatives of the equilibrium abundances along tangents
+        """
+        import jax, jax.numpy as jnp
+
+        values = {k: jnp.asarray(v) for k, v in known_quantities.items()}
+        tangents = {
+            k: jnp.asarray(tangents[k], dtype=v.dtype) if k in tangents else jnp.zeros_like(v)
+            for k, v in values.items()
+        }
+        solve = self.steadystate_function(known_quantities, guess, **kwargs)
+        return jax.jvp(solve, (values,), (tangents,))
+
+    def steadystate_sensitivities(self, known_quantities, guess=None, wrt=None, **kwargs):
+        """
+        Solves for equilibrium and returns the derivatives of the solution at each point with respect to each known
+        quantity at that point, from a single solve (linearized once, then one linear solve per point and quantity)
+
+        Parameters
+        ----------
+        known_quantities: dict
+            Known quantities as in steadystate
+        guess: dict, optional
+            Guesses as in steadystate
+        wrt: list, optional
+            Known quantities to differentiate with respect to (default: all of them)
+        **kwargs:
+            Further options of steadystate (see steadystate_function)
+
+        Returns
+        -------
+        sol: dict
+            Equilibrium abundances, as returned by steadystate
+        sensitivities: dict
+            Dict of dicts such that sensitivities[species][quantity] is the array of derivatives of the abundance of
+            species (or T) with respect to the known quantity at each point
+        """
+        import jax, jax.numpy as jnp
+
+        values = {k: jnp.asarray(v) for k, v in known_quantities.items()}
+        sol, linearized = jax.linearize(self.steadystate_function(known_quantities, guess, **kwargs), values)
+        sensitivities = {species: {} for species in sol}
+        for quantity in known_quantities if wrt is None else wrt:
+            tangent = {k: jnp.ones_like(v) if k == quantity else jnp.zeros_like(v) for k, v in values.items()}
+            for species, derivative in linearized(tangent).items():
+                sensitivities[species][quantity] = derivative
+        return sol, sensitivities
+
+    def evolve(
+        self,
+        known_quantities,
+        initial,
+        dt,
+        input_abundances=True,
+        output_abundances=True,
+        reduce_network=True,
+        method="ros2",
+        rtol=1e-4,
+        atol=1e-10,
+        first_step=None,
+        max_steps=10**4,
+        cse=True,
+        jacobian="symbolic",
+        tabulate=False,
+        return_info=False,
+    ):
+        """
+        Advances the network over a time interval, independently for each point, e.g. each cell of a simulation
+
+        Parameters
+        ----------
+        known_quantities: dict
+            Dict of symbolic quantities and their values that are held fixed over the time interval, as in steadystate.
+            If T is included here, only the chemistry is evolved. If T is not included, T is evolved as well.
+        initial: dict
+            Dict of the initial values of the evolved quantities, in the same form as guess in steadystate
+        dt: float or array_like
+            Time interval in s, either the same for all points or an array of per-point values
+        input_abundances: bool, optional
+            Whether the initial values of species are abundances relative to H rather than number densities
+            (default: True)
+        output_abundances: bool, optional
+            Whether to return abundances relative to H rather than number densities (default: True)
+        reduce_network: bool, optional
+            Whether to evolve the reduced version of the network substituting conservation laws (default: True)
+        method: str, optional
+            Integration method: "ros2" for a 2nd-order Rosenbrock method or "backward_euler" (see
+            pism.numerics.integrate, default: "ros2")
+        rtol: float, optional
+            Relative tolerance on the local error of each substep (default: 1e-4)
+        atol: float, optional
+            Absolute tolerance on the local error of each substep, in abundance relative to H (default: 1e-10)
+        first_step: float or array_like, optional
+            Size of the first substep attempted - defaults to dt
+        max_steps: int, optional
+            Maximum number of substeps per point (default: 10**4)
+        cse: bool, optional
+            Whether to eliminate common subexpressions from the generated kernels (default: True)
+        jacobian: str, optional
+            "symbolic" or "autodiff", as in steadystate (default: "symbolic")
+        tabulate: bool or dict, optional
+            Whether to interpolate the T-dependent coefficients from a table, as in steadystate (default: False)
+        return_info: bool, optional
+            Whether to also return the per-point integration information from pism.numerics.integrate
+            (default: False)
+
+        Returns
+        -------
+        state: dict
+            Dict of species and their abundances relative to H or raw number densities (depending on value of
+            output_abundances) at the end of the interval, plus T if it was evolved
+        info: dict
+            Only returned if return_info is True: dict of per-point "num_steps", "num_rejected" and "success"
+        """
+        thermo = "T" not in known_quantities
+        network_toevolve = self.time_derivatives(thermo=thermo, reduced=reduce_network)
+        self.do_solver_value_checks(known_quantities, initial)
+
+        unknowns = [sp.Symbol("T") if s == "T" else n_(s) for s in network_toevolve]
+        known_variables = [sp.Symbol(k) if isinstance(k, str) else k for k in known_quantities]
+        import jax.numpy as jnp
+        from .numerics import integrate
+        from .kernels import solver_kernels
+
+        kernels = solver_kernels(
+            list(network_toevolve.values()),
+            unknowns,
+            known_variables,
+            unknowns,
+            options=kernel_options(cse, jacobian, tabulate),
+        )
+
+        nHtot = known_quantities["n_Htot"]
+        X0, atols = [], []
+        for i in network_toevolve:
+            if i == "T":
+                X0.append(initial[i])
+                atols.append(np.zeros_like(nHtot))
+            else:
+                X0.append(initial[i] * nHtot if input_abundances else initial[i])
+                atols.append(atol * np.asarray(nHtot))
         params = jnp.array(list(known_quantities.values())).T
-        sol = newton_rootsolve(
-            f_numerical, guesses, params, tolfunc=tolerance_func, rtol=tol, careful_steps=careful_steps
+        X, info = integrate(
+            kernels.func,
+            jnp.array(X0).T,
+            dt,
+            params,
+            jacfunc=kernels.jacfunc,
+            method=method,
+            rtol=rtol,
+            atol=jnp.array(atols).T,
+            first_step=first_step,
+            max_steps=max_steps,
+            nonnegative=True,
+            return_info=True,
         )
 
-        # get solution into dict form
-        sol = {species: sol[:, i] for i, species in enumerate(network_tosolve)}
-        # now get the missing species that we eliminated - this needs to be generalized...
+        state = {species: X[:, i] for i, species in enumerate(network_toevolve)}
+        if reduce_network:
+            state = self.restore_eliminated_species(state, known_quantities, output_abundances)
+        elif output_abundances:
+            state = {s: x if s == "T" else x / nHtot for s, x in state.items()}
+        if return_info:
+            return state, info
+        return state
+
+    def restore_eliminated_species(self, sol, known_quantities, output_abundances=True):
+        """Reconstructs the species eliminated from the reduced network by conservation laws
+
+        Parameters
+        ----------
+        sol: dict
+            Dict of number densities of the species in the reduced network (and T, if solved for)
+        known_quantities: dict
+            Dict of known quantities, including n_Htot and the element totals of the conservation laws (Y for He,
+            x_<element> for other elements). Eliminated species whose expression needs a missing total are left out.
+        output_abundances: bool, optional
+            Whether to convert all number densities to abundances relative to H (default: True)
+
+        Returns
+        -------
+        sol: dict
+            The input dict with the eliminated species added
+        """
         nHtot = known_quantities["n_Htot"]
-        sol["H+"] = nHtot - sol["H"]
-        sol["e-"] = sol["H+"]
-        if "Y" in known_quantities:
-            Y = known_quantities["Y"]
-            y = Y / (4 - 4 * Y)
-            sol["He++"] = y * nHtot - sol["He"] - sol["He+"]
-            sol["e-"] += 2 * sol["He++"] + sol["He+"]
+        values = {sp.Symbol(str(k)): v for k, v in known_quantities.items()}
+        values |= {sp.Symbol("T") if s == "T" else n_(s): x for s, x in sol.items()}
+        cache = self.reduction_cache().setdefault("restore_functions", {})
+        for symbol, expr in self.resolved_reduction_replacements.items():
+            if not expr.free_symbols <= set(values):  # e.g. the He species if Y is not known
+                continue
+            if symbol not in cache:
+                args = sorted(expr.free_symbols, key=str)
+                cache[symbol] = args, sp.lambdify(args, expr, "numpy")  # plain arithmetic, so JAX tracers pass through
+            args, function = cache[symbol]
+            sol[str(symbol)[2:]] = function(*(values[a] for a in args))
 
         if output_abundances:
             for species, n in sol.items():
@@ -254,6 +975,191 @@ class Process:
                     sol[species] = n / nHtot
         return sol
 
+    def complete_guess(self, known_quantities, guess, unknowns, input_abundances=True):
+        """Returns a copy of guess with the default_guess estimates filled in for the unknowns it does not cover"""
+        guess = dict(guess or {})
+        missing = [s for s in unknowns if s not in guess]
+        if not missing:
+            return guess
+        if "T" in missing:
+            raise ValueError("A guess for T is needed to solve for thermochemical equilibrium.")
+        defaults = self.default_guess(known_quantities, T=guess.get("T"), input_abundances=input_abundances)
+        unrecognized = [s for s in missing if s not in defaults]
+        if unrecognized:
+            raise ValueError(f"No default guess available for {', '.join(unrecognized)}: please supply one.")
+        return guess | {s: defaults[s] for s in missing}
+
+    def default_guess(self, known_quantities, T=None, input_abundances=True):
+        """Returns cheap closed-form estimates of the abundances of the recognized species, to be used as guesses
+
+        For each element with a conservation law and known total abundance (H, He if Y is known, and any other element
+        if its abundance x_<element> relative to H is), the fractions in consecutive ionization states are set by the
+        ratio of the ionization rate of one state to the recombination rate of the next, read off the network with all
+        other species set to 0 and n_e- = n_Htot. For collisional processes n_e- cancels and this is exactly coronal
+        (collisional ionization) equilibrium.
+
+        Parameters
+        ----------
+        known_quantities: dict
+            Dict of known quantities as in steadystate, including n_Htot and optionally Y
+        T: array_like, optional
+            Temperature at which to evaluate the rates, if T is not among known_quantities
+        input_abundances: bool, optional
+            Whether to return abundances relative to H rather than number densities (default: True)
+
+        Returns
+        -------
+        guess: dict
+            Dict of species and their estimated abundances or number densities. Species of elements whose total
+            abundance is not known, and the species of incomplete ionization sequences, are left out.
+        """
+        known = {sp.Symbol(k) if isinstance(k, str) else k: np.asarray(v) for k, v in known_quantities.items()}
+        if T is not None:
+            known[sp.Symbol("T")] = np.asarray(T)
+        if sp.Symbol("T") not in known:
+            raise ValueError("A temperature is needed to estimate the default guesses.")
+        nHtot = known[sp.Symbol("n_Htot")]
+        shape = np.broadcast_shapes(*(np.shape(v) for v in known.values()))
+        guess = {}
+        for law in self.conservation_laws:
+            total = law.total / sp.Symbol("n_Htot")  # per H nucleon
+            if law.name == "charge" or not total.free_symbols <= set(known):
+                continue
+            args = sorted(total.free_symbols, key=str)
+            total = np.broadcast_to(sp.lambdify(args, total, "numpy")(*(known[a] for a in args)), shape)
+            atomic = (s for s in law.coefficients if conservation.species_composition(s) == {law.name: 1})
+            stages = sorted(atomic, key=species_charge)  # the ionization sequence, leaving out molecules
+            if [species_charge(s) for s in stages] != list(range(len(stages))):
+                continue
+            log_fractions = [np.zeros(shape)]
+            for lower, upper in zip(stages[:-1], stages[1:]):
+                ionization = sp.diff(self.network[upper], n_(lower))
+                recombination = sp.diff(self.network[lower], n_(upper))
+                ratio = [rate_estimate(rate, known, nHtot, shape) for rate in (ionization, recombination)]
+                if any(r is None for r in ratio):
+                    break
+                log_fractions.append(log_fractions[-1] + np.log(ratio[0]) - np.log(ratio[1]))
+            else:
+                log_fractions = np.array(log_fractions)
+                fractions = np.exp(log_fractions - log_fractions.max(axis=0))
+                fractions /= fractions.sum(axis=0)
+                for species, fraction in zip(stages, fractions):
+                    guess[species] = total * fraction if input_abundances else total * fraction * nHtot
+        return guess
+
+    def steadystate_chunks(self, known_quantities, guess=None, chunk_size=2**16, **kwargs):
+        """
+        Solves for equilibrium over a large set of inputs in fixed-size chunks, yielding the solution for each chunk as
+        soon as it is available. Peak memory is set by chunk_size rather than the total number of points.
+
+        Each chunk is dispatched to JAX asynchronously before the previous one is returned, so the next chunk's inputs
+        are read and prepared while the solver is busy. Chunks are padded to chunk_size so that they all share one
+        compiled solver.
+
+        Parameters
+        ----------
+        known_quantities: dict or iterable
+            Either a dict of known quantities as in steadystate, whose arrays (e.g. memory-mapped .npy files) are
+            sliced chunk by chunk, or an iterable of (known_quantities, guess) pairs of dicts that each describe a
+            chunk of points.
+        guess: dict, optional
+            Dict of guesses as in steadystate, if known_quantities is a dict
+        chunk_size: int, optional
+            Number of points solved at a time (default: 2**16)
+        **kwargs:
+            Further keyword arguments are passed to steadystate
+
+        Yields
+        ------
+        indices: slice
+            Range of the input points covered by this chunk
+        solution: dict
+            Dict of species and their equilibrium abundances, as numpy arrays
+        """
+        kwargs.pop("return_info", None)
+        pending = None
+        for indices, known_chunk, guess_chunk in iterate_chunks(known_quantities, guess, chunk_size):
+            num_points = indices.stop - indices.start
+            known_chunk = {k: pad_to_length(v, chunk_size) for k, v in known_chunk.items()}
+            guess_chunk = {k: pad_to_length(v, chunk_size) for k, v in guess_chunk.items()}
+            sol = self.steadystate(known_chunk, guess_chunk, **kwargs)  # dispatched asynchronously
+            if pending is not None:
+                yield finalize_chunk(*pending)
+            pending = indices, sol, num_points
+        if pending is not None:
+            yield finalize_chunk(*pending)
+
+    def steadystate_to_npy(self, path, known_quantities, guess=None, num_points=None, chunk_size=2**16, **kwargs):
+        """
+        Solves for equilibrium chunk by chunk (see steadystate_chunks), writing the solution straight to a
+        memory-mapped .npy file instead of holding it in memory.
+
+        Parameters
+        ----------
+        path: str
+            Path of the .npy file to write. It holds a structured array with one float field per species, so it can be
+            read back with e.g. np.load(path, mmap_mode="r")["H"].
+        known_quantities: dict or iterable
+            Known quantities as in steadystate_chunks
+        guess: dict, optional
+            Dict of guesses, if known_quantities is a dict
+        num_points: int, optional
+            Total number of points - only required if known_quantities is an iterable of chunks
+        chunk_size: int, optional
+            Number of points solved at a time (default: 2**16)
+        **kwargs:
+            Further keyword arguments are passed to steadystate
+
+        Returns
+        -------
+        out: numpy.memmap
+            The memory-mapped structured array of solutions
+        """
+        if num_points is None:
+            if not isinstance(known_quantities, dict):
+                raise ValueError("num_points must be given when known_quantities is an iterable of chunks.")
+            num_points = len(next(iter(known_quantities.values())))
+
+        out = None
+        for indices, sol in self.steadystate_chunks(known_quantities, guess, chunk_size, **kwargs):
+            if out is None:
+                dtype = [(species, x.dtype) for species, x in sol.items()]
+                out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(num_points,))
+            for species, x in sol.items():
+                out[species][indices] = x
+        if out is not None:
+            out.flush()
+        return out
+
+    def equilibrium_table(self, axes, guess, fixed=None, tol=0.01, **kwargs):
+        """
+        Builds a table of equilibrium abundances and the net cooling function (or the equilibrium T, if T is solved
+        for) over a grid of known quantities, refined adaptively where the solution changes quickly, for fast
+        interpolated lookups afterwards.
+
+        Parameters
+        ----------
+        axes: dict
+            Dict mapping each known quantity that varies across the table to a 1D array of initial grid points, e.g.
+            {"T": np.logspace(1, 9, 17), "n_Htot": np.logspace(-4, 4, 9)}
+        guess: dict
+            Dict of guesses for the abundances of the unknowns, and for T if it is solved for, as in steadystate
+        fixed: dict, optional
+            Dict of known quantities held fixed across the table, e.g. {"Y": 0.24}
+        tol: float, optional
+            Maximum tolerated interpolation error of the tabulated fields at interval midpoints, in dex (default: 0.01)
+        **kwargs:
+            Further keyword arguments are passed to pism.tables.build_equilibrium_table and from there to steadystate
+
+        Returns
+        -------
+        table: pism.tables.EquilibriumTable
+            The table, which can be saved to disk and queried with table.query or a jittable table.query_function
+        """
+        from .tables import build_equilibrium_table
+
+        return build_equilibrium_table(self, axes, guess, fixed=fixed, tol=tol, **kwargs)
+
     def do_solver_value_checks(self, known_quantities, guess):
         if not isinstance(known_quantities, dict):
             raise ValueError("known_quantities argument to chemical_equilibrium must be a dictionary.")
@@ -265,3 +1171,98 @@ class Process:
             lengths += [len(g) for g in guess.values()]
         if not all([l == lengths[0] for l in lengths]):
             raise ValueError("All known quantities and guesses must be arrays of equal length.")
+
+
+def kernel_options(cse, jacobian, tabulate):
+    """Code generation options passed to solver_kernels by the solvers"""
+    options = {"cse": cse, "jacobian": jacobian}
+    if tabulate:
+        from .rate_tables import table_options
+
+        options["tabulate"] = table_options(tabulate)
+    return options
+
+
+def iterate_chunks(known_quantities, guess, chunk_size):
+    """Splits solver inputs into chunks of at most chunk_size points
+
+    Parameters
+    ----------
+    known_quantities: dict or iterable
+        Dict of arrays, or an iterable of (known_quantities, guess) pairs of dicts of arrays
+    guess: dict or None
+        Dict of arrays of guesses, if known_quantities is a dict
+    chunk_size: int
+        Maximum number of points in a chunk
+
+    Yields
+    ------
+    indices: slice
+        Range of the input points covered by the chunk
+    known_chunk, guess_chunk: dict
+        Dicts of numpy arrays for the chunk
+    """
+    if isinstance(known_quantities, dict):
+        chunks = [(known_quantities, guess or {})]
+    else:
+        chunks = known_quantities
+
+    start = 0
+    for known, guesses in chunks:
+        guesses = guesses or {}
+        length = len(next(iter(known.values())))
+        for i in range(0, length, chunk_size):
+            stop = min(i + chunk_size, length)
+            known_chunk = {k: np.asarray(v[i:stop]) for k, v in known.items()}
+            guess_chunk = {k: np.asarray(v[i:stop]) for k, v in guesses.items()}
+            yield slice(start + i, start + stop), known_chunk, guess_chunk
+        start += length
+
+
+def rate_estimate(rate, known, nHtot, shape):
+    """Evaluates a rate with the species other than e- set to 0 and n_e- = n_Htot, floored at a tiny positive value,
+    or returns None if it depends on unknown symbols"""
+    rate = sp.sympify(rate)
+    rate = rate.xreplace(
+        {s: 0 for s in rate.free_symbols if str(s).startswith("n_") and s not in known and s != n_("e-")}
+    )
+    rate = rate.xreplace({n_("e-"): sp.Symbol("n_Htot")})
+    if not rate.free_symbols <= set(known):
+        return None
+    args = sorted(rate.free_symbols, key=str)
+    with np.errstate(all="ignore"):
+        value = sp.lambdify(args, rate, "numpy")(*(known[a] for a in args))
+    return np.maximum(np.nan_to_num(np.broadcast_to(value, shape), nan=0.0), 1e-300)
+
+
+def stack_columns(columns):
+    """Stacks per-point columns into a shape (N, num_columns) float64 numpy array, or into a JAX array if any of them
+    is being traced by JAX, so that steadystate stays differentiable with respect to the known quantities"""
+    import jax
+
+    if any(isinstance(c, jax.core.Tracer) for c in columns):
+        return jax.numpy.stack([jax.numpy.asarray(c) for c in columns], axis=1)
+    return np.array(columns, dtype=np.float64).T
+
+
+def combine_block_info(blocks, infos):
+    """Combines the convergence information of the blocks of a decomposed solve into that of the whole solve"""
+    import jax.numpy as jnp
+
+    info = {
+        "num_iter": sum(i["num_iter"] for i in infos),
+        "converged": jnp.all(jnp.stack([i["converged"] for i in infos]), axis=0),
+        "residual_norm": jnp.max(jnp.stack([i["residual_norm"] for i in infos]), axis=0),
+        "blocks": [{"unknowns": block, **i} for block, i in zip(blocks, infos)],
+    }
+    return info
+
+
+def pad_to_length(x, length):
+    """Pads an array along its first axis to the given length by repeating its last element"""
+    return np.pad(x, [(0, length - len(x))] + [(0, 0)] * (np.ndim(x) - 1), mode="edge")
+
+
+def finalize_chunk(indices, sol, num_points):
+    """Waits for a chunk's solution and trims off the padding"""
+    return indices, {species: np.asarray(x)[:num_points] for species, x in sol.items()}
@@ -1,7 +1,23 @@
 from ..process import *
 from .nbody_process import *
-from .thermal_process import *
 from .freefree_emission import *
-from .line_cooling import *
-from .ionization import *
-from .recombination import *
+from . import ionization, recombination, line_cooling, thermal_process as _thermal_process
+
+_LAZY_MODULES = (ionization, recombination, line_cooling, _thermal_process)
+
+# star-imports of these modules would build their lazy attributes, so only the names already built are imported here
+for _module in _LAZY_MODULES:
+    globals().update({name: getattr(_module, name) for name in _module.__all__ if name in vars(_module)})
+
+__all__ = [name for name in globals() if not name.startswith("_")]
+__all__ += [name for module in _LAZY_MODULES for name in module.__all__ if name not in __all__]
+
+
+def __getattr__(name):
+    """Forwards the lazily-built module-level rate tables and process instances of the submodules"""
+    for module in _LAZY_MODULES:
+        try:
+            return getattr(module, name)
+        except AttributeError:
+            continue
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
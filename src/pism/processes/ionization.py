@@ -1,10 +1,17 @@
 """Implementation of ionization process"""
 
+from functools import cache
 from ..process import Process
-from ..misc import ionize
-from ..symbols import T, T5, T3, T6, n_e, n_
+from ..misc import ionize, lazy_attributes
+from ..symbols import T, T5, n_e, n_, eV
 import sympy as sp
-from astropy import units as u
+
+__all__ = [
+    "Ionization",
+    "ionization_energy",
+    "collisional_ionization_fits",
+    "CollisionalIonization",
+]
 
 
 class Ionization(Process):
@@ -45,24 +52,40 @@ class Ionization(Process):
         self.network["e-"] += self.rate
 
 
-def ionization_energy(species, unit=u.erg):
-    """Return the energy in erg required to ionize a species"""
+def ionization_energy(species, unit=None):
+    """Return the energy required to ionize a species, in erg or in the given astropy unit"""
     # NOTE: come back and get this from a proper datafile
     energies_eV = {"H": 13.6, "He": 24.59, "He+": 54.42}
-    return energies_eV[species] * u.eV.to(unit)
+    if unit is None:
+        return energies_eV[species] * eV
+    from astropy import units as u  # only needed for unit conversions, and slow to import
 
+    return energies_eV[species] * u.eV.to(unit)
 
-collisional_ionization_cooling_rates = {
-    "H": 1.27e-21 * sp.sqrt(T) * sp.exp(-157809.1 / T) / (1 + sp.sqrt(T5)),  # 1996ApJS..105...19K
-    "He": 9.38e-22 * sp.sqrt(T) * sp.exp(-285335.4 / T) / (1 + sp.sqrt(T5)),  # 1996ApJS..105...19K
-    "He+": 4.95e-22 * sp.sqrt(T) * sp.exp(-631515 / T) / (1 + sp.sqrt(T5)),  # 1996ApJS..105...19K
-}
 
-collisional_ionization_rates = {
-    "H": 5.85e-11 * sp.sqrt(T) * sp.exp(-157809.1 / T) / (1 + sp.sqrt(T5)),  # 1996ApJS..105...19K
-    "He": 2.38e-11 * sp.sqrt(T) * sp.exp(-285335.4 / T) / (1 + sp.sqrt(T5)),  # 1996ApJS..105...19K
-    "He+": 5.68e-12 * sp.sqrt(T) * sp.exp(-631515 / T) / (1 + sp.sqrt(T5)),  # 1996ApJS..105...19K
+@cache
+def collisional_ionization_fits():
+    """Returns the dicts of collisional ionization rate coefficients and cooling rate coefficients, built on first
+    use"""
+    rates = {
+        "H": 5.85e-11 * sp.sqrt(T) * sp.exp(-157809.1 / T) / (1 + sp.sqrt(T5)),  # 1996ApJS..105...19K
+        "He": 2.38e-11 * sp.sqrt(T) * sp.exp(-285335.4 / T) / (1 + sp.sqrt(T5)),  # 1996ApJS..105...19K
+        "He+": 5.68e-12 * sp.sqrt(T) * sp.exp(-631515 / T) / (1 + sp.sqrt(T5)),  # 1996ApJS..105...19K
+    }
+    cooling_rates = {
+        "H": 1.27e-21 * sp.sqrt(T) * sp.exp(-157809.1 / T) / (1 + sp.sqrt(T5)),  # 1996ApJS..105...19K
+        "He": 9.38e-22 * sp.sqrt(T) * sp.exp(-285335.4 / T) / (1 + sp.sqrt(T5)),  # 1996ApJS..105...19K
+        "He+": 4.95e-22 * sp.sqrt(T) * sp.exp(-631515 / T) / (1 + sp.sqrt(T5)),  # 1996ApJS..105...19K
+    }
+    return rates, cooling_rates
+
+
+_LAZY_ATTRIBUTES = {
+    "collisional_ionization_rates": lambda: collisional_ionization_fits()[0],
+    "collisional_ionization_cooling_rates": lambda: collisional_ionization_fits()[1],
 }
+__getattr__ = lazy_attributes(__name__, _LAZY_ATTRIBUTES)
+__all__ += list(_LAZY_ATTRIBUTES)  # so that star-imports include them
 
 
 def CollisionalIonization(species=None) -> Ionization:
@@ -79,16 +102,17 @@ def CollisionalIonization(species=None) -> Ionization:
         `Ionization` instance describing the collisional ionization process
     """
 
+    rates, _ = collisional_ionization_fits()
     if species is None:
-        return sum([CollisionalIonization(s) for s in collisional_ionization_rates], Process())
+        return Process.compose(CollisionalIonization(s) for s in rates)
 
     process = Ionization(species)
     process.name = f"Collisional Ionization of {species}"
     nprod = n_(species) * n_e
 
-    if species not in collisional_ionization_rates:
+    if species not in rates:
         raise NotImplementedError(f"{species} does not have an available collisional ionization coefficient.")
-    process.rate = collisional_ionization_rates[species] * nprod
+    process.rate = rates[species] * nprod
     process.heat = -process.ionization_energy * process.rate
 
     return process
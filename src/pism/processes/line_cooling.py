@@ -1,17 +1,30 @@
+from functools import cache
 import sympy as sp
 from ..process import Process
+from ..misc import lazy_attributes
 from .nbody_process import NBodyProcess
 from ..symbols import T, T5
 
-# put analytic fits for cooling efficiencies
-line_cooling_coeffs = {
-    "H": {"e-": 7.5e-19 * sp.exp(-118348 / T) / (1 + sp.sqrt(T5))},  # 1996ApJS..105...19K
-    "He+": {"e-": 5.54e-17 * T**-0.397 * sp.exp(-473638 / T) / (1 + sp.sqrt(T5))},  # 1996ApJS..105...19K
-    "C+": {
-        "e-": 1e-27 * 4890 / sp.sqrt(T) * sp.exp(-91.211 / T) / sp.Symbol("Z_C"),  # 2023MNRAS.519.3154H
-        "H": 1e-27 * 0.47 * T**0.15 * sp.exp(-91.211 / T) / sp.Symbol("Z_C"),  # 2023MNRAS.519.3154H
-    },
-}
+__all__ = ["line_cooling_fits", "LineCoolingSimple"]
+
+
+@cache
+def line_cooling_fits():
+    """Returns the dict of analytic fits for line cooling efficiencies, keyed by emitter then collider, built on
+    first use"""
+    return {
+        "H": {"e-": 7.5e-19 * sp.exp(-118348 / T) / (1 + sp.sqrt(T5))},  # 1996ApJS..105...19K
+        "He+": {"e-": 5.54e-17 * T**-0.397 * sp.exp(-473638 / T) / (1 + sp.sqrt(T5))},  # 1996ApJS..105...19K
+        "C+": {
+            "e-": 1e-27 * 4890 / sp.sqrt(T) * sp.exp(-91.211 / T) / sp.Symbol("Z_C"),  # 2023MNRAS.519.3154H
+            "H": 1e-27 * 0.47 * T**0.15 * sp.exp(-91.211 / T) / sp.Symbol("Z_C"),  # 2023MNRAS.519.3154H
+        },
+    }
+
+
+_LAZY_ATTRIBUTES = {"line_cooling_coeffs": line_cooling_fits}
+__getattr__ = lazy_attributes(__name__, _LAZY_ATTRIBUTES)
+__all__ += list(_LAZY_ATTRIBUTES)  # so that star-imports include them
 
 
 def LineCoolingSimple(emitter: str, collider=None) -> NBodyProcess:
@@ -32,15 +45,14 @@ def LineCoolingSimple(emitter: str, collider=None) -> NBodyProcess:
     -------
     An NBodyProcess instance whose heat attribute is the line cooling process's cooling rate in erg cm^-3
     """
-
+    line_cooling_coeffs = line_cooling_fits()
     if emitter not in line_cooling_coeffs:
         raise NotImplementedError(f"Line cooling not implemented for {emitter}")
 
     coeffs = line_cooling_coeffs[emitter]
 
     if collider is None:  # if we haven't specified a collider, just take all of them and return the sum
-        p = [LineCoolingSimple(emitter, c) for c in coeffs]
-        return sum(p, Process())  # type: ignore # have to put a 0-process in here as start variable or it will try to add 0 + process
+        return Process.compose(LineCoolingSimple(emitter, c) for c in coeffs)
 
     process = NBodyProcess({emitter, collider})
     if collider not in line_cooling_coeffs[emitter]:
@@ -1,12 +1,20 @@
 """Implementation of recombination process"""
 
+from functools import cache
 from ..process import Process
 from .nbody_process import NBodyProcess
-from ..misc import recombine
-from ..symbols import T, T3, T6
+from ..misc import recombine, lazy_attributes
+from ..symbols import T
 from .ionization import ionization_energy
 import sympy as sp
 
+__all__ = [
+    "Recombination",
+    "GasPhaseRecombination",
+    "hydrogenic_recombination_rate",
+    "gasphase_recombination_fits",
+]
+
 
 class Recombination(NBodyProcess):
     """
@@ -63,16 +71,17 @@ def GasPhaseRecombination(ion=None) -> Recombination:
     process: Recombination
         `Process` instance describing the gas-phase recombination process
     """
+    rates, cooling = gasphase_recombination_fits()
     if ion is None:
-        return sum([GasPhaseRecombination(s) for s in gasphase_recombination_rates], Process())
+        return Process.compose(GasPhaseRecombination(s) for s in rates)
 
     process = Recombination(ion)
     process.name = f"Gas-phase recombination of {ion}"
 
-    if ion not in gasphase_recombination_rates:
+    if ion not in rates:
         raise NotImplementedError(f"{ion} does not have an available gas-phase recombination coefficient.")
-    process.rate_coefficient = gasphase_recombination_rates[ion]
-    process.heat_rate_coefficient = -gasphase_recombination_cooling[ion]
+    process.rate_coefficient = rates[ion]
+    process.heat_rate_coefficient = -cooling[ion]
     return process
 
 
@@ -89,24 +98,38 @@ def hydrogenic_recombination_rate(Z):
     )
 
 
-# All fits below are from Verner & Ferland 1996
-gasphase_recombination_rates = {
-    "H+": hydrogenic_recombination_rate(1),
-    "He+": 9.356e-10
-    / (
-        sp.sqrt(T / 4.266e-2)
-        * sp.Pow((1.0 + sp.sqrt(T / 4.266e-2)), 0.2108)
-        * sp.Pow((1.0 + sp.sqrt(T / 3.676e7)), 1.7892)
-    )
-    + 1.9e-3 * T**-1.5 * sp.exp(-4.7e5 / T) * (1 + 0.3 * sp.exp(-9.4e4 / T)),
-    "He++": hydrogenic_recombination_rate(2),
-}
-# an electron—ion pair removes the mean kinetic energy during recombination
-# To a good approximation, the mean energy lost by the gas during dielectronic recombination of He+ is the w = 2 excitation energy of He+.
-mean_kinetic_energy = 1.036e-16 * T
-gasphase_recombination_cooling = {
-    "H+": mean_kinetic_energy * gasphase_recombination_rates["H+"],
-    "He+": 1.55e-26 * T**-0.3647,
-    "He++": mean_kinetic_energy * gasphase_recombination_rates["He++"],
+@cache
+def gasphase_recombination_fits():
+    """Returns the dicts of gas-phase recombination rate coefficients and cooling rate coefficients, built on first
+    use"""
+    # All fits below are from Verner & Ferland 1996
+    rates = {
+        "H+": hydrogenic_recombination_rate(1),
+        "He+": 9.356e-10
+        / (
+            sp.sqrt(T / 4.266e-2)
+            * sp.Pow((1.0 + sp.sqrt(T / 4.266e-2)), 0.2108)
+            * sp.Pow((1.0 + sp.sqrt(T / 3.676e7)), 1.7892)
+        )
+        + 1.9e-3 * T**-1.5 * sp.exp(-4.7e5 / T) * (1 + 0.3 * sp.exp(-9.4e4 / T)),
+        "He++": hydrogenic_recombination_rate(2),
+    }
+    # an electron—ion pair removes the mean kinetic energy during recombination
+    # To a good approximation, the mean energy lost by the gas during dielectronic recombination of He+ is the w = 2 excitation energy of He+.
+    mean_kinetic_energy = 1.036e-16 * T
+    cooling = {
+        "H+": mean_kinetic_energy * rates["H+"],
+        "He+": 1.55e-26 * T**-0.3647,
+        "He++": mean_kinetic_energy * rates["He++"],
+    }
+    cooling["He++"] = 4 * cooling["H+"]  # H-like
+    return rates, cooling
+
+
+_LAZY_ATTRIBUTES = {
+    "gasphase_recombination_rates": lambda: gasphase_recombination_fits()[0],
+    "gasphase_recombination_cooling": lambda: gasphase_recombination_fits()[1],
+    "mean_kinetic_energy": lambda: 1.036e-16 * T,
 }
-gasphase_recombination_cooling["He++"] = 4 * gasphase_recombination_cooling["H+"]  # H-like
+__getattr__ = lazy_attributes(__name__, _LAZY_ATTRIBUTES)
+__all__ += list(_LAZY_ATTRIBUTES)  # so that star-imports include them
@@ -1,9 +1,12 @@
 """Class describing a generic heating/cooling process with no associated radiation or chemistry"""
 
 from ..process import Process
+from ..misc import lazy_attributes
 from ..symbols import c_s, G, ρ, T, n_e, z
 import sympy as sp
 
+__all__ = ["ThermalProcess", "PdV_heating_process", "inv_compton_cooling_process"]
+
 
 class ThermalProcess(Process):
     """Generic heating/cooling process"""
@@ -13,10 +16,19 @@ class ThermalProcess(Process):
         self.heat_per_volume = heating_rate
 
 
-PdV_heating = ThermalProcess(
-    sp.Symbol("C_1") * c_s**2 * sp.sqrt(4 * sp.pi * G * ρ), name="Grav. Compression"
-)  # 1998ApJ...495..346M
+def PdV_heating_process():
+    """Returns the heating process due to gravitational compression"""
+    return ThermalProcess(
+        sp.Symbol("C_1") * c_s**2 * sp.sqrt(4 * sp.pi * G * ρ), name="Grav. Compression"
+    )  # 1998ApJ...495..346M
+
+
+def inv_compton_cooling_process():
+    """Returns the inverse Compton cooling process off the CMB"""
+    return ThermalProcess(5.41e-36 * n_e * T * (1 + z) ** 4, name="Inverse Compton Cooling")  # 1986ApJ...301..522I
+
 
-inv_compton_cooling = ThermalProcess(
-    5.41e-36 * n_e * T * (1 + z) ** 4, name="Inverse Compton Cooling"
-)  # 1986ApJ...301..522I
+# module-level instances, built on first access
+_LAZY_ATTRIBUTES = {"PdV_heating": PdV_heating_process, "inv_compton_cooling": inv_compton_cooling_process}
+__getattr__ = lazy_attributes(__name__, _LAZY_ATTRIBUTES)
+__all__ += list(_LAZY_ATTRIBUTES)  # so that star-imports include them
@@ -0,0 +1,248 @@
+"""Tabulation of the temperature-dependent coefficients of a network on a log-T grid, so that the generated kernels can
+interpolate them instead of evaluating their closed-form fits"""
+
+import numpy as np
+import sympy as sp
+import jax.numpy as jnp
+
+TABLE_DEFAULTS = {"T_range": (10.0, 1e9), "rtol": 1e-4, "points_per_dex": None, "max_points_per_dex": 1024}
+LOG_FLOOR = -745.0  # ln of the smallest subnormal float64: coefficients below this are 0 to any precision
+
+
+def table_options(tabulate):
+    """Normalizes the tabulate argument of the solvers - False/None, True or a dict of options for coefficient_table -
+    into a hashable tuple of options, or None if tabulation is off"""
+    if not tabulate:
+        return None
+    options = dict(TABLE_DEFAULTS, **(tabulate if isinstance(tabulate, dict) else {}))
+    options["T_range"] = tuple(float(T) for T in options["T_range"])
+    return tuple(sorted(options.items()))
+
+
+def coefficient_table(
+    coefficients, variable, T_range=(10.0, 1e9), rtol=1e-4, points_per_dex=None, max_points_per_dex=1024
+):
+    """Tabulates coefficients on a grid uniform in log T, refining it until the interpolation error is within rtol
+
+    Each coefficient k(T) of constant sign is interpolated with cubic Hermite splines in ln|k| against ln T, using its
+    exact logarithmic derivative at the grid points. This is accurate to 4th order in the grid spacing and keeps the
+    relative error uniform across the many decades spanned by exponential cutoffs. Coefficients that change sign (e.g.
+    derivatives of rates that peak) are interpolated in k instead.
+
+    Parameters
+    ----------
+    coefficients: dict
+        Dict mapping coefficient symbols to their expressions in variable, e.g. from codegen.extract_coefficients
+    variable: sympy.Symbol
+        The variable the coefficients depend on, e.g. T
+    T_range: tuple, optional
+        Range of variable covered by the table (default: (10, 1e9)). Values outside it are clamped to the range.
+    rtol: float, optional
+        Target maximum relative interpolation error (default: 1e-4). In float32 kernels, errors much below 1e-5 are not
+        reachable for steep coefficients, since the rounding of ln T alone changes them by more than that.
+    points_per_dex: int, optional
+        Fixed grid resolution. If not given, the resolution starts at 8 points per dex and is doubled until the error
+        is within rtol.
+    max_points_per_dex: int, optional
+        Maximum resolution tried when refining (default: 1024)
+
+    Returns
+    -------
+    table: dict
+        JSON-serializable table, to be evaluated with coefficient_interpolator
+    report: dict
+        Error report of the final table, see table_error_report
+    """
+    functions = [coefficient_functions(expr, variable) for expr in coefficients.values()]
+    resolution = points_per_dex or 8
+    while True:
+        table = build_table(functions, T_range, resolution)
+        table["names"] = [str(s) for s in coefficients]
+        report = table_error_report(coefficients, variable, table, functions)
+        if points_per_dex or report["max_relative_error"] <= rtol or 2 * resolution > max_points_per_dex:
+            return table, report
+        resolution *= 2
+
+
+def coefficient_functions(expr, variable):
+    """Lambdifies a coefficient, its logarithm and their derivatives with respect to ln(variable) as float64 numpy
+    functions"""
+    log_expr = sp.expand_log(sp.log(expr), force=True)  # ln(-k) and ln(k) differ by a constant, so share a derivative
+    return {
+        "k": sp.lambdify(variable, expr, "numpy"),
+        "dk": sp.lambdify(variable, sp.diff(expr, variable) * variable, "numpy"),
+        "log_k": sp.lambdify(variable, sp.expand_log(sp.log(-expr), force=True), "numpy"),
+        "dlog_k": sp.lambdify(variable, sp.diff(log_expr, variable) * variable, "numpy"),
+        "log_k_positive": sp.lambdify(variable, log_expr, "numpy"),
+    }
+
+
+def evaluate(func, T):
+    """Evaluates a lambdified function in float64 on the array T"""
+    with np.errstate(all="ignore"):
+        return np.broadcast_to(func(T), T.shape).astype(np.float64)
+
+
+def build_table(functions, T_range, points_per_dex):
+    """Evaluates coefficients and their logarithmic derivatives on a grid with points_per_dex points per dex in T
+
+    Parameters
+    ----------
+    functions: list
+        Dicts of lambdified functions of each coefficient, from coefficient_functions
+    T_range: tuple
+        Range of T covered by the table
+    points_per_dex: int
+        Grid resolution
+
+    Returns
+    -------
+    table: dict
+        Dict with the natural-log grid start "log_T_min" and spacing "step", the tabulated "values" and "slopes"
+        (derivatives with respect to ln T) of each coefficient, whether each is interpolated in "log" space, its
+        "sign" and the "points_per_dex"
+    """
+    log_T_min, log_T_max = np.log(T_range[0]), np.log(T_range[1])
+    num_points = int(np.ceil((log_T_max - log_T_min) / np.log(10) * points_per_dex)) + 1
+    log_T = np.linspace(log_T_min, log_T_max, num_points)
+    T = np.exp(log_T)
+
+    values, slopes, log_mode, signs = [], [], [], []
+    for f in functions:
+        k = evaluate(f["k"], T)
+        nonzero = k[k != 0]
+        sign = float(np.sign(nonzero[0])) if len(nonzero) else 1.0
+        if len(nonzero) and np.all(np.sign(nonzero) == sign):
+            y = evaluate(f["log_k_positive"] if sign > 0 else f["log_k"], T)
+            with np.errstate(divide="ignore"):
+                y = np.where(np.isfinite(y), y, np.log(np.abs(k)))  # log of a sum whose terms underflow
+            dy = evaluate(f["dlog_k"], T)
+            clipped = ~(y > LOG_FLOOR)
+            y, dy = np.where(clipped, LOG_FLOOR, y), np.where(clipped | ~np.isfinite(dy), 0.0, dy)
+            log_mode.append(True)
+        else:
+            y, dy = k, evaluate(f["dk"], T)
+            log_mode.append(False)
+            sign = 1.0
+        values.append(y.tolist())
+        slopes.append(dy.tolist())
+        signs.append(sign)
+
+    return {
+        "log_T_min": float(log_T_min),
+        "step": float(log_T[1] - log_T[0]),
+        "points_per_dex": points_per_dex,
+        "values": values,
+        "slopes": slopes,
+        "log": log_mode,
+        "sign": signs,
+    }
+
+
+def coefficient_interpolator(table, derivatives=False):
+    """Returns a JAX function of T returning the array of all tabulated coefficients at T
+
+    T is a scalar for use inside vmapped kernels, but any array shape broadcasts, adding a trailing coefficient axis.
+    The Hermite splines are stored as the cubic polynomial coefficients of each grid interval, so that an evaluation
+    is a single row lookup and Horner's rule.
+
+    Parameters
+    ----------
+    table: dict
+        Table from coefficient_table
+    derivatives: bool, optional
+        Whether to also return the derivatives of the coefficients with respect to T, from the same splines, after the
+        coefficients themselves (default: False)
+    """
+    y, m = np.array(table["values"]).T, table["step"] * np.array(table["slopes"]).T
+    y0, y1, m0, m1 = y[:-1], y[1:], m[:-1], m[1:]
+    polynomials = jnp.array(np.concatenate([y0, m0, 3 * (y1 - y0) - 2 * m0 - m1, 2 * (y0 - y1) + m0 + m1], axis=1))
+    log_mode, sign = jnp.array(table["log"]), jnp.array(table["sign"])
+    log_T_min, step, num_intervals = table["log_T_min"], table["step"], y.shape[0] - 1
+
+    def interpolate(T):
+        u = (jnp.log(T) - log_T_min) / step
+        i = jnp.clip(jnp.floor(u), 0, num_intervals - 1).astype(int)
+        t = jnp.clip(u - i, 0, 1)[..., None]
+        a, b, c, d = jnp.split(polynomials[i], 4, axis=-1)
+        y = a + t * (b + t * (c + t * d))
+        k = jnp.where(log_mode, sign * jnp.exp(y), y)
+        if not derivatives:
+            return k
+        dy_dT = (b + t * (2 * c + 3 * t * d)) / (step * jnp.asarray(T)[..., None])
+        return jnp.concatenate([k, jnp.where(log_mode, k * dy_dT, dy_dT)], axis=-1)
+
+    return interpolate
+
+
+def tabulated_function(func, table, variable_index):
+    """Wraps a function of (*args, *coefficients, *coefficient_derivatives) generated with tabulated coefficients (see
+    codegen.extract_coefficients) into a function of args alone, interpolating the coefficients and their derivatives
+    from table at args[variable_index]"""
+    interpolate = coefficient_interpolator(table, derivatives=True)
+
+    def tabulated(*args):
+        return func(*args, *interpolate(args[variable_index]))
+
+    return tabulated
+
+
+def table_error_report(coefficients, variable, table, functions=None, samples_per_interval=3):
+    """Measures the relative error of the interpolated coefficients against their exact expressions
+
+    The error is sampled at interior points of every grid interval, where interpolation errors peak, in the precision
+    of the JAX kernels. Points where a coefficient is too small to be represented in that precision are skipped. For
+    coefficients that change sign, the error is measured relative to the largest magnitude at the ends of the
+    interval, since it is unbounded relative to the value itself near a root.
+
+    Parameters
+    ----------
+    coefficients: dict
+        Dict mapping the tabulated coefficient symbols to their expressions
+    variable: sympy.Symbol
+        The variable the coefficients depend on
+    table: dict
+        Table built from the coefficients
+    functions: list, optional
+        Lambdified coefficients from coefficient_functions, if already available
+    samples_per_interval: int, optional
+        Number of points sampled per grid interval (default: 3)
+
+    Returns
+    -------
+    report: dict
+        Dict with the table's "points_per_dex" and "T_range", the overall "max_relative_error" and, under
+        "coefficients", a dict of the "expr", interpolation "mode" and "max_relative_error" of each coefficient
+    """
+    if functions is None:
+        functions = [coefficient_functions(expr, variable) for expr in coefficients.values()]
+    num_points = len(table["values"][0])
+    t = (np.arange(samples_per_interval) + 1) / (samples_per_interval + 1)
+    log_T = table["log_T_min"] + table["step"] * (np.arange(num_points - 1)[:, None] + t).ravel()
+    T = jnp.asarray(np.exp(log_T))
+    interpolated = coefficient_interpolator(table)(T)
+    T = np.asarray(T, dtype=np.float64)  # compare at the same, possibly rounded, T: steep cutoffs amplify rounding
+    tiny = 1e3 * jnp.finfo(interpolated.dtype).tiny
+    interpolated = np.asarray(interpolated, dtype=np.float64)
+
+    report = {}
+    for j, (symbol, expr) in enumerate(coefficients.items()):
+        exact = evaluate(functions[j]["k"], T)
+        if table["log"][j]:
+            scale = np.abs(exact)
+        else:
+            nodes = np.abs(np.array(table["values"][j]))
+            scale = np.repeat(np.maximum(nodes[:-1], nodes[1:]), samples_per_interval)
+        resolved = np.isfinite(exact) & (scale > tiny)
+        error = np.abs(interpolated[:, j] - exact)[resolved] / scale[resolved]
+        report[str(symbol)] = {
+            "expr": str(expr),
+            "mode": "log" if table["log"][j] else "linear",
+            "max_relative_error": float(error.max()) if len(error) else 0.0,
+        }
+    return {
+        "points_per_dex": table["points_per_dex"],
+        "T_range": tuple(float(np.exp(table["log_T_min"] + table["step"] * i)) for i in (0, num_points - 1)),
+        "max_relative_error": max([c["max_relative_error"] for c in report.values()], default=0.0),
+        "coefficients": report,
+    }
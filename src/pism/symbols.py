@@ -13,6 +13,9 @@ G = sp.Symbol("G")  # gravitational constant
 n_e = sp.Symbol("n_e-")  # electron number density
 z = sp.Symbol("z")  # cosmological redshift
 
+k_B = 1.380649e-16  # Boltzmann constant in erg/K
+eV = 1.602176634e-12  # electron volt in erg
+
 
 def n_(species: str):
     return sp.Symbol(f"n_{species}")
@@ -0,0 +1,347 @@
+"""Precomputed tables of equilibrium abundances and net cooling, built adaptively from Process.steadystate, with fast
+interpolated queries"""
+
+import json
+from itertools import product
+import numpy as np
+import sympy as sp
+import jax.numpy as jnp
+from .numerics.solvers import BOUNDS
+
+
+class EquilibriumTable:
+    """Rectilinear table of equilibrium abundances (relative to H) and the net cooling function
+    cooling = -heat / n_Htot^2 in erg cm^3 s^-1, as functions of a set of known quantities, e.g. (T, n_Htot, Y)
+
+    Abundances x are stored as log10(x + abundance_floor) and the cooling function as asinh(cooling / cooling_floor)
+    / ln(10): both are logarithmic well above the floor, and errors are measured relative to the floor below it. If T
+    is solved for rather than an axis, the equilibrium T is tabulated as log10(T) instead of the cooling function,
+    which vanishes there. Axes spanning more than a decade of positive values are stored as log10. Queries interpolate
+    multilinearly in these variables.
+
+    Parameters
+    ----------
+    axes: dict
+        Dict mapping the name of each known quantity to the 1D array of its grid points
+    fields: dict
+        Dict mapping each field name to its values on the grid, in the stored (transformed) variables
+    log_axes: iterable
+        Names of the axes stored as log10
+    metadata: dict, optional
+        Further JSON-serializable information about how the table was built, including the "abundance_floor" and
+        "cooling_floor" the fields are stored with
+    """
+
+    def __init__(self, axes, fields, log_axes, metadata=None):
+        self.axes = {name: np.asarray(grid) for name, grid in axes.items()}
+        self.fields = {name: np.asarray(values) for name, values in fields.items()}
+        self.log_axes = tuple(log_axes)
+        self.metadata = metadata or {}
+        self._query = None
+
+    def __repr__(self):
+        shape = "x".join(str(len(g)) for g in self.axes.values())
+        return f"EquilibriumTable({shape} grid over {', '.join(self.axes)}; fields {', '.join(self.fields)})"
+
+    def save(self, path):
+        """Saves the table to a compressed .npz file"""
+        arrays = {f"axis_{name}": grid for name, grid in self.axes.items()}
+        arrays.update({f"field_{name}": values.astype(np.float32) for name, values in self.fields.items()})
+        header = {"axes": list(self.axes), "fields": list(self.fields), "log_axes": list(self.log_axes)}
+        header["metadata"] = self.metadata
+        np.savez_compressed(path, header=json.dumps(header), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Loads a table saved with EquilibriumTable.save"""
+        with np.load(path) as data:
+            header = json.loads(str(data["header"]))
+            axes = {name: data[f"axis_{name}"] for name in header["axes"]}
+            fields = {name: data[f"field_{name}"] for name in header["fields"]}
+        return cls(axes, fields, header["log_axes"], header["metadata"])
+
+    def query_function(self, fields=None):
+        """Returns a pure JAX function interpolating the table, which can be used inside jitted or vmapped code
+
+        Parameters
+        ----------
+        fields: iterable, optional
+            Names of the fields to return (default: all)
+
+        Returns
+        -------
+        query: callable
+            Function of the known quantities as positional arrays in the order of the table's axes, returning a dict
+            of the interpolated fields in physical units. Points outside the table are clamped to its edges.
+        """
+        fields = list(self.fields) if fields is None else list(fields)
+        grids = [jnp.asarray(grid) for grid in self.axes.values()]
+        is_log = [name in self.log_axes for name in self.axes]
+        values = jnp.asarray(np.stack([self.fields[f] for f in fields], axis=-1), dtype=jnp.float32)
+        floors = {"abundance": self.metadata["abundance_floor"], "cooling": self.metadata.get("cooling_floor")}
+
+        def query(*coords):
+            coords = jnp.broadcast_arrays(*[jnp.asarray(c, dtype=values.dtype) for c in coords])
+            indices, weights = [], []
+            for x, grid, log in zip(coords, grids, is_log):
+                x = jnp.log10(x) if log else x
+                i = jnp.clip(jnp.searchsorted(grid, x) - 1, 0, len(grid) - 2)
+                indices.append(i)
+                weights.append(jnp.clip((x - grid[i]) / (grid[i + 1] - grid[i]), 0, 1)[..., None])
+
+            result = 0
+            for corner in product((0, 1), repeat=len(grids)):
+                weight = 1
+                for c, w in zip(corner, weights):
+                    weight = weight * (w if c else 1 - w)
+                result = result + weight * values[tuple(i + c for i, c in zip(indices, corner))]
+            return {f: physical_values(f, result[..., j], floors) for j, f in enumerate(fields)}
+
+        return query
+
+    def query(self, **coords):
+        """Interpolates all fields at the given values of the known quantities, passed by name
+
+        Returns
+        -------
+        result: dict
+            Dict of the interpolated fields
+        """
+        if self._query is None:
+            self._query = self.query_function()
+        return self._query(*[coords[name] for name in self.axes])
+
+
+def stored_values(field, x, floor):
+    """Transforms a field from physical units to the variable it is tabulated in, given the abundance floor or, for
+    the cooling field, the cooling floor"""
+    if field == "cooling":
+        return np.arcsinh(x / floor) / np.log(10)
+    if field == "T":
+        return np.log10(x)
+    return np.log10(np.maximum(x, 0) + floor)
+
+
+def physical_values(field, y, floors):
+    """Inverse of stored_values, given the dict of the "abundance" and "cooling" floors"""
+    if field == "cooling":
+        return floors["cooling"] * jnp.sinh(y * np.log(10))
+    if field == "T":
+        return 10**y
+    return jnp.maximum(10**y - floors["abundance"], 0)
+
+
+def build_equilibrium_table(
+    process,
+    axes,
+    guess,
+    fixed=None,
+    tol=0.01,
+    abundance_floor=1e-4,
+    max_depth=8,
+    max_points=10**6,
+    cooling=True,
+    cooling_floor=1e-30,
+    steadystate_tol=1e-5,
+    **steadystate_kwargs,
+):
+    """Builds a table of equilibrium abundances and cooling with Process.steadystate, refining the grid adaptively
+
+    Starting from the given grid, each pass solves for equilibrium at the midpoints of every interval of each axis
+    (across the whole grid of the other axes) that has not yet been found to interpolate well. Where any field at the
+    midpoint differs from the multilinear interpolation of its neighbours by more than tol (in dex, for both abundances
+    and cooling), the midpoint is added to the axis. This refines the grid only where the solution changes quickly,
+    e.g. across the H and He ionization fronts in T. The interpolated neighbours also serve as the Newton guesses of
+    the new points.
+
+    Parameters
+    ----------
+    process: Process
+        The network to tabulate
+    axes: dict
+        Dict mapping each known quantity that varies across the table, e.g. "T" and "n_Htot", to a 1D array of the
+        initial grid points. Axes of positive values spanning more than a decade are refined in log10.
+    guess: dict
+        Dict of guesses for the abundances of the unknowns relative to H, and for T if it is solved for, either
+        scalars or arrays broadcastable to the initial grid, as for steadystate. Networks that are all proportional to
+        some abundance have spurious roots where it vanishes (e.g. no electrons), so the guess should be close enough
+        to the physical root at all initial grid points - e.g. mostly ionized for collisional ionization equilibrium.
+    fixed: dict, optional
+        Dict of known quantities held fixed across the table, e.g. {"Y": 0.24}
+    tol: float, optional
+        Maximum interpolation error tolerated at interval midpoints, in dex (default: 0.01)
+    abundance_floor: float, optional
+        Abundance below which errors are measured in absolute rather than relative terms (default: 1e-4). Species
+        obtained from conservation laws by subtraction, e.g. H+ = n_Htot - H in neutral gas, are only resolved to
+        roughly steadystate_tol in absolute terms, so a lower floor makes the refinement chase solver noise.
+    max_depth: int, optional
+        Maximum number of times an interval of the initial grid can be halved (default: 8)
+    max_points: int, optional
+        Refinement stops once the grid reaches this many points (default: 10**6)
+    cooling: bool, optional
+        Whether to tabulate the net cooling function as the "cooling" field (default: True). If T is solved for, the
+        equilibrium T is tabulated as the "T" field instead.
+    cooling_floor: float, optional
+        Magnitude of the cooling function in erg cm^3 s^-1 below which it is tabulated linearly rather than
+        logarithmically, so that its errors there are measured relative to this value (default: 1e-30)
+    steadystate_tol: float, optional
+        Relative tolerance of the equilibrium solves (default: 1e-5). Species obtained by subtraction from
+        conservation laws inherit the absolute error of the others, so this should be well below tol.
+    **steadystate_kwargs:
+        Further keyword arguments passed to steadystate, e.g. careful_steps
+
+    Returns
+    -------
+    table: EquilibriumTable
+        The table, whose metadata records the number of refinement passes, of steadystate solves and of points that
+        did not converge
+    """
+    fixed = fixed or {}
+    names = list(axes)
+    log_axes = [name for name in names if np.min(axes[name]) > 0 and np.max(axes[name]) >= 10 * np.min(axes[name])]
+    grids = [np.unique(np.log10(axes[n]) if n in log_axes else np.asarray(axes[n], dtype=float)) for n in names]
+    floors = {"abundance": abundance_floor, "cooling": cooling_floor if cooling else None}
+    solver = TableSolver(process, names, log_axes, fixed, floors, dict(steadystate_kwargs, tol=steadystate_tol))
+
+    mesh = np.meshgrid(*grids, indexing="ij")
+    guess = {s: np.broadcast_to(g, mesh[0].shape) for s, g in guess.items()}
+    values = solver.solve(mesh, guess)
+    checked = [np.zeros(len(g) - 1, dtype=bool) for g in grids]  # intervals known to interpolate within tol
+    depth = [np.zeros(len(g) - 1, dtype=int) for g in grids]  # number of times each interval has been halved
+
+    num_passes = 0
+    while values[..., 0].size < max_points:
+        num_passes += 1
+        refined = False
+        for a in range(len(grids)):
+            unchecked = np.flatnonzero(~checked[a])
+            if not len(unchecked):
+                continue
+            midpoints = 0.5 * (grids[a][unchecked] + grids[a][unchecked + 1])
+            predicted = 0.5 * (np.take(values, unchecked, axis=a) + np.take(values, unchecked + 1, axis=a))
+            mesh = np.meshgrid(*[midpoints if b == a else g for b, g in enumerate(grids)], indexing="ij")
+            solved = solver.solve(mesh, solver.guesses(predicted))
+
+            error = np.abs(solved - predicted)
+            error = np.max(np.moveaxis(np.where(np.isnan(error), 0, error), a, 0).reshape(len(unchecked), -1), axis=1)
+            refine = (error > tol) & (depth[a][unchecked] < max_depth)
+            checked[a][unchecked[~refine]] = True
+            if not refine.any():
+                continue
+
+            refined = True
+            insert = unchecked[refine] + 1  # insertion positions in the old grid, before which the midpoints go
+            grids[a] = np.insert(grids[a], insert, midpoints[refine])
+            values = np.insert(values, insert, np.compress(refine, solved, axis=a), axis=a)
+            checked[a] = np.insert(checked[a], insert - 1, False)  # each refined interval becomes 2 unchecked ones
+            depth[a][insert - 1] += 1
+            depth[a] = np.insert(depth[a], insert - 1, depth[a][insert - 1])
+            if values[..., 0].size >= max_points:
+                break
+        if not refined:
+            break
+
+    fields = {f: values[..., j] for j, f in enumerate(solver.fields)}
+    metadata = {
+        "fixed": {k: float(v) for k, v in fixed.items()},
+        "tol": tol,
+        "steadystate_tol": steadystate_tol,
+        "abundance_floor": abundance_floor,
+        "cooling_floor": cooling_floor,
+        "max_depth": max_depth,
+        "num_passes": num_passes,
+        "num_solves": solver.num_solves,
+        "num_unconverged": solver.num_unconverged,
+    }
+    return EquilibriumTable(dict(zip(names, grids)), fields, log_axes, metadata)
+
+
+class TableSolver:
+    """Solves for equilibrium on grids of table points for build_equilibrium_table, returning the stored fields
+
+    Parameters
+    ----------
+    process: Process
+        The network to tabulate
+    names: list
+        Names of the table axes
+    log_axes: list
+        Names of the axes whose grid points are log10 values
+    fixed: dict
+        Known quantities held fixed across the table
+    floors: dict
+        The "abundance" floor and the "cooling" floor of the tabulated fields, the latter None to skip the cooling
+        field
+    steadystate_kwargs: dict
+        Keyword arguments passed to steadystate
+    """
+
+    def __init__(self, process, names, log_axes, fixed, floors, steadystate_kwargs):
+        self.process = process
+        self.names = names
+        self.log_axes = log_axes
+        self.fixed = fixed
+        self.floors = floors
+        self.steadystate_kwargs = steadystate_kwargs
+        self.fields = None
+        self.num_solves = 0
+        self.num_unconverged = 0
+        self.heat = None
+        if floors["cooling"] is not None and process.heat != 0:
+            self.heat_symbols = sorted(sp.sympify(process.heat).free_symbols, key=str)
+            self.heat = sp.lambdify(self.heat_symbols, process.heat, "numpy")
+
+    def solve(self, mesh, guess):
+        """Solves at the points of mesh, a list of arrays of the axis coordinates, from guess, a dict of abundance
+        arrays of the same shape, returning the array of stored fields with a trailing field axis"""
+        shape = mesh[0].shape
+        knowns = {n: (10**x if n in self.log_axes else x).ravel() for n, x in zip(self.names, mesh)}
+        knowns.update({n: np.full(knowns[self.names[0]].size, v, dtype=float) for n, v in self.fixed.items()})
+        guess = {s: np.ravel(g) for s, g in guess.items()}
+        sol, info = self.process.steadystate(
+            knowns, guess, output_abundances=False, return_info=True, **self.steadystate_kwargs
+        )
+        self.num_solves += knowns[self.names[0]].size
+        self.num_unconverged += int(np.sum(~np.asarray(info["converged"])))
+
+        sol = {s: np.asarray(x, dtype=np.float64) for s, x in sol.items()}
+        if self.fields is None:
+            # at the equilibrium T the net cooling vanishes, so T is tabulated instead
+            self.fields = sorted(s for s in sol if s != "T")
+            self.fields += ["T"] if "T" in sol else ["cooling"] if self.heat is not None else []
+        values = []
+        for field in self.fields:
+            if field == "cooling":
+                x, floor = -self.evaluate_heat(sol, knowns) / knowns["n_Htot"] ** 2, self.floors["cooling"]
+            elif field == "T":
+                x, floor = sol["T"], None
+            else:
+                x, floor = sol[field] / knowns["n_Htot"], self.floors["abundance"]
+            values.append(stored_values(field, x, floor).reshape(shape))
+        return np.stack(values, axis=-1)
+
+    def evaluate_heat(self, sol, knowns):
+        """Evaluates the net heating rate per unit volume of the process for the solution sol"""
+        args = []
+        for symbol in self.heat_symbols:
+            name = str(symbol)
+            if name.startswith("n_") and name[2:] in sol:
+                args.append(sol[name[2:]])
+            elif name in sol:
+                args.append(sol[name])
+            else:
+                args.append(knowns[name])
+        with np.errstate(all="ignore"):
+            return np.broadcast_to(self.heat(*args), knowns["n_Htot"].shape)
+
+    def guesses(self, values):
+        """Converts an array of stored fields into a dict of guesses for the abundances, and for T if it is solved for.
+        Abundances that are 0 once the floor is subtracted are guessed at the smallest positive Newton iterate
+        instead, since unknowns all guessed at 0 would count as converged without any iteration."""
+        guesses = {}
+        for j, field in enumerate(self.fields):
+            if field == "T":
+                guesses[field] = 10 ** values[..., j]
+            elif field != "cooling":
+                guesses[field] = np.maximum(10 ** values[..., j] - self.floors["abundance"], BOUNDS["linear"][0])
+        return guesses
@@ -0,0 +1,41 @@
+import numpy as np
+import sympy as sp
+import jax
+import pytest
+from pism.processes import CollisionalIonization, GasPhaseRecombination
+from pism.ccode import c_compiler, build_c_library, CLibrary
+from pism.kernels import solver_kernels, lambdify_kernel
+
+
+@pytest.mark.skipif(c_compiler() is None, reason="no C compiler")
+def test_c_module_matches_jax(tmp_path, N=256):
+    """The compiled C module should agree with the JAX kernels generated from the same network"""
+    system = CollisionalIonization() + GasPhaseRecombination()
+    module = system.generate_c("cie", directory=tmp_path)
+    assert (tmp_path / "cie.h").exists()
+    library = CLibrary(build_c_library(module["source"], tmp_path, "cie"), "cie", 4, 2)
+
+    rng = np.random.default_rng(0)
+    n_Htot, Y = 10 ** rng.uniform(-2, 2, N), 0.24 * np.ones(N)
+    y = Y / (4 - 4 * Y)
+    densities = {"H": 0.5 * n_Htot, "He": 0.4 * y * n_Htot, "He+": 0.3 * y * n_Htot, "T": 10 ** rng.uniform(3.5, 7, N)}
+    x = np.array([densities[s.replace("n_", "")] for s in module["variables"]]).T
+    p = np.array([{"n_Htot": n_Htot, "Y": Y}[s] for s in module["parameters"]]).T
+
+    variables = [sp.Symbol(v) for v in module["variables"]]
+    parameters = [sp.Symbol(v) for v in module["parameters"]]
+    network = system.time_derivatives()
+    exprs = [network[str(v).replace("n_", "", 1) if v != sp.Symbol("T") else "T"] for v in variables]
+    kernels = solver_kernels(exprs, variables, parameters, [], options={"cse": True, "jacobian": "symbolic"})
+    heat = lambdify_kernel(variables + parameters, [system.apply_network_reductions(system.heat)])
+
+    expected = {
+        "rhs": jax.vmap(kernels.func)(x, *p.T),
+        "jacobian": jax.vmap(kernels.jacfunc)(x, *p.T),
+        "heat": jax.vmap(heat)(x, *p.T)[:, 0],
+    }
+    for func, values in expected.items():
+        result = library.evaluate(func, x, p)
+        values = np.asarray(values, dtype=np.float64)
+        scale = np.max(np.abs(values).reshape(N, -1), axis=1).reshape((N,) + (1,) * (values.ndim - 1))
+        assert np.all(np.abs(result - values) <= 1e-4 * scale), func
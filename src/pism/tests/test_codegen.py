@@ -0,0 +1,46 @@
+import numpy as np
+import sympy as sp
+from pism.processes import CollisionalIonization, GasPhaseRecombination
+from pism.codegen import operation_counts, sparse_jacobian
+from pism.kernels import lambdify_kernel
+
+
+def test_cse_residual():
+    """CSE should cut the transcendental calls of the CIE residual without changing its value"""
+    network = (CollisionalIonization() + GasPhaseRecombination()).get_thermochem_network()
+    exprs = list(network.values())
+    args = [sp.Symbol(f"n_{s}") for s in network if s != "T"] + list(sp.symbols("T n_Htot Y"))
+
+    raw, reduced = operation_counts(exprs), operation_counts(exprs, cse=True)
+    assert reduced["transcendentals"] < raw["transcendentals"]
+    assert reduced["flops"] < raw["flops"]
+
+    X = np.array([10.0, 1e-3, 1e-3, 2e4])
+    params = (100.0, 0.24)
+    f1 = lambdify_kernel(args, exprs)(X, *params)
+    f2 = lambdify_kernel(args, exprs, cse=True)(X, *params)
+    assert np.allclose(f1, f2, rtol=1e-5, atol=0)
+
+
+def test_sparse_jacobian():
+    """Sparse Jacobian entries should match the dense sympy Jacobian and omit only its zeros"""
+    system = CollisionalIonization() + GasPhaseRecombination()
+    network = system.get_thermochem_network()
+    variables = [sp.Symbol("T") if s == "T" else sp.Symbol(f"n_{s}") for s in network]
+    dense = sp.Matrix(list(network.values())).jacobian(variables)
+    sparse = sparse_jacobian(list(network.values()), variables)
+    for i in range(dense.rows):
+        for j in range(dense.cols):
+            assert sp.simplify(dense[i, j] - sparse.get((i, j), 0)) == 0
+    assert len(system.network_jacobian(thermo=True)) == len(sparse)
+
+
+def test_steadystate_symbolic_jacobian():
+    system = CollisionalIonization() + GasPhaseRecombination()
+    N = 16
+    knowns = {"T": np.logspace(3, 6, N), "n_Htot": 100 * np.ones(N), "Y": 0.24 * np.ones(N)}
+    guesses = {"H": 0.5 * np.ones(N), "He": 1e-5 * np.ones(N), "He+": 1e-5 * np.ones(N)}
+    sol1 = system.steadystate(knowns, guesses, tol=1e-5, jacobian="symbolic")
+    sol2 = system.steadystate(knowns, guesses, tol=1e-5, jacobian="autodiff")
+    for s in sol1:
+        assert np.allclose(sol1[s], sol2[s], rtol=1e-3, atol=1e-6)
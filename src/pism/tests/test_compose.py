@@ -0,0 +1,27 @@
+import sympy as sp
+from pism import Process
+from pism.processes import CollisionalIonization, GasPhaseRecombination
+
+
+def test_compose_matches_sum():
+    """Bulk composition should give the same network and heating as summing the processes pairwise, with flat sums"""
+    processes = [CollisionalIonization(s) for s in ("H", "He", "He+")]
+    processes += [GasPhaseRecombination(i) for i in ("H+", "He+", "He++")]
+    composed, summed = Process.compose(processes), sum(processes, Process())
+    assert set(composed.network) == set(summed.network)
+    assert list(composed.network)[:3] == ["H", "H+", "e-"]  # order of first appearance
+    for species in composed.network:
+        assert sp.simplify(composed.network[species] - summed.network[species]) == 0
+        assert all(not isinstance(term, sp.Add) for term in sp.Add.make_args(composed.network[species]))
+    assert sp.simplify(composed.heat - summed.heat) == 0
+    assert composed.rate is None and len(composed.subprocesses) == len(processes)
+    assert composed.name == " + ".join(p.name for p in processes)
+
+
+def test_combine_networks():
+    """combine_networks should sum the rate equations of two networks, as composing processes with them does"""
+    ionization, recombination = CollisionalIonization(), GasPhaseRecombination()
+    combined = Process().combine_networks(ionization.network, recombination.network)
+    composed = (ionization + recombination).network
+    assert set(combined) == set(composed)
+    assert all(sp.simplify(combined[s] - composed[s]) == 0 for s in combined)
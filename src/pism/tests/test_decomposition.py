@@ -0,0 +1,53 @@
+import numpy as np
+import sympy as sp
+from pism import Process
+from pism.decomposition import strongly_connected_components
+from pism.processes import CollisionalIonization, GasPhaseRecombination
+from pism.symbols import n_, T
+
+
+def carbon_network():
+    """CIE network plus collisional ionization and radiative recombination of C/C+"""
+    ionization, recombination = Process("C ionization"), Process("C recombination")
+    ionization.rate = 1e-9 * sp.exp(-1.3e5 / T) * n_("C") * n_("e-")
+    recombination.rate = 1e-11 * (T / 1e4) ** -0.7 * n_("C+") * n_("e-")
+    for process, sign in ((ionization, 1), (recombination, -1)):
+        process.network["C"] -= sign * process.rate
+        process.network["C+"] += sign * process.rate
+        process.network["e-"] += sign * process.rate
+    return CollisionalIonization() + GasPhaseRecombination() + ionization + recombination
+
+
+def test_strongly_connected_components():
+    """Components should come out with every edge pointing to the same or an earlier component"""
+    graph = {"a": ["b"], "b": ["a", "c"], "c": ["c"], "d": ["c", "e"], "e": ["d"], "f": []}
+    components = strongly_connected_components(graph)
+    assert sorted(map(sorted, components)) == [["a", "b"], ["c"], ["d", "e"], ["f"]]
+    position = {node: i for i, component in enumerate(components) for node in component}
+    assert all(position[v] <= position[u] for u in graph for v in graph[u])
+
+
+def test_network_blocks():
+    """C feeds back on H and He through its electrons unless it is passive, and then forms a block of its own"""
+    system = carbon_network()
+    assert system.network_blocks() == [["H", "He", "He+", "C"]]
+    assert system.network_blocks(passive=["C", "C+"]) == [["H", "He", "He+"], ["C"]]
+    laws = {law.name: law.coefficients for law in system.with_passive(["C", "C+"]).conservation_laws}
+    assert laws["charge"] == {"H+": 1, "He+": 1, "He++": 2, "e-": -1}
+
+
+def test_steadystate_decompose():
+    """Block-sequential solves should match the monolithic solve of the same network"""
+    system = carbon_network()
+    N = 16
+    knowns = {"T": np.logspace(4, 6, N), "n_Htot": np.full(N, 10.0), "Y": np.full(N, 0.24), "x_C": np.full(N, 1e-4)}
+    options = {"tol": 1e-8, "precision": "float64"}
+    for passive in (None, ["C", "C+"]):
+        monolithic = system.steadystate(knowns, **options, passive=passive)
+        blocks, info = system.steadystate(knowns, **options, passive=passive, decompose=True, return_info=True)
+        assert np.all(info["converged"])
+        for species, x in monolithic.items():
+            assert np.allclose(blocks[species], x, rtol=1e-5, atol=1e-12), species
+    assert [block["unknowns"] for block in info["blocks"]] == [["H", "He", "He+"], ["C"]]
+    assert np.allclose(blocks["e-"], blocks["H+"] + blocks["He+"] + 2 * blocks["He++"], rtol=1e-6)
+    assert np.allclose(blocks["C"] + blocks["C+"], 1e-4, rtol=1e-6)
@@ -0,0 +1,44 @@
+import numpy as np
+from pism.symbols import k_B
+from pism.processes import CollisionalIonization, GasPhaseRecombination
+
+
+def test_evolve_to_equilibrium(N=16):
+    """Evolving the CIE network for many recombination times should relax it to the steady state, with either
+    integrator"""
+    system = CollisionalIonization() + GasPhaseRecombination()
+    knowns = {"T": np.logspace(4.2, 5.5, N), "n_Htot": 100 * np.ones(N), "Y": 0.24 * np.ones(N)}
+    initial = {"H": 0.5 * np.ones(N), "He": 0.03 * np.ones(N), "He+": 0.03 * np.ones(N)}
+
+    for method in ("ros2", "backward_euler"):
+        state, info = system.evolve(knowns, initial, 1e12, method=method, return_info=True)
+        assert np.all(info["success"])
+        # the evolved state is a converged guess for the Newton solve, which should stay put
+        guess = {s: state[s] for s in initial}
+        equilibrium = system.steadystate(knowns, guess, tol=1e-5)
+        for species in ("H", "H+", "He", "He+", "He++", "e-"):
+            assert np.allclose(state[species], equilibrium[species], rtol=1e-2, atol=1e-6)
+
+
+def test_evolve_temperature(N=8):
+    """Without T among the knowns, T is evolved too: recombination cooling and the drop in particle number must keep
+    the internal energy budget consistent, the change of 3/2 n_tot k_B T matching the time integral of the net heating
+    rate along the evolution"""
+    system = CollisionalIonization() + GasPhaseRecombination()
+    knowns = {"n_Htot": np.ones(N), "Y": 0.24 * np.ones(N)}
+    initial = {"H": 1e-3 * np.ones(N), "He": 1e-4 * np.ones(N), "He+": 1e-3 * np.ones(N), "T": np.logspace(4, 6, N)}
+    state = system.evolve(knowns, initial, 1e10)
+    assert np.all(np.isfinite(state["T"])) and np.all(state["T"] > 0)
+    assert set(state) == {"H", "H+", "He", "He+", "He++", "e-", "T"}
+
+    def energy(state):
+        n_tot = knowns["n_Htot"] * sum(state[s] for s in state if s != "T")
+        return 1.5 * k_B * n_tot * state["T"]
+
+    times = np.concatenate([[0], np.logspace(6, 10, 41)])
+    states = [system.evolve(knowns, initial, 1e-3)]  # completes the initial state with the conserved species
+    for t0, t1 in zip(times[:-1], times[1:]):
+        states.append(system.evolve(knowns, {s: states[-1][s] for s in initial}, t1 - t0))
+    heat = [system.heating_rates(knowns | s, precision="float64")["heat"] for s in states]
+    assert np.allclose(states[-1]["T"], state["T"], rtol=1e-3)
+    assert np.allclose(energy(states[-1]) - energy(states[0]), np.trapezoid(heat, times, axis=0), rtol=3e-2)
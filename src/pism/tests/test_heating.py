@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+import sympy as sp
+from pism.processes import CollisionalIonization, GasPhaseRecombination, LineCoolingSimple, FreeFreeEmission
+from pism.kernels import kernel_cache
+
+
+def test_heating_rates(N=1000):
+    """The fused evaluator should reproduce separately lambdified heating rates and rates of each subprocess, whose
+    heating rates add up to the net heating rate, and repeated evaluations should reuse the cached kernel"""
+    system = CollisionalIonization() + GasPhaseRecombination() + LineCoolingSimple("H") + FreeFreeEmission("H+")
+    rng = np.random.default_rng(0)
+    values = {"T": np.logspace(3, 7, N), "n_Htot": 10 ** rng.uniform(-2, 2, N), "Y": np.full(N, 0.24)}
+    values |= {s: rng.uniform(0, 1, N) for s in system.network}
+
+    kernel_cache.clear()
+    rates = system.heating_rates(values, precision="float64")
+    system.heating_rates(values, precision="float64")
+    assert kernel_cache.info().misses == 1 and kernel_cache.info().hits == 1
+
+    num_subprocesses = len(system.subprocesses)
+    assert rates["subprocesses"] == [p.name for p in system.subprocesses]
+    assert rates["subprocess_heat"].shape == rates["subprocess_rate"].shape == (N, num_subprocesses)
+    densities = {f"n_{s}": values[s] * values["n_Htot"] for s in system.network} | values
+    for column, process in enumerate(system.subprocesses):
+        for output, expr in (("subprocess_heat", process.heat), ("subprocess_rate", process.rate)):
+            symbols = sorted(sp.sympify(expr).free_symbols, key=str)
+            expected = sp.lambdify(symbols, expr, "numpy")(*(densities[str(s)] for s in symbols))
+            assert np.allclose(rates[output][:, column], expected, rtol=1e-6, atol=0)
+    assert np.allclose(rates["subprocess_heat"].sum(axis=1), rates["heat"], rtol=1e-8, atol=0)
+    assert np.all(rates["dust_heat"] == 0)
+
+    rates32 = system.heating_rates(values)
+    assert np.allclose(rates32["heat"], rates["heat"], rtol=1e-3, atol=1e-3 * np.abs(rates["heat"]).max())
+    with pytest.raises(ValueError, match="n_Htot"):
+        system.heating_rates({k: v for k, v in values.items() if k != "n_Htot"})
@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+import pism
+
+SRC = os.path.dirname(os.path.dirname(pism.__file__))
+
+
+def run_isolated(code):
+    """Runs code in a fresh interpreter with pism importable and returns its stdout"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([SRC, os.environ.get("PYTHONPATH", "")]))
+    return subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout
+
+
+def test_symbolic_api_does_not_import_jax_or_astropy():
+    """Building and reducing a network only needs sympy: jax and astropy should not be imported along the way"""
+    code = """
+import sys
+import pism
+print("sympy" in sys.modules, "jax" in sys.modules)
+from pism.processes import CollisionalIonization, GasPhaseRecombination
+network = CollisionalIonization() + GasPhaseRecombination()
+network.reduced_network, network.reduced_heat
+print("jax" in sys.modules, "astropy" in sys.modules)
+"""
+    assert run_isolated(code).split() == ["False", "False", "False", "False"]
+
+
+def test_lazy_attributes():
+    """Lazily-built attributes should still be accessible, and built only once"""
+    from pism import processes
+    from pism.processes import ionization, collisional_ionization_rates, PdV_heating
+
+    assert collisional_ionization_rates is ionization.collisional_ionization_rates
+    assert set(collisional_ionization_rates) == {"H", "He", "He+"}
+    assert set(processes.gasphase_recombination_rates) == {"H+", "He+", "He++"}
+    assert "C+" in processes.line_cooling_coeffs
+    assert processes.PdV_heating is PdV_heating and PdV_heating.name == "Grav. Compression"
+    assert abs(processes.ionization_energy("H") / 2.17896e-11 - 1) < 1e-5  # 13.6 eV in erg
+    assert pism.Process is processes.Process and callable(pism.kernel_cache_info)
+
+
+def test_star_imports():
+    """Star-imports should include the lazily-built attributes, and importing pism.processes should not build them"""
+    code = """
+import pism.processes
+print("PdV_heating" in vars(pism.processes.thermal_process))
+from pism.processes import *
+from pism import *
+print(PdV_heating.name == "Grav. Compression", "He+" in collisional_ionization_rates, callable(newton_rootsolve))
+"""
+    assert run_isolated(code).split() == ["False", "True", "True", "True"]
@@ -0,0 +1,53 @@
+import json
+import numpy as np
+import jax, jax.numpy as jnp
+import pism
+from pism.numerics import newton_rootsolve
+from pism.processes import CollisionalIonization, GasPhaseRecombination
+
+
+def test_instrument_steadystate(tmp_path, N=100):
+    """A first solve should record its reduction, code generation, compilation and Newton phases and a kernel cache
+    miss, a repeated solve a cache hit and no code generation, and both the statistics of their batch"""
+    system = CollisionalIonization() + GasPhaseRecombination()
+    knowns = {"T": np.logspace(3, 6, N), "n_Htot": np.full(N, 100.0), "Y": np.full(N, 0.24)}
+    pism.clear_kernel_cache()
+    records = []
+    with pism.instrument(callback=records.append) as first:
+        system.steadystate(knowns, tol=1e-4, cse=False, jacobian="autodiff")
+    with pism.instrument() as second:
+        system.steadystate(knowns, tol=1e-4, cse=False, jacobian="autodiff")
+
+    summary = first.as_dict()
+    assert records == summary["records"]
+    for path in ("steadystate", "steadystate/reduction", "steadystate/kernels/codegen", "steadystate/newton"):
+        assert summary["phases"][path]["calls"] == 1
+    assert any(path.endswith("xla_compile") for path in summary["phases"])
+    assert summary["cache"]["kernels"] == {"miss": 1}
+    assert second.cache()["kernels"] == {"memory": 1} and "steadystate/kernels/codegen" not in second.phases()
+    phases = second.phases()
+    assert phases["steadystate"]["seconds"] >= phases["steadystate/newton"]["seconds"]
+
+    for recorder in (first, second):
+        (solve,) = recorder.solves()
+        assert solve["batch_size"] == N and solve["converged_fraction"] == 1.0
+        assert sum(solve["iteration_histogram"]) == N
+
+    first.to_jsonl(tmp_path / "records.jsonl")
+    with open(tmp_path / "records.jsonl") as f:
+        assert [json.loads(line) for line in f] == records
+
+
+def test_instrument_newton_rootsolve(N=1000):
+    """Standalone solves should report per-point iteration counts, and nothing should be recorded outside the block"""
+    rng = np.random.default_rng(0)
+    params = np.c_[0.1 + rng.random(N) * 10, 0.1 + rng.random(N)]
+    func = jax.jit(lambda x, *params: x ** params[0] - params[1])
+    with pism.instrument() as recorder:
+        sol, info = newton_rootsolve(func, jnp.ones(N), params, return_info=True, precision="mixed")
+    newton_rootsolve(func, jnp.ones(N), params)
+
+    (solve,) = recorder.solves()
+    assert solve["precision"] == "mixed" and solve["max_iter"] == info["num_iter"].max()
+    assert solve["iteration_histogram"] == np.bincount(info["num_iter"]).tolist()
+    assert {"newton", "newton/float32", "newton/refinement"} <= set(recorder.phases())
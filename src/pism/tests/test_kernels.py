@@ -0,0 +1,95 @@
+import json
+import jax
+import numpy as np
+import sympy as sp
+from pism.processes import CollisionalIonization, GasPhaseRecombination
+from pism.kernels import (
+    KernelCache,
+    kernel_cache,
+    network_hash,
+    set_kernel_cache_dir,
+    lambdify_source,
+    function_from_source,
+)
+
+
+def cie_inputs(N=16):
+    Tgrid = np.logspace(3, 6, N)
+    knowns = {"T": Tgrid, "n_Htot": 100 * np.ones(N), "Y": 0.24 * np.ones(N)}
+    guesses = {"H": 0.5 * np.ones(N), "He": 1e-5 * np.ones(N), "He+": 1e-5 * np.ones(N)}
+    return knowns, guesses
+
+
+def test_steadystate_reuses_kernels():
+    """Repeated solves of the same system should hit the kernel cache and give identical results"""
+    system = CollisionalIonization() + GasPhaseRecombination()
+    knowns, guesses = cie_inputs()
+    kernel_cache.clear()
+    sol1 = system.steadystate(knowns, guesses)
+    assert kernel_cache.info().misses == 1
+    sol2 = system.steadystate(knowns, guesses)
+    info = kernel_cache.info()
+    assert info.hits == 1 and info.misses == 1 and info.currsize == 1
+    for s in sol1:
+        assert np.array_equal(sol1[s], sol2[s], equal_nan=True)
+
+
+def test_network_hash():
+    """Hash depends on the expressions and the argument ordering, not on object identity"""
+    x, y = sp.symbols("x y")
+    assert network_hash([x * y], [x], [y]) == network_hash([y * x], [sp.Symbol("x")], ["y"])
+    assert network_hash([x * y], [x], [y]) != network_hash([x * y], [y], [x])
+    assert network_hash([x * y], [x], [y]) != network_hash([x * y], [x], [y], {"cse": True})
+
+
+def test_lru_eviction():
+    cache = KernelCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # a is now most recently used
+    cache.put("c", 3)
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.get("b") is None
+    assert cache.info() == (1, 1, 2, 2)
+
+
+def test_disk_cache(tmp_path):
+    """A fresh in-memory cache should rebuild the kernels from disk without lambdify and give identical results"""
+    system = CollisionalIonization() + GasPhaseRecombination()
+    knowns, guesses = cie_inputs()
+    disk = set_kernel_cache_dir(tmp_path)
+    try:
+        kernel_cache.clear()
+        sol1 = system.steadystate(knowns, guesses)
+        assert disk.info().misses == 1 and disk.info().currsize == 1
+        kernel_cache.clear()
+        sol2 = system.steadystate(knowns, guesses)
+        assert disk.info().hits == 1
+    finally:
+        set_kernel_cache_dir(None)
+    for s in sol1:
+        assert np.array_equal(sol1[s], sol2[s], equal_nan=True)
+
+
+def test_disk_cache_integrity(tmp_path):
+    """Entries whose contents do not match the digest in their file name should be ignored, and disabling the cache
+    should restore the JAX compilation cache settings"""
+    previous = jax.config.jax_compilation_cache_dir
+    disk = set_kernel_cache_dir(tmp_path)
+    try:
+        assert jax.config.jax_compilation_cache_dir == str(tmp_path / "xla")
+        disk.save("key", {"code": "x = 1"})
+        assert disk.load("key")["code"] == "x = 1"
+        (filename,) = (tmp_path / "kernels").iterdir()
+        filename.write_text(filename.read_text().replace("x = 1", "x = 2"))
+        assert disk.load("key") is None and disk.info().hits == 1 and disk.info().misses == 1
+    finally:
+        set_kernel_cache_dir(None)
+    assert jax.config.jax_compilation_cache_dir == previous
+
+
+def test_function_from_source():
+    x, T = sp.symbols("x T")
+    source = lambdify_source([x, T], [x * sp.exp(-1 / T), sp.pi * sp.sqrt(T)])
+    f = function_from_source(json.loads(json.dumps(source)))
+    assert np.allclose(f(2.0, 4.0), [2 * np.exp(-0.25), 2 * np.pi])
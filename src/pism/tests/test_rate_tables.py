@@ -0,0 +1,57 @@
+import numpy as np
+import sympy as sp
+import jax.numpy as jnp
+from pism.processes import CollisionalIonization, GasPhaseRecombination
+from pism.codegen import extract_coefficients
+from pism.rate_tables import coefficient_table, coefficient_interpolator
+
+T = sp.Symbol("T")
+
+
+def cie_coefficients():
+    network = (CollisionalIonization() + GasPhaseRecombination()).time_derivatives(thermo=True)
+    exprs = list(network.values())
+    return exprs, *extract_coefficients(exprs, T)
+
+
+def test_extract_coefficients():
+    """Substituting the coefficients back should recover the original expressions, and only T-only factors that are
+    not polynomials should be extracted"""
+    exprs, reduced, coefficients = cie_coefficients()
+    assert all(c.free_symbols == {T} and not c.is_polynomial(T) for c in coefficients.values())
+    assert all(not (e.free_symbols & {T}) or e.has(T) for e in reduced)
+    point = {s: v for s, v in zip(sp.symbols("n_H n_He n_He+ n_Htot Y T"), (30.0, 3.0, 4.0, 100.0, 0.24, 3e4))}
+    for e, r in zip(exprs, reduced):
+        exact, rebuilt = float(e.subs(point)), float(r.subs(coefficients).subs(point))
+        assert np.isclose(exact, rebuilt, rtol=1e-10)
+
+
+def test_coefficient_table_error(rtol=1e-4):
+    """The error report should reach the requested bound, and hold up against the exact coefficients at T that were
+    not used to build it"""
+    _, _, coefficients = cie_coefficients()
+    table, report = coefficient_table(coefficients, T, T_range=(10, 1e9), rtol=rtol)
+    assert report["max_relative_error"] <= rtol
+    assert set(report["coefficients"]) == {str(s) for s in coefficients}
+
+    Tgrid = jnp.asarray(10 ** np.random.default_rng(0).uniform(1, 9, 10**4))
+    interpolated = np.asarray(coefficient_interpolator(table)(Tgrid), dtype=np.float64)
+    Tgrid = np.asarray(Tgrid, dtype=np.float64)
+    for j, expr in enumerate(coefficients.values()):
+        exact = sp.lambdify(T, expr, "numpy")(Tgrid)
+        resolved = np.abs(exact) > 1e-30
+        error = np.abs(interpolated[resolved, j] / exact[resolved] - 1)
+        assert error.max() < 2 * rtol
+
+
+def test_steadystate_tabulated():
+    """Solving with tabulated coefficients should agree with the closed-form kernels to within the table accuracy"""
+    system = CollisionalIonization() + GasPhaseRecombination()
+    N = 64
+    knowns = {"T": np.logspace(3, 6, N), "n_Htot": 100 * np.ones(N), "Y": 0.24 * np.ones(N)}
+    guesses = {"H": 0.5 * np.ones(N), "He": 1e-5 * np.ones(N), "He+": 1e-5 * np.ones(N)}
+    exact = system.steadystate(knowns, guesses, tol=1e-5)
+    tabulated, info = system.steadystate(knowns, guesses, tol=1e-5, tabulate={"rtol": 1e-5}, return_info=True)
+    assert info["table_report"]["max_relative_error"] < 1e-4
+    for s in exact:
+        assert np.allclose(tabulated[s], exact[s], rtol=1e-3, atol=1e-6)
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+import sympy as sp
+from pism import Process
+from pism.processes import CollisionalIonization, GasPhaseRecombination
+from pism.symbols import n_
+
+
+def sequential_reductions(system, expr):
+    """The original reduction: two passes of sequential substitutions"""
+    for _ in range(2):
+        for n, r in system.network_reduction_replacements.items():
+            expr = expr.subs(n, r)
+    return expr
+
+
+def test_reductions_match_sequential_substitution():
+    system = CollisionalIonization() + GasPhaseRecombination()
+    reduced = system.reduced_network
+    assert set(reduced) == {"H", "He", "He+"}
+    for species, rhs in reduced.items():
+        assert sp.expand(rhs - sequential_reductions(system, system.network[species])) == 0
+    assert sp.expand(system.reduced_heat - sequential_reductions(system, system.heat)) == 0
+
+
+def test_reduced_network_cache():
+    """The reduced network and heat should be computed once, and recomputed after the network or heat changes"""
+    system = CollisionalIonization() + GasPhaseRecombination()
+    first, second = system.reduced_network, system.reduced_network
+    assert all(first[s] is second[s] for s in first)
+    assert system.reduced_heat is system.reduced_heat
+
+    x = sp.Symbol("x")
+    system.network["H"] += x * n_("e-")
+    assert system.reduced_network["H"].has(x) and not system.reduced_network["H"].has(n_("e-"))
+    system.heat = system.heat + x
+    assert system.reduced_heat.has(x)
+
+
+def test_reduced_network_cache_ior():
+    """Merging species into the network in place with |= should also invalidate the cached reduced network"""
+    system = CollisionalIonization() + GasPhaseRecombination()
+    assert "X" not in system.reduced_network
+    network = system.network
+    system.network |= {"X": -n_("X")}
+    assert system.network is network and "X" in system.reduced_network
+
+
+def test_circular_reductions():
+    class Circular(Process):
+        @property
+        def network_reduction_replacements(self):
+            return {n_("H"): n_("H+"), n_("H+"): n_("H")}
+
+    with pytest.raises(ValueError):
+        Circular().reduced_network
+
+
+def toy_reaction(name, reactants, products, rate):
+    """Process converting reactants into products (lists of species, repeated for multiplicity) at the given rate"""
+    process = Process(name=name)
+    for species in reactants:
+        process.network[species] -= rate
+    for species in products:
+        process.network[species] += rate
+    return process
+
+
+def molecule_metal_network():
+    """CIE network plus H2 formation and destruction and a two-stage metal C/C+"""
+    T = sp.Symbol("T")
+    return Process.compose(
+        [
+            CollisionalIonization(),
+            GasPhaseRecombination(),
+            toy_reaction("H2 formation", ["H", "H"], ["H2"], 1e-17 * n_("H") ** 2),
+            toy_reaction("H2 dissociation", ["H2"], ["H", "H"], 1e-10 * sp.exp(-5e4 / T) * n_("H2") * n_("H")),
+            toy_reaction("C ionization", ["C"], ["C+", "e-"], 1e-9 * sp.exp(-1.3e5 / T) * n_("C") * n_("e-")),
+            toy_reaction("C recombination", ["C+", "e-"], ["C"], 1e-11 * n_("C+") * n_("e-")),
+        ]
+    )
+
+
+def test_conservation_laws():
+    """Element and charge laws should be derived from species composition, dropping those the network violates"""
+    system = molecule_metal_network()
+    laws = {law.name: law.coefficients for law in system.conservation_laws}
+    assert laws == {
+        "H": {"H": 1, "H+": 1, "H2": 2},
+        "He": {"He": 1, "He+": 1, "He++": 1},
+        "C": {"C": 1, "C+": 1},
+        "charge": {"H+": 1, "He+": 1, "He++": 2, "C+": 1, "e-": -1},
+    }
+    assert set(system.reduced_network) == {"H", "H2", "He", "He+", "C"}
+
+    system.network["C"] += 1e-20 * n_("H")  # a source of C, so that C is no longer conserved
+    assert "C" not in {law.name for law in system.conservation_laws}
+    assert set(system.reduced_network) == {"H", "H2", "He", "He+", "C", "C+"}
+
+
+def test_restore_eliminated_species():
+    """Solving a network with molecules and metals should restore every eliminated species, conserving each element
+    and charge"""
+    system = molecule_metal_network()
+    N = 4
+    knowns = {"T": np.logspace(4, 5.5, N), "n_Htot": np.full(N, 10.0), "Y": np.full(N, 0.24), "x_C": np.full(N, 1e-4)}
+    sol = system.steadystate(knowns, {"H2": np.full(N, 1e-3)}, tol=1e-6)  # default guesses for atoms and ions
+    assert set(sol) == set(system.network)
+    assert np.allclose(sol["H"] + sol["H+"] + 2 * sol["H2"], 1, rtol=1e-4)
+    assert np.allclose(sol["He"] + sol["He+"] + sol["He++"], 0.24 / (4 - 4 * 0.24), rtol=1e-4)
+    assert np.allclose(sol["C"] + sol["C+"], 1e-4, rtol=1e-4)
+    assert np.allclose(sol["e-"], sol["H+"] + sol["He+"] + 2 * sol["He++"] + sol["C+"], rtol=1e-4, atol=1e-5)
+    for species, n in sol.items():
+        assert np.all(np.isfinite(n)) and np.all(n > -1e-6), species
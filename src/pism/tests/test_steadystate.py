@@ -0,0 +1,149 @@
+import numpy as np
+import sympy as sp
+from pism import Process
+from pism.processes import CollisionalIonization, GasPhaseRecombination, LineCoolingSimple, FreeFreeEmission
+
+
+def cie_inputs(N):
+    Tgrid = np.logspace(3, 6, N)
+    knowns = {"T": Tgrid, "n_Htot": 100 * np.ones(N), "Y": 0.24 * np.ones(N)}
+    guesses = {"H": 0.5 * np.ones(N), "He": 1e-5 * np.ones(N), "He+": 1e-5 * np.ones(N)}
+    return knowns, guesses
+
+
+def test_steadystate_chunks(tmp_path, N=100, chunk_size=32):
+    """Chunked and streamed-to-disk solves should reproduce the monolithic solve"""
+    system = CollisionalIonization() + GasPhaseRecombination()
+    knowns, guesses = cie_inputs(N)
+    sol = system.steadystate(knowns, guesses, tol=1e-4)
+
+    chunks = list(system.steadystate_chunks(knowns, guesses, chunk_size=chunk_size, tol=1e-4))
+    assert len(chunks) == 4 and chunks[-1][0] == slice(96, 100)
+    for species in sol:
+        chunked = np.concatenate([c[species] for _, c in chunks])
+        assert np.allclose(chunked, sol[species], rtol=1e-4, atol=1e-8)
+
+    # iterator input of uneven chunks, written to a memory-mapped file
+    pieces = [
+        ({k: v[i : i + 50] for k, v in knowns.items()}, {k: v[i : i + 50] for k, v in guesses.items()})
+        for i in (0, 50)
+    ]
+    out = system.steadystate_to_npy(tmp_path / "sol.npy", iter(pieces), num_points=N, chunk_size=chunk_size, tol=1e-4)
+    out = np.load(tmp_path / "sol.npy", mmap_mode="r")
+    for species in sol:
+        assert np.allclose(out[species], sol[species], rtol=1e-4, atol=1e-8)
+
+
+def test_default_guess_and_continuation(N=1000):
+    """The closed-form default guesses should be the exact CIE solution of the H/He network, and a continuation sweep
+    along T should reproduce cold starts from the README guesses in fewer iterations"""
+    system = CollisionalIonization() + GasPhaseRecombination()
+    knowns, guesses = cie_inputs(N)
+    sol, info = system.steadystate(knowns, guesses, tol=1e-4, return_info=True)
+
+    default = system.default_guess(knowns)
+    assert set(default) == {"H", "H+", "He", "He+", "He++"}
+    for species in ("H", "He"):  # neutral fractions are resolved to float32 precision by the solver
+        assert np.allclose(default[species], sol[species], rtol=1e-3, atol=1e-6)
+
+    sol_default, info_default = system.steadystate(knowns, tol=1e-4, return_info=True)
+    sol_swept, info_swept = system.steadystate(knowns, guesses, tol=1e-4, return_info=True, continuation="T")
+    for s in (sol_default, sol_swept):
+        for species in sol:
+            assert np.allclose(s[species], sol[species], rtol=1e-3, atol=1e-6)
+    assert info_default["num_iter"].sum() < 0.2 * info["num_iter"].sum()
+    assert info_swept["num_iter"].sum() < 0.2 * info["num_iter"].sum()
+
+
+def test_thermal_equilibrium_globalization(N=200):
+    """Line search and trust region steps should find the thermochemical equilibrium of heated H/He gas, balancing
+    heating and cooling, from T = 10^4 K and the closed-form abundances there"""
+    system = CollisionalIonization() + GasPhaseRecombination() + LineCoolingSimple("H") + LineCoolingSimple("He+")
+    system += Process.compose(FreeFreeEmission(i) for i in ("H+", "He+", "He++"))
+    heating = Process(name="Constant heating")
+    heating.heat = sp.Symbol("Gamma") * sp.Symbol("n_Htot")
+    system += heating
+
+    rng = np.random.default_rng(0)
+    n_Htot = 10 ** rng.uniform(-2, 2, N)
+    knowns = {"n_Htot": n_Htot, "Y": np.full(N, 0.24), "Gamma": n_Htot * 10 ** rng.uniform(-25, -22.5, N)}
+    guess = {"T": np.full(N, 1e4)}
+    guess |= system.default_guess(knowns, T=guess["T"])
+    symbols = sorted(system.heat.free_symbols, key=str)
+    heat = sp.lambdify(symbols, system.heat, "numpy")
+    for globalization in ("linesearch", "trust_region"):
+        sol, info = system.steadystate(knowns, guess, tol=1e-4, globalization=globalization, return_info=True)
+        values = {f"n_{s}": np.asarray(x, dtype=np.float64) * n_Htot for s, x in sol.items() if s != "T"}
+        values |= {"T": np.asarray(sol["T"], dtype=np.float64)} | knowns
+        imbalance = np.abs(heat(*(values[str(s)] for s in symbols))) / (knowns["Gamma"] * n_Htot)
+        assert np.all(info["converged"]) and np.all(imbalance < 1e-2)
+        assert np.mean(info["num_iter"]) < 30
+
+
+def test_steadystate_mixed_precision(N=1000):
+    """Mixed-precision solves should match a tightly converged float64 reference on the solved-for species far more
+    closely than float32 solves"""
+    system = CollisionalIonization() + GasPhaseRecombination()
+    knowns, guesses = cie_inputs(N)
+    ref = system.steadystate(knowns, guesses, tol=1e-10, precision="float64")
+    sol32 = system.steadystate(knowns, guesses, tol=1e-4)
+    sol, info = system.steadystate(knowns, guesses, tol=1e-4, precision="mixed", return_info=True)
+    # below ~10^4 K the ionized fractions vanish and Newton converges only linearly, so points there only count as
+    # converged once given enough float64 steps
+    assert np.all(info["converged"][knowns["T"] > 1e4])
+    _, info_refined = system.steadystate(
+        knowns, guesses, tol=1e-4, precision="mixed", refinement_steps=30, return_info=True
+    )
+    assert np.all(info_refined["converged"])
+    for species in ("H", "He", "He+"):
+        assert sol[species].dtype == np.float64
+        error = np.abs(sol[species] / ref[species] - 1)[ref[species] > 1e-12]
+        error32 = np.abs(np.asarray(sol32[species], dtype=np.float64) / ref[species] - 1)[ref[species] > 1e-12]
+        assert error.max() < 1e-6 and error.max() <= error32.max()
+
+
+def test_steadystate_log_variables(N=1000):
+    """Solves in log variables should converge everywhere and match the exact closed-form CIE state, including trace
+    abundances down to 10^-30 that the e- and H stopping criterion of linear solves leaves unconverged"""
+    system = CollisionalIonization() + GasPhaseRecombination()
+    knowns, guesses = cie_inputs(N)
+    exact = system.default_guess(knowns)
+    sol, info = system.steadystate(knowns, guesses, tol=1e-10, precision="float64", variables="log", return_info=True)
+    assert np.all(info["converged"])
+    for species in ("H", "He", "He+"):
+        resolved = exact[species] > 1e-30
+        assert np.allclose(sol[species][resolved], exact[species][resolved], rtol=1e-8, atol=0)
+
+
+def test_steadystate_sensitivities(N=200, h=1e-3):
+    """Implicit-function-theorem derivatives of the CIE solution with respect to T and n_Htot, and to a rate
+    coefficient left symbolic, should match float64 central differences, and JVPs and gradients should agree with
+    them"""
+    import jax, jax.numpy as jnp
+
+    k_boost = sp.Symbol("k_boost")  # extra collisional ionization of H, with a known rate coefficient
+    boost = Process("H ionization boost")
+    rate = k_boost * sp.Symbol("n_H") * sp.Symbol("n_e-")
+    boost.network["H"] -= rate
+    boost.network["H+"] += rate
+    boost.network["e-"] += rate
+    system = CollisionalIonization() + GasPhaseRecombination() + boost
+    knowns, _ = cie_inputs(N)
+    knowns["T"] = np.logspace(3.8, 5, N)
+    knowns["k_boost"] = np.full(N, 1e-10)
+    sol, sensitivities = system.steadystate_sensitivities(knowns, tol=1e-6, wrt=["T", "k_boost"])
+
+    for quantity in ("T", "k_boost"):
+        up, down = (dict(knowns, **{quantity: knowns[quantity] * (1 + s)}) for s in (h, -h))
+        up, down = (system.steadystate(k, tol=1e-10, precision="float64") for k in (up, down))
+        for species in ("H", "He", "He+"):  # compared as logarithmic derivatives d ln x / d ln quantity
+            finite_difference = (up[species] - down[species]) / (2 * h * sol[species])
+            derivative = np.asarray(sensitivities[species][quantity] * knowns[quantity] / sol[species])
+            assert np.allclose(derivative, finite_difference, rtol=1e-2, atol=1e-4)
+
+    _, tangent = system.steadystate_jvp(knowns, {"T": 0.01 * knowns["T"]}, tol=1e-6)
+    solve = system.steadystate_function(knowns, tol=1e-6)
+    gradient = jax.grad(lambda values: solve(values)["H"].sum())({k: jnp.asarray(v) for k, v in knowns.items()})
+    for derivative in (tangent["H"] / (0.01 * knowns["T"]), gradient["T"]):
+        scale = np.abs(sensitivities["H"]["T"]).max()
+        assert np.allclose(derivative, sensitivities["H"]["T"], rtol=1e-3, atol=1e-4 * scale)
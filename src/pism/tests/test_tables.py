@@ -0,0 +1,60 @@
+import numpy as np
+import sympy as sp
+import jax, jax.numpy as jnp
+from pism import EquilibriumTable, Process
+from pism.processes import CollisionalIonization, GasPhaseRecombination, LineCoolingSimple
+
+
+def test_equilibrium_table(tmp_path, tol=0.05):
+    """The adaptive table should concentrate its points around the ionization fronts, interpolate the equilibrium
+    within tolerance, survive a round trip to disk and be queryable inside jitted code"""
+    system = CollisionalIonization() + GasPhaseRecombination()
+    axes = {"T": np.logspace(3, 8, 11), "n_Htot": np.array([0.1, 10.0])}
+    guess = {"H": 1e-3, "He": 1e-4, "He+": 1e-3}
+    table = system.equilibrium_table(axes, guess, fixed={"Y": 0.24}, tol=tol)
+    log_T = table.axes["T"]
+    assert np.sum((log_T > 4) & (log_T < 5)) > np.sum(log_T > 6)  # refined across the H and He fronts
+    assert len(table.axes["n_Htot"]) == 2  # CIE abundances are independent of density
+
+    N = 64
+    rng = np.random.default_rng(0)
+    T, n_Htot = 10 ** rng.uniform(3, 8, N), 10 ** rng.uniform(-1, 1, N)
+    result = table.query(T=T, n_Htot=n_Htot)
+    knowns = {"T": T, "n_Htot": n_Htot, "Y": 0.24 * np.ones(N)}
+    exact = system.steadystate(knowns, {s: np.asarray(result[s]) for s in guess}, tol=1e-5)
+    floor = table.metadata["abundance_floor"]
+    for species in ("H", "H+", "He", "He+", "He++", "e-"):
+        error = np.log10(np.asarray(result[species]) + floor) - np.log10(np.maximum(exact[species], 0) + floor)
+        assert np.max(np.abs(error)) < 2 * tol
+    assert np.all(np.asarray(result["cooling"])[T > 2e4] > 0)
+
+    table.save(tmp_path / "table.npz")
+    loaded = EquilibriumTable.load(tmp_path / "table.npz")
+    assert loaded.metadata == table.metadata
+    query = jax.jit(loaded.query_function(["H", "cooling"]))
+    result_jit = query(jnp.asarray(T), jnp.asarray(n_Htot))
+    assert np.allclose(result_jit["H"], result["H"], rtol=1e-5)
+    assert np.allclose(result_jit["cooling"], result["cooling"], rtol=1e-5)
+
+
+def test_equilibrium_table_temperature(tol=0.005):
+    """Without T among the axes, the table should tabulate the equilibrium T, refine on it, and start the solves of new
+    points from interpolated T guesses"""
+    system = CollisionalIonization() + GasPhaseRecombination() + LineCoolingSimple("H") + LineCoolingSimple("He+")
+    heating = Process(name="Constant heating")
+    heating.heat = sp.Symbol("Gamma") * sp.Symbol("n_Htot")
+    system += heating
+    axes = {"Gamma": np.logspace(-25, -23, 3)}
+    guess = {"T": 1e4, "H": 0.9, "He": 0.07, "He+": 0.01}
+    table = system.equilibrium_table(
+        axes, guess, fixed={"n_Htot": 1.0, "Y": 0.24}, tol=tol, globalization="linesearch"
+    )
+    assert "T" in table.fields and "cooling" not in table.fields
+    assert len(table.axes["Gamma"]) > 3 and table.metadata["num_unconverged"] == 0
+
+    N = 16
+    Gamma = 10 ** np.random.default_rng(0).uniform(-25, -23, N)
+    result = table.query(Gamma=Gamma)
+    knowns = {"n_Htot": np.ones(N), "Y": np.full(N, 0.24), "Gamma": Gamma}
+    exact = system.steadystate(knowns, {s: np.asarray(result[s]) for s in guess}, tol=1e-5, globalization="linesearch")
+    assert np.max(np.abs(np.log10(np.asarray(result["T"]) / exact["T"]))) < 2 * tol